@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import codecs
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional, Sequence, Tuple
 
 import duckdb
 
+from utils.arrays import np
+
 from models.bien import Bien
+from models.cambios import CambiosBienes
+from models.cartera import COLUMNAS_BIEN, Cartera
 from models.empresa import EmpresaData
-from models.indice_facpce import GestorIndicesFACPCE
+from models.indice_facpce import GestorIndicesFACPCE, mes_clave
+from utils.csv_handler import BYTES_MUESTRA, CsvHandler, detectar_formato
+from modules.amortizaciones import CLAVES_AMORTIZACION, AmortizacionCalculator, CuboAmortizaciones
 
 SCHEMA = r"""
 CREATE SEQUENCE IF NOT EXISTS seq_empresa START 1;
@@ -41,6 +50,7 @@ CREATE TABLE IF NOT EXISTS bienes (
   fecha_ingreso VARCHAR,
   fecha_baja VARCHAR,
   valor_origen DOUBLE,
+  mes_ingreso INTEGER,
   PRIMARY KEY (empresa_id, id),
     FOREIGN KEY (empresa_id) REFERENCES empresa(id)
 );
@@ -59,11 +69,235 @@ CREATE TABLE IF NOT EXISTS indices_facpce (
   fecha VARCHAR PRIMARY KEY,
   indice DOUBLE NOT NULL,
   observaciones VARCHAR,
-  fecha_carga VARCHAR
+  fecha_carga VARCHAR,
+  mes INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS amortizaciones_cubo (
+  empresa_id INTEGER NOT NULL,
+  bien_id INTEGER NOT NULL,
+  anio INTEGER NOT NULL,
+  amort_inicio DOUBLE,
+  amort_ejercicio DOUBLE,
+  amort_acumulada DOUBLE,
+  valor_residual DOUBLE,
+  PRIMARY KEY (empresa_id, bien_id, anio)
 );
 
-INSERT OR IGNORE INTO meta(key, value) VALUES ('schema_version', '2');
-UPDATE meta SET value = '2' WHERE key = 'schema_version' AND value <> '2';
+-- Month keys (year * 12 + month - 1, as models.indice_facpce.mes_clave) let bienes join
+-- indices_facpce on an integer. Both are filled on save; older files are backfilled below.
+ALTER TABLE bienes ADD COLUMN IF NOT EXISTS mes_ingreso INTEGER;
+ALTER TABLE indices_facpce ADD COLUMN IF NOT EXISTS mes INTEGER;
+CREATE INDEX IF NOT EXISTS idx_bienes_mes ON bienes(empresa_id, mes_ingreso);
+CREATE INDEX IF NOT EXISTS idx_indices_mes ON indices_facpce(mes);
+
+-- DD/MM/AAAA parsed as Validators.parsear_fecha does (NULL when Python rejects it).
+CREATE OR REPLACE MACRO fecha_dmy(fecha) AS CASE
+  WHEN regexp_full_match(fecha, '(3[01]|[12][0-9]|0[1-9]|[1-9]| [1-9])/(1[0-2]|0[1-9]|[1-9])/[0-9]{4}')
+   AND NOT ends_with(fecha, '/0000')
+  THEN try_strptime(fecha, '%d/%m/%Y') END;
+
+CREATE OR REPLACE MACRO mes_clave(fecha) AS year(fecha_dmy(fecha)) * 12 + month(fecha_dmy(fecha)) - 1;
+
+-- round() with Python's result bit for bit. DuckDB's round() breaks binary ties differently,
+-- so values within two ulps of a half are decided on the exact product x * 10^d (Dekker split).
+CREATE OR REPLACE MACRO _parte_alta(x) AS (134217729.0 * x) - ((134217729.0 * x) - x);
+CREATE OR REPLACE MACRO _redondear_escalado(x, y, f) AS CASE
+  WHEN NOT isfinite(y) OR abs(y) >= 4503599627370496.0 THEN x
+  WHEN abs(y - floor(y) - 0.5) > 2 * (nextafter(abs(y), 'inf'::DOUBLE) - abs(y)) THEN round(y) / f
+  ELSE (floor(y) + CASE
+          WHEN (y - (floor(y) + 0.5)) + ((_parte_alta(x) * f - y) + (x - _parte_alta(x)) * f) > 0 THEN 1
+          WHEN (y - (floor(y) + 0.5)) + ((_parte_alta(x) * f - y) + (x - _parte_alta(x)) * f) < 0 THEN 0
+          WHEN floor(y) % 2 = 0 THEN 0
+          ELSE 1 END) / f
+END;
+CREATE OR REPLACE MACRO redondear(x, d) AS
+  _redondear_escalado(x::DOUBLE, x::DOUBLE * power(10.0, d), power(10.0, d));
+
+-- CSV import (import_csv): str.strip() (every character Python counts as whitespace),
+-- the text parse_decimal_argentino hands to float() (from the stripped value without spaces)
+-- and the plain integers int() takes.
+CREATE OR REPLACE MACRO _strip_py(x) AS CASE
+  WHEN ascii(x) BETWEEN 33 AND 126 AND ascii(right(x, 1)) BETWEEN 33 AND 126 THEN x
+  ELSE trim(x,
+  chr(9) || chr(10) || chr(11) || chr(12) || chr(13) || chr(28) || chr(29) || chr(30) ||
+  chr(31) || chr(32) || chr(133) || chr(160) || chr(5760) || chr(8192) || chr(8193) ||
+  chr(8194) || chr(8195) || chr(8196) || chr(8197) || chr(8198) || chr(8199) || chr(8200) ||
+  chr(8201) || chr(8202) || chr(8232) || chr(8233) || chr(8239) || chr(8287) || chr(12288)) END;
+CREATE OR REPLACE MACRO _decimal_argentino(x) AS CASE
+  WHEN contains(x, '.') AND contains(x, ',') THEN replace(replace(x, '.', ''), ',', '.')
+  ELSE replace(x, ',', '.') END;
+CREATE OR REPLACE MACRO _entero_simple(x) AS x = '' OR regexp_full_match(x, '[+-]?[0-9]{1,9}');
+CREATE OR REPLACE MACRO _decimal_simple(x) AS regexp_full_match(x, '[+-]?([0-9]+[.]?[0-9]*|[.][0-9]+)');
+
+-- Amortizations of liquidation year anio (NULL: each company's ejercicio_liquidacion) for a
+-- company, or all of them when empresa is NULL. Same formula and rounding as
+-- AmortizacionCalculator.calcular_amortizacion; a fecha_baja Python rejects is ignored.
+CREATE OR REPLACE MACRO amortizaciones_bienes(anio, empresa) AS TABLE
+WITH base AS (
+  SELECT b.empresa_id,
+         b.id AS bien_id,
+         b.valor_origen,
+         b.anos_amortizacion AS anos,
+         b.ejercicio_alta AS alta,
+         COALESCE(b.es_amortizable, false) AND b.anos_amortizacion <> 0 AS amortizable,
+         year(fecha_dmy(b.fecha_baja)) AS anio_baja,
+         COALESCE(anio, year(fecha_dmy(e.ejercicio_liquidacion))) AS anio_liq
+    FROM bienes b
+    JOIN empresa e ON e.id = b.empresa_id
+   WHERE empresa IS NULL OR b.empresa_id = empresa
+), anual AS (
+  SELECT *,
+         valor_origen / anos AS amort_anual,
+         anio_liq - alta AS anios_hasta_inicio
+    FROM base
+), periodo AS (
+  SELECT *,
+         CASE WHEN anios_hasta_inicio <= 0 THEN 0.0
+              ELSE amort_anual * least(anios_hasta_inicio, anos) END AS inicio,
+         CASE WHEN anios_hasta_inicio + 1 <= 0 OR anios_hasta_inicio + 1 > anos THEN 0.0
+              WHEN anio_baja < anio_liq THEN 0.0
+              ELSE amort_anual END AS ejercicio
+    FROM anual
+), acumulado AS (
+  SELECT *, least(inicio + ejercicio, valor_origen) AS acumulada
+    FROM periodo
+)
+SELECT empresa_id,
+       bien_id,
+       anio_liq AS anio,
+       CASE WHEN amortizable THEN redondear(inicio, 2) ELSE 0.0 END AS amort_inicio,
+       CASE WHEN amortizable THEN redondear(ejercicio, 2) ELSE 0.0 END AS amort_ejercicio,
+       CASE WHEN amortizable THEN redondear(acumulada, 2) ELSE 0.0 END AS amort_acumulada,
+       CASE WHEN amortizable THEN redondear(valor_origen - acumulada, 2)
+            ELSE valor_origen END AS valor_residual
+  FROM acumulado;
+
+-- One index per month; like GestorIndicesFACPCE, the last row loaded for a month wins.
+CREATE OR REPLACE MACRO indices_por_mes() AS TABLE
+SELECT mes, arg_max(indice, rowid) AS indice
+  FROM indices_facpce
+ WHERE mes IS NOT NULL
+ GROUP BY mes;
+
+-- Coefficients of every bien against its company's ejercicio_liquidacion and
+-- ejercicio_anterior; falta_indice marks bienes the Python calculator reports as errors.
+CREATE OR REPLACE MACRO coeficientes_bienes(empresa) AS TABLE
+SELECT b.empresa_id,
+       b.id AS bien_id,
+       b.valor_origen AS vo,
+       COALESCE(b.es_amortizable, false) AS amortizable,
+       COALESCE(fecha_dmy(b.fecha_ingreso) > fecha_dmy(e.ejercicio_anterior), false) AS bien_nuevo,
+       origen.indice IS NULL OR actual.indice IS NULL OR anterior.indice IS NULL
+         OR origen.indice = 0 AS falta_indice,
+       actual.indice / NULLIF(origen.indice, 0) AS coef_actual,
+       anterior.indice / NULLIF(origen.indice, 0) AS coef_anterior
+  FROM bienes b
+  JOIN empresa e ON e.id = b.empresa_id
+  LEFT JOIN indices_por_mes() origen ON origen.mes = b.mes_ingreso
+  LEFT JOIN indices_por_mes() actual ON actual.mes = mes_clave(e.ejercicio_liquidacion)
+  LEFT JOIN indices_por_mes() anterior ON anterior.mes = mes_clave(e.ejercicio_anterior)
+ WHERE empresa IS NULL OR b.empresa_id = empresa;
+
+-- InflacionCalculator._calcular_valores_ajustados for every bien of a company (all companies
+-- when empresa is NULL), fed by amortizaciones_bienes for its ejercicio_liquidacion.
+-- Rows with error = true lack an index; indices_faltantes lists which ones.
+CREATE OR REPLACE MACRO ajuste_inflacion_bienes(empresa) AS TABLE
+WITH base AS (
+  SELECT c.*,
+         COALESCE(a.amort_inicio, 0.0) AS ai,
+         COALESCE(a.amort_ejercicio, 0.0) AS ae
+    FROM coeficientes_bienes(empresa) c
+    LEFT JOIN amortizaciones_bienes(NULL, empresa) a
+      ON a.empresa_id = c.empresa_id AND a.bien_id = c.bien_id
+), origen AS (
+  SELECT *,
+         CASE WHEN bien_nuevo THEN 0.0 ELSE vo * coef_anterior END AS vo_ant,
+         vo * coef_actual AS vo_act,
+         CASE WHEN bien_nuevo THEN 0.0 ELSE ai * coef_anterior END AS ai_ant_bruta,
+         ai * coef_actual AS ai_act_bruta
+    FROM base
+), inicio AS (
+  SELECT *,
+         CASE WHEN vo_ant < ai_ant_bruta THEN vo_ant ELSE ai_ant_bruta END AS ai_ant,
+         CASE WHEN vo_act < ai_act_bruta THEN vo_act ELSE ai_act_bruta END AS ai_act
+    FROM origen
+), ejercicio AS (
+  SELECT *,
+         CASE WHEN ai_act >= vo_act THEN 0.0
+              WHEN vo_act - ai_act < ae * coef_actual THEN vo_act - ai_act
+              ELSE ae * coef_actual END AS ae_aj
+    FROM inicio
+), cierre AS (
+  SELECT *,
+         CASE WHEN vo_act < ai_act + ae_aj THEN vo_act ELSE ai_act + ae_aj END AS cierre_aj
+    FROM ejercicio
+), residual AS (
+  SELECT *,
+         CASE WHEN vo_act - cierre_aj > 0.0 THEN vo_act - cierre_aj ELSE 0.0 END AS residual_aj,
+         amortizable AND falta_indice AS error
+    FROM cierre
+)
+-- Not amortizable: the fixed result of _crear_resultado_no_amortizable; error: NULLs
+SELECT empresa_id,
+       bien_id,
+       error,
+       CASE WHEN NOT amortizable THEN vo WHEN NOT error THEN redondear(vo, 2) END
+         AS valor_origen_historico,
+       CASE WHEN NOT amortizable THEN 0.0 WHEN NOT error THEN redondear(vo_ant, 2) END
+         AS vo_ajustado_anterior,
+       CASE WHEN NOT amortizable THEN vo WHEN NOT error THEN redondear(vo_act, 2) END
+         AS vo_ajustado_actual,
+       CASE WHEN NOT amortizable THEN vo WHEN NOT error THEN redondear(vo_act - vo_ant, 2) END
+         AS ajuste_infl_vo_ejercicio,
+       CASE WHEN NOT amortizable THEN 0.0 WHEN NOT error THEN redondear(ai_ant, 2) END
+         AS amort_acum_inicio_ajustada_anterior,
+       CASE WHEN NOT amortizable THEN 0.0 WHEN NOT error THEN redondear(ai_act, 2) END
+         AS amort_acum_inicio_ajustada_actual,
+       CASE WHEN NOT amortizable THEN 0.0 WHEN NOT error THEN redondear(ai_act - ai_ant, 2) END
+         AS ajuste_infl_amort_inicio_ejercicio,
+       CASE WHEN NOT amortizable THEN 0.0 WHEN NOT error THEN redondear(ae_aj, 2) END
+         AS amort_ejercicio_ajustada,
+       CASE WHEN NOT amortizable THEN 0.0 WHEN NOT error THEN redondear(cierre_aj, 2) END
+         AS amort_acum_cierre_ajustada,
+       CASE WHEN NOT amortizable THEN vo WHEN NOT error THEN redondear(residual_aj, 2) END
+         AS valor_residual_ajustado,
+       CASE WHEN amortizable AND NOT error THEN redondear(coef_actual, 6) END AS coef_actual,
+       CASE WHEN amortizable AND NOT error THEN redondear(coef_anterior, 6) END AS coef_anterior
+  FROM residual;
+
+-- Anti-join of the months every amortizable bien needs (ingreso, ejercicio_liquidacion and
+-- ejercicio_anterior) against indices_facpce: one row per missing month and company.
+CREATE OR REPLACE MACRO indices_faltantes(empresa) AS TABLE
+WITH necesarios AS (
+  SELECT b.empresa_id, b.id AS bien_id, b.mes_ingreso AS mes, b.fecha_ingreso AS fecha
+    FROM bienes b
+   WHERE COALESCE(b.es_amortizable, false) AND (empresa IS NULL OR b.empresa_id = empresa)
+  UNION ALL
+  SELECT b.empresa_id, b.id, mes_clave(e.ejercicio_liquidacion), e.ejercicio_liquidacion
+    FROM bienes b
+    JOIN empresa e ON e.id = b.empresa_id
+   WHERE COALESCE(b.es_amortizable, false) AND (empresa IS NULL OR b.empresa_id = empresa)
+  UNION ALL
+  SELECT b.empresa_id, b.id, mes_clave(e.ejercicio_anterior), e.ejercicio_anterior
+    FROM bienes b
+    JOIN empresa e ON e.id = b.empresa_id
+   WHERE COALESCE(b.es_amortizable, false) AND (empresa IS NULL OR b.empresa_id = empresa)
+)
+SELECT n.empresa_id, n.mes, min(n.fecha) AS fecha, count(DISTINCT n.bien_id) AS bienes
+  FROM necesarios n
+  ANTI JOIN indices_por_mes() i ON i.mes = n.mes
+ GROUP BY n.empresa_id, n.mes;
+
+UPDATE bienes SET mes_ingreso = mes_clave(fecha_ingreso)
+ WHERE mes_ingreso IS NULL
+   AND (SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'schema_version') < 4;
+UPDATE indices_facpce SET mes = mes_clave(fecha)
+ WHERE mes IS NULL
+   AND (SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'schema_version') < 4;
+
+INSERT OR IGNORE INTO meta(key, value) VALUES ('schema_version', '4');
+UPDATE meta SET value = '4' WHERE key = 'schema_version' AND value <> '4';
 """
 
 
@@ -128,76 +362,565 @@ def upsert_empresa(con: duckdb.DuckDBPyConnection, empresa: EmpresaData) -> int:
     return empresa_id
 
 
+_NUMPY_DTYPES = {"int": "int64", "float": "float64", "bool": "bool", "str": "object"}
+_NULL_FILLERS = {"int": 0, "float": 0.0, "bool": False, "str": ""}
+
+
+@contextmanager
+def _registered_rows(
+    con: duckdb.DuckDBPyConnection, columns: Sequence[Tuple[str, str, Sequence[Any]]]
+) -> Iterator[str]:
+    """Register NumPy columns as a DuckDB relation; yields a subquery over them.
+
+    ``columns`` holds ``(name, kind, values)`` with kind in int/float/bool/str.
+    NULLs travel as a separate boolean mask: numeric object arrays are very
+    slow to scan, and DuckDB cannot infer an object column that starts with None.
+    """
+    relation: Dict[str, Any] = {}
+    select_exprs = []
+    for name, kind, values in columns:
+        nulls = [value is None for value in values]
+        if any(nulls):
+            filler = _NULL_FILLERS[kind]
+            values = [filler if value is None else value for value in values]
+            relation[f"{name}__null"] = np.array(nulls, dtype=bool)
+            select_exprs.append(f"CASE WHEN {name}__null THEN NULL ELSE {name} END AS {name}")
+        else:
+            select_exprs.append(name)
+        relation[name] = np.array(values, dtype=_NUMPY_DTYPES[kind])
+
+    view_name = "_bulk_rows"
+    con.register(view_name, relation)
+    try:
+        yield f"(SELECT {', '.join(select_exprs)} FROM {view_name})"
+    finally:
+        con.unregister(view_name)
+
+
+def _column_rows(columns: Sequence[Tuple[str, str, Sequence[Any]]]) -> List[List[Any]]:
+    return [list(row) for row in zip(*(values for _, _, values in columns))]
+
+
+def _bulk_insert(
+    con: duckdb.DuckDBPyConnection,
+    sql_prefix: str,
+    columns: Sequence[Tuple[str, str, Sequence[Any]]],
+) -> int:
+    """Insert rows given as columns in a single statement.
+
+    With NumPy the columns are inserted with ``sql_prefix SELECT ...`` over a
+    registered relation; without it the rows go through executemany.
+    """
+    if not columns or not len(columns[0][2]):
+        return 0
+
+    if np is None:
+        placeholders = ", ".join("?" for _ in columns)
+        con.executemany(f"{sql_prefix} VALUES ({placeholders})", _column_rows(columns))
+    else:
+        with _registered_rows(con, columns) as rows:
+            con.execute(f"{sql_prefix} SELECT * FROM {rows}")
+    return len(columns[0][2])
+
+
+def _bulk_update_bienes(
+    con: duckdb.DuckDBPyConnection,
+    columns: Sequence[Tuple[str, str, Sequence[Any]]],
+) -> int:
+    """Update bienes rows matched by (empresa_id, id); both must lead ``columns``."""
+    if not columns or not len(columns[0][2]):
+        return 0
+    value_columns = [name for name, _, _ in columns[2:]]
+
+    if np is None:
+        assignments = ", ".join(f"{name} = ?" for name in value_columns)
+        con.executemany(
+            f"UPDATE bienes SET {assignments} WHERE id = ? AND empresa_id = ?",
+            [row[2:] + row[:2] for row in _column_rows(columns)],
+        )
+    else:
+        assignments = ", ".join(f"{name} = r.{name}" for name in value_columns)
+        with _registered_rows(con, columns) as rows:
+            con.execute(
+                f"""
+                UPDATE bienes SET {assignments}
+                  FROM {rows} AS r
+                 WHERE bienes.id = r.id AND bienes.empresa_id = r.empresa_id
+                """
+            )
+    return len(columns[0][2])
+
+
+def _bienes_columns(
+    empresa_id: int, bienes: Sequence[Bien]
+) -> List[Tuple[str, str, List[Any]]]:
+    ordered = [bien.to_sql_dict() for bien in bienes]
+    return [
+        ("id", "int", [data["id"] for data in ordered]),
+        ("empresa_id", "int", [empresa_id] * len(ordered)),
+        ("descripcion", "str", [data["descripcion"] for data in ordered]),
+        ("tipo_bien", "str", [data["tipo_bien"] for data in ordered]),
+        ("es_amortizable", "bool", [bool(data["es_amortizable"]) for data in ordered]),
+        ("anos_amortizacion", "int", [data["anos_amortizacion"] for data in ordered]),
+        ("ejercicio_alta", "int", [data["ejercicio_alta"] for data in ordered]),
+        ("fecha_ingreso", "str", [data["fecha_ingreso"] for data in ordered]),
+        ("fecha_baja", "str", [data["fecha_baja"] for data in ordered]),
+        ("valor_origen", "float", [data["valor_origen"] for data in ordered]),
+        ("mes_ingreso", "int", [_mes_ingreso(data["fecha_ingreso"]) for data in ordered]),
+    ]
+
+
+def _mes_ingreso(fecha_ingreso: Any) -> Optional[int]:
+    return mes_clave(fecha_ingreso) if isinstance(fecha_ingreso, str) else None
+
+
+_INSERT_BIENES = """
+    INSERT INTO bienes(
+        id, empresa_id, descripcion, tipo_bien, es_amortizable,
+        anos_amortizacion, ejercicio_alta, fecha_ingreso, fecha_baja,
+        valor_origen, mes_ingreso
+    )
+"""
+
+
+def _replace_tipos(con: duckdb.DuckDBPyConnection, empresa_id: int, tipos_bienes: List[str]) -> int:
+    con.execute("DELETE FROM tipos_bienes WHERE empresa_id = ?", [empresa_id])
+    return _bulk_insert(
+        con,
+        "INSERT INTO tipos_bienes(empresa_id, nombre)",
+        [
+            ("empresa_id", "int", [empresa_id] * len(tipos_bienes)),
+            ("nombre", "str", list(tipos_bienes)),
+        ],
+    )
+
+
+def _upsert_indices(con: duckdb.DuckDBPyConnection, gestor_indices: GestorIndicesFACPCE) -> int:
+    indices = gestor_indices.get_todos_indices()
+    return _bulk_insert(
+        con,
+        "INSERT OR REPLACE INTO indices_facpce(fecha, indice, observaciones, fecha_carga, mes)",
+        [
+            ("fecha", "str", [indice.fecha for indice in indices]),
+            ("indice", "float", [float(indice.indice) for indice in indices]),
+            ("observaciones", "str", [indice.observaciones for indice in indices]),
+            ("fecha_carga", "str", [indice.fecha_carga for indice in indices]),
+            ("mes", "int", [indice.get_mes_clave() for indice in indices]),
+        ],
+    )
+
+
+def _delete_by_ids(
+    con: duckdb.DuckDBPyConnection, table: str, id_column: str, empresa_id: int, ids: Sequence[int]
+) -> int:
+    if not ids:
+        return 0
+    if np is None:
+        con.executemany(
+            f"DELETE FROM {table} WHERE empresa_id = ? AND {id_column} = ?",
+            [[empresa_id, row_id] for row_id in ids],
+        )
+    else:
+        with _registered_rows(con, [("id", "int", list(ids))]) as rows:
+            con.execute(
+                f"DELETE FROM {table} WHERE empresa_id = ? AND {id_column} IN (SELECT id FROM {rows})",
+                [empresa_id],
+            )
+    return len(ids)
+
+
+def _delete_bienes(con: duckdb.DuckDBPyConnection, empresa_id: int, bien_ids: Sequence[int]) -> int:
+    return _delete_by_ids(con, "bienes", "id", empresa_id, bien_ids)
+
+
+def _replace_cubo(
+    con: duckdb.DuckDBPyConnection, empresa_id: int, cartera: Cartera, cubo: CuboAmortizaciones
+) -> int:
+    """Sync the persisted cube with the years held in memory.
+
+    For each year, rows of bienes that are no longer up to date (edited,
+    dropped or not calculable) are deleted and the up-to-date rows are
+    upserted. Persisted years not held in memory are left untouched.
+    """
+    rows = 0
+    for anio, (bien_ids, columnas) in sorted(cubo.filas_vigentes(cartera).items()):
+        with _registered_rows(con, [("id", "int", bien_ids)]) as vigentes:
+            con.execute(
+                "DELETE FROM amortizaciones_cubo WHERE empresa_id = ? AND anio = ? "
+                f"AND bien_id NOT IN (SELECT id FROM {vigentes})",
+                [empresa_id, anio],
+            )
+        rows += _bulk_insert(
+            con,
+            "INSERT OR REPLACE INTO amortizaciones_cubo(empresa_id, bien_id, anio, "
+            + ", ".join(CLAVES_AMORTIZACION) + ")",
+            [
+                ("empresa_id", "int", [empresa_id] * len(bien_ids)),
+                ("bien_id", "int", bien_ids),
+                ("anio", "int", [anio] * len(bien_ids)),
+            ]
+            + [(clave, "float", columnas[clave].tolist()) for clave in CLAVES_AMORTIZACION],
+        )
+    return rows
+
+
 def save_company_state(
     con: duckdb.DuckDBPyConnection,
     empresa: EmpresaData,
     tipos_bienes: List[str],
     bienes: Dict[int, Bien],
     gestor_indices: GestorIndicesFACPCE,
-) -> None:
+    cambios: Optional[CambiosBienes] = None,
+    cubo: Optional[CuboAmortizaciones] = None,
+) -> Dict[str, float]:
+    """Persist the company in one transaction and return save statistics.
+
+    Without ``cambios`` (or when it has no saved state for this CUIT) the bienes
+    are deleted and reinserted. Otherwise only the tracked new, modified and
+    deleted bienes are written. tipos_bienes is always replaced and indices are
+    upserted. Returns the row count, elapsed seconds and rows/second.
+
+    Persisted amortization cube rows of rewritten or deleted bienes are
+    dropped. With ``cubo`` (bienes must be a Cartera) the cube years held in
+    memory are written as well.
+    """
     if not empresa or not empresa.cuit:
         raise ValueError("Empresa/CUIT is required to save")
 
+    started = time.perf_counter()
+    rows = 0
     con.execute("BEGIN")
     try:
         empresa_id = upsert_empresa(con, empresa)
+        rows += _replace_tipos(con, empresa_id, tipos_bienes)
 
-        con.execute("DELETE FROM tipos_bienes WHERE empresa_id = ?", [empresa_id])
-        for nombre in tipos_bienes:
-            con.execute(
-                "INSERT INTO tipos_bienes(empresa_id, nombre) VALUES (?, ?)",
-                [empresa_id, nombre],
+        if cambios is None or not cambios.es_diferencial(empresa.cuit):
+            con.execute("DELETE FROM amortizaciones_cubo WHERE empresa_id = ?", [empresa_id])
+            con.execute("DELETE FROM bienes WHERE empresa_id = ?", [empresa_id])
+            ordered = [bienes[bien_id] for bien_id in sorted(bienes.keys())]
+            rows += _bulk_insert(con, _INSERT_BIENES, _bienes_columns(empresa_id, ordered))
+        else:
+            _delete_by_ids(
+                con, "amortizaciones_cubo", "bien_id", empresa_id,
+                sorted(cambios.eliminados | cambios.modificados),
             )
+            rows += _delete_bienes(con, empresa_id, sorted(cambios.eliminados))
+            modified = [bienes[bien_id] for bien_id in sorted(cambios.modificados) if bien_id in bienes]
+            rows += _bulk_update_bienes(con, _bienes_columns(empresa_id, modified))
+            new = [bienes[bien_id] for bien_id in sorted(cambios.nuevos) if bien_id in bienes]
+            rows += _bulk_insert(con, _INSERT_BIENES, _bienes_columns(empresa_id, new))
 
-        con.execute("DELETE FROM bienes WHERE empresa_id = ?", [empresa_id])
-        for bien_id in sorted(bienes.keys()):
-            bien = bienes[bien_id]
-            data = bien.to_sql_dict()
-            con.execute(
-                """
-                INSERT INTO bienes(
-                    id, empresa_id, descripcion, tipo_bien, es_amortizable,
-                    anos_amortizacion, ejercicio_alta, fecha_ingreso, fecha_baja,
-                    valor_origen
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                [
-                    data["id"],
-                    empresa_id,
-                    data["descripcion"],
-                    data["tipo_bien"],
-                    int(bool(data["es_amortizable"])),
-                    data["anos_amortizacion"],
-                    data["ejercicio_alta"],
-                    data["fecha_ingreso"],
-                    data["fecha_baja"],
-                    data["valor_origen"],
-                ],
-            )
+        rows += _upsert_indices(con, gestor_indices)
+        if cubo is not None and cubo.disponible():
+            rows += _replace_cubo(con, empresa_id, bienes, cubo)
 
-        for indice in gestor_indices.get_todos_indices():
-            con.execute(
-                """
-                INSERT OR REPLACE INTO indices_facpce(fecha, indice, observaciones, fecha_carga)
-                VALUES (?, ?, ?, ?)
-                """,
-                [
-                    indice.fecha,
-                    float(indice.indice),
-                    indice.observaciones,
-                    indice.fecha_carga,
-                ],
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    if cambios is not None:
+        cambios.marcar_guardado(empresa.cuit)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed > 0 else float(rows),
+    }
+
+
+def append_bienes(con: duckdb.DuckDBPyConnection, cuit: str, bienes: Sequence[Bien]) -> int:
+    """Insert a batch of new bienes for an existing company (e.g. CsvHandler.import_por_lotes).
+
+    The IDs must not exist yet for that company. Returns the number of rows inserted.
+    """
+    empresa_id = _get_empresa_id_by_cuit(con, cuit)
+    if empresa_id is None:
+        raise ValueError(f"Unknown company CUIT {cuit}")
+    return _bulk_insert(con, _INSERT_BIENES, _bienes_columns(empresa_id, list(bienes)))
+
+
+_CSV_COLUMNS = 32
+_CSV_NULL = "\x01"
+_CSV_STAGING = "importacion_csv"
+_CSV_REJECTS = "importacion_rechazos"
+_DUCKDB_ENCODINGS = {"utf-8": "utf-8", "latin1": "latin-1"}
+
+
+def _count_lines(file_path: str) -> int:
+    """Records csv.reader yields when no field spans lines (a last line without a newline counts)."""
+    lines = 0
+    last = b"\n"
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return lines + (last != b"\n")
+
+
+def _stage_csv(con: duckdb.DuckDBPyConnection, file_path: str, encoding: str, delimiter: str) -> bool:
+    """Load the raw fields into the staging table; False if read_csv cannot reproduce csv.reader.
+
+    That is the case when DuckDB rejects a line (odd quoting, too many
+    columns), cannot decode the file, or finds a different number of records
+    than there are lines (blank lines, which DuckDB skips, or multi-line fields).
+    """
+    columns = ", ".join(f"'c{i}': 'VARCHAR'" for i in range(_CSV_COLUMNS))
+    con.execute("DROP TABLE IF EXISTS importacion_csv_errores")
+    con.execute("DROP TABLE IF EXISTS importacion_csv_lecturas")
+    try:
+        con.execute(
+            f"""
+            CREATE OR REPLACE TEMP TABLE {_CSV_STAGING} AS
+            SELECT * FROM read_csv(
+                ?, delim = ?, quote = '"', escape = '"', header = false, auto_detect = false,
+                columns = {{{columns}}}, null_padding = true, strict_mode = true,
+                nullstr = ?, encoding = ?, store_rejects = true,
+                rejects_table = 'importacion_csv_errores', rejects_scan = 'importacion_csv_lecturas'
             )
+            """,
+            [file_path, delimiter, _CSV_NULL, _DUCKDB_ENCODINGS[encoding]],
+        )
+    except duckdb.Error:
+        return False
+
+    rejected = con.execute("SELECT count(*) FROM importacion_csv_errores").fetchone()[0]
+    records = con.execute(f"SELECT count(*) FROM {_CSV_STAGING}").fetchone()[0]
+    return not rejected and records == _count_lines(file_path)
+
+
+def _import_staged(
+    con: duckdb.DuckDBPyConnection, empresa_id: int, first_id: int, tipos_bienes: List[str]
+) -> int:
+    """Validate the staged rows in SQL and insert the valid ones with one INSERT ... SELECT.
+
+    Rows whose ID, years, flag or amount are not plain enough for the SQL
+    rules (``1_000``, ``1e3``, the header line...) go through
+    CsvHandler.parsear_fila, so values and messages stay those of the Python importer.
+    """
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP TABLE importacion_csv_filas AS
+        WITH campos AS (
+          SELECT rowid + 1 AS fila, c0, c1, c2, c3, c4, c5, c6, c7, c8,
+                 _strip_py(c0) AS id_txt,
+                 _strip_py(c1) AS descripcion,
+                 _strip_py(c2) AS tipo_bien,
+                 _strip_py(upper(c3)) AS amortizable_txt,
+                 _strip_py(c4) AS anos_txt,
+                 _strip_py(c5) AS ejercicio_txt,
+                 _strip_py(c6) AS fecha_ingreso,
+                 NULLIF(_strip_py(c7), '') AS fecha_baja,
+                 replace(_strip_py(c8), ' ', '') AS valor_limpio
+            FROM {_CSV_STAGING}
+        ), validadas AS (
+          SELECT *,
+                 valor_limpio = '' AS valor_vacio,
+                 _decimal_argentino(valor_limpio) AS valor_txt,
+                 CASE
+                   WHEN c8 IS NULL THEN printf('Fila %d: Faltan columnas (mínimo 9)', fila)
+                   WHEN NOT _entero_simple(id_txt) THEN NULL
+                   WHEN descripcion = '' THEN printf('Fila %d: Descripción vacía', fila)
+                   WHEN NOT list_contains(?::VARCHAR[], tipo_bien)
+                     THEN printf('Fila %d: Tipo ''%s'' no válido', fila, tipo_bien)
+                 END AS mensaje
+            FROM campos
+        )
+        SELECT fila, descripcion, tipo_bien, anos_txt, ejercicio_txt, fecha_ingreso, fecha_baja,
+               valor_vacio, valor_txt, mensaje,
+               mensaje IS NULL AND NOT (
+                 _entero_simple(id_txt) AND _entero_simple(anos_txt) AND _entero_simple(ejercicio_txt)
+                 AND (regexp_full_match(c3, '[[:ascii:]]*') OR amortizable_txt = 'SÍ')
+                 AND (valor_vacio OR _decimal_simple(valor_txt))
+               ) AS en_python,
+               amortizable_txt IN ('SI', 'SÍ', 'S', 'YES', 'Y', '1') AS es_amortizable
+          FROM validadas
+        """,
+        [list(tipos_bienes)],
+    )
+
+    handler = CsvHandler()
+    parsed = []
+    errors = []
+    for fila, *row in con.execute(
+        f"""
+        SELECT s.rowid + 1, c0, c1, c2, c3, c4, c5, c6, c7, c8
+          FROM {_CSV_STAGING} s JOIN importacion_csv_filas f ON f.fila = s.rowid + 1
+         WHERE f.en_python
+         ORDER BY 1
+        """
+    ).fetchall():
+        bien, error = handler.parsear_fila(row, fila, tipos_bienes)
+        if error:
+            errors.append((fila, error))
+        else:
+            parsed.append((fila, bien))
+
+    con.execute(
+        """
+        CREATE OR REPLACE TEMP TABLE importacion_csv_python (
+          fila BIGINT, descripcion VARCHAR, tipo_bien VARCHAR, es_amortizable BOOLEAN,
+          anos_amortizacion BIGINT, ejercicio_alta BIGINT, fecha_ingreso VARCHAR,
+          fecha_baja VARCHAR, valor_origen DOUBLE
+        )
+        """
+    )
+    _bulk_insert(
+        con,
+        "INSERT INTO importacion_csv_python",
+        [
+            ("fila", "int", [fila for fila, _ in parsed]),
+            ("descripcion", "str", [bien.descripcion for _, bien in parsed]),
+            ("tipo_bien", "str", [bien.tipo_bien for _, bien in parsed]),
+            ("es_amortizable", "bool", [bien.es_amortizable for _, bien in parsed]),
+            ("anos_amortizacion", "int", [bien.anos_amortizacion for _, bien in parsed]),
+            ("ejercicio_alta", "int", [bien.ejercicio_alta for _, bien in parsed]),
+            ("fecha_ingreso", "str", [bien.fecha_ingreso for _, bien in parsed]),
+            ("fecha_baja", "str", [bien.fecha_baja for _, bien in parsed]),
+            ("valor_origen", "float", [bien.valor_origen for _, bien in parsed]),
+        ],
+    )
+    _insert_rejects(con, errors)
+    con.execute(
+        f"INSERT INTO {_CSV_REJECTS} SELECT fila, mensaje FROM importacion_csv_filas WHERE mensaje IS NOT NULL"
+    )
+
+    return con.execute(
+        _INSERT_BIENES
+        + """
+        SELECT ? + row_number() OVER (ORDER BY fila) - 1, ?, descripcion, tipo_bien, es_amortizable,
+               anos_amortizacion, ejercicio_alta, fecha_ingreso, fecha_baja, valor_origen,
+               mes_clave(fecha_ingreso)
+          FROM (
+            SELECT fila, descripcion, tipo_bien, es_amortizable,
+                   CASE WHEN NOT es_amortizable THEN 0
+                        WHEN anos_txt = '' THEN 5
+                        ELSE CAST(anos_txt AS INTEGER) END AS anos_amortizacion,
+                   CASE WHEN ejercicio_txt = '' THEN 2024
+                        ELSE CAST(ejercicio_txt AS INTEGER) END AS ejercicio_alta,
+                   fecha_ingreso, fecha_baja,
+                   CASE WHEN valor_vacio THEN 0.0 ELSE CAST(valor_txt AS DOUBLE) END AS valor_origen
+              FROM importacion_csv_filas
+             WHERE mensaje IS NULL AND NOT en_python
+            UNION ALL
+            SELECT * FROM importacion_csv_python
+          )
+        """,
+        [first_id, empresa_id],
+    ).fetchone()[0]
+
 
+def _insert_rejects(con: duckdb.DuckDBPyConnection, errors: Sequence[Tuple[int, str]]) -> int:
+    return _bulk_insert(
+        con,
+        f"INSERT INTO {_CSV_REJECTS}",
+        [
+            ("fila", "int", [fila for fila, _ in errors]),
+            ("mensaje", "str", [mensaje for _, mensaje in errors]),
+        ],
+    )
+
+
+def _import_streamed(
+    con: duckdb.DuckDBPyConnection, empresa_id: int, first_id: int, file_path: str, tipos_bienes: List[str]
+) -> int:
+    """Fallback for files read_csv cannot stage exactly: CsvHandler.import_por_lotes."""
+    rows = 0
+    next_id = first_id
+    for lote in CsvHandler().import_por_lotes(file_path, tipos_bienes):
+        for bien in lote.bienes:
+            bien.id = next_id
+            next_id += 1
+        rows += _bulk_insert(con, _INSERT_BIENES, _bienes_columns(empresa_id, lote.bienes))
+        # Every message starts with "Fila <n>:"
+        _insert_rejects(con, [(int(error[5:error.index(":")]), error) for error in lote.errores])
+    return rows
+
+
+def import_csv(
+    con: duckdb.DuckDBPyConnection, cuit: str, file_path: str, tipos_bienes: List[str]
+) -> Tuple[int, List[str]]:
+    """Import an asset CSV (CsvHandler format) straight into ``bienes`` using DuckDB.
+
+    The file is staged with read_csv. Argentine decimals, SI/NO flags and the
+    month key of fecha_ingreso are converted in SQL, and the valid rows are
+    inserted with a single INSERT ... SELECT, numbered after the company's
+    highest ID (as the UI import does). Rejected rows land in the temp table
+    ``importacion_rechazos`` (fila, mensaje) with the messages of
+    CsvHandler.import_from_file. Files whose CSV dialect read_csv would parse
+    differently from csv.reader go through CsvHandler.import_por_lotes instead.
+
+    Returns the number of bienes inserted and the error messages in file order.
+    """
+    empresa_id = _get_empresa_id_by_cuit(con, cuit)
+    if empresa_id is None:
+        raise ValueError(f"Unknown company CUIT {cuit}")
+
+    with open(file_path, "rb") as file:
+        sample = file.read(BYTES_MUESTRA)
+    encoding, delimiter = detectar_formato(sample)
+    con.execute(f"CREATE OR REPLACE TEMP TABLE {_CSV_REJECTS} (fila BIGINT, mensaje VARCHAR)")
+    # csv.reader keeps a UTF-8 BOM in the first field; read_csv drops it
+    staged = not sample.startswith(codecs.BOM_UTF8) and _stage_csv(con, file_path, encoding, delimiter)
+
+    con.execute("BEGIN")
+    try:
+        first_id = con.execute(
+            "SELECT COALESCE(max(id), 0) + 1 FROM bienes WHERE empresa_id = ?", [empresa_id]
+        ).fetchone()[0]
+        if staged:
+            rows = _import_staged(con, empresa_id, first_id, tipos_bienes)
+        else:
+            rows = _import_streamed(con, empresa_id, first_id, file_path, tipos_bienes)
         con.execute("COMMIT")
     except Exception:
         con.execute("ROLLBACK")
         raise
+    finally:
+        con.execute(f"DROP TABLE IF EXISTS {_CSV_STAGING}")
+
+    errores = con.execute(f"SELECT mensaje FROM {_CSV_REJECTS} ORDER BY fila").fetchall()
+    return rows, [mensaje for (mensaje,) in errores]
+
+
+def _load_bienes_rows(bienes_rows: List[Tuple[Any, ...]]) -> Dict[int, Bien]:
+    bienes: Dict[int, Bien] = {}
+    for (
+        bien_id,
+        descripcion,
+        tipo_bien,
+        es_amortizable,
+        anos_amortizacion,
+        ejercicio_alta,
+        fecha_ingreso,
+        fecha_baja,
+        valor_origen,
+    ) in bienes_rows:
+        data = {
+            "id": bien_id,
+            "descripcion": descripcion,
+            "tipo_bien": tipo_bien,
+            "es_amortizable": bool(es_amortizable),
+            "anos_amortizacion": anos_amortizacion,
+            "ejercicio_alta": ejercicio_alta,
+            "fecha_ingreso": fecha_ingreso,
+            "fecha_baja": fecha_baja,
+            "valor_origen": valor_origen,
+        }
+        bien = Bien.from_sql_dict(data)
+        bienes[bien.id] = bien
+    return bienes
 
 
 def load_by_cuit(
-    con: duckdb.DuckDBPyConnection, cuit: str
-) -> Tuple[Optional[EmpresaData], List[str], Dict[int, Bien], GestorIndicesFACPCE]:
+    con: duckdb.DuckDBPyConnection, cuit: str, columnar: bool = False
+) -> Tuple[Optional[EmpresaData], List[str], MutableMapping[int, Bien], GestorIndicesFACPCE]:
+    """Load a company by CUIT: empresa, tipos, bienes and the FACPCE indices.
+
+    With ``columnar`` bienes are returned as a column-backed Cartera, fetched
+    with fetchnumpy when NumPy is available; otherwise as a dict of Bien.
+    """
     empresa_id = _get_empresa_id_by_cuit(con, cuit)
     if empresa_id is None:
         return None, [], {}, GestorIndicesFACPCE()
@@ -227,48 +950,175 @@ def load_by_cuit(
     ).fetchall()
     tipos = [tipo_row[0] for tipo_row in tipos_rows]
 
-    bienes_rows = con.execute(
-        """
+    bienes_query = """
         SELECT id, descripcion, tipo_bien, es_amortizable, anos_amortizacion,
                ejercicio_alta, fecha_ingreso, fecha_baja, valor_origen
           FROM bienes
          WHERE empresa_id = ?
       ORDER BY id
-        """,
-        [empresa_id],
-    ).fetchall()
-
-    bienes: Dict[int, Bien] = {}
-    for (
-        bien_id,
-        descripcion,
-        tipo_bien,
-        es_amortizable,
-        anos_amortizacion,
-        ejercicio_alta,
-        fecha_ingreso,
-        fecha_baja,
-        valor_origen,
-    ) in bienes_rows:
-        data = {
-            "id": bien_id,
-            "descripcion": descripcion,
-            "tipo_bien": tipo_bien,
-            "es_amortizable": bool(es_amortizable),
-            "anos_amortizacion": anos_amortizacion,
-            "ejercicio_alta": ejercicio_alta,
-            "fecha_ingreso": fecha_ingreso,
-            "fecha_baja": fecha_baja,
-            "valor_origen": valor_origen,
-        }
-        bien = Bien.from_sql_dict(data)
-        bienes[bien.id] = bien
+        """
+    bienes: MutableMapping[int, Bien]
+    if columnar and np is not None:
+        bienes = Cartera.desde_columnas(con.execute(bienes_query, [empresa_id]).fetchnumpy())
+    elif columnar:
+        bienes_rows = con.execute(bienes_query, [empresa_id]).fetchall()
+        columns = list(zip(*bienes_rows)) or [()] * len(COLUMNAS_BIEN)
+        bienes = Cartera.desde_columnas(dict(zip(COLUMNAS_BIEN, columns)))
+    else:
+        bienes = _load_bienes_rows(con.execute(bienes_query, [empresa_id]).fetchall())
 
     gestor = GestorIndicesFACPCE()
     indices_rows = con.execute(
-        "SELECT fecha, indice, observaciones FROM indices_facpce"
+        "SELECT fecha, indice, observaciones, fecha_carga FROM indices_facpce"
     ).fetchall()
-    for fecha, indice_val, observaciones in indices_rows:
-        gestor.agregar_indice(fecha, float(indice_val), observaciones)
+    for fecha, indice_val, observaciones, fecha_carga in indices_rows:
+        gestor.agregar_indice(fecha, float(indice_val), observaciones, fecha_carga)
 
     return empresa, tipos, bienes, gestor
+
+
+def load_amortization_cube(
+    con: duckdb.DuckDBPyConnection, cuit: str, cartera: Cartera, cubo: CuboAmortizaciones
+) -> int:
+    """Fill ``cubo`` with the persisted years of a company just loaded into ``cartera``.
+
+    The cube is cleared first. Returns the number of rows read.
+    """
+    cubo.limpiar()
+    empresa_id = _get_empresa_id_by_cuit(con, cuit)
+    if empresa_id is None or not cubo.disponible():
+        return 0
+
+    anios = con.execute(
+        "SELECT DISTINCT anio FROM amortizaciones_cubo WHERE empresa_id = ? ORDER BY anio",
+        [empresa_id],
+    ).fetchall()
+    rows = 0
+    for (anio,) in anios:
+        columnas = con.execute(
+            "SELECT bien_id, " + ", ".join(CLAVES_AMORTIZACION)
+            + " FROM amortizaciones_cubo WHERE empresa_id = ? AND anio = ?",
+            [empresa_id, anio],
+        ).fetchnumpy()
+        bien_ids = columnas["bien_id"].tolist()
+        cubo.cargar(cartera, anio, bien_ids, columnas)
+        rows += len(bien_ids)
+    return rows
+
+
+def _empresa_filter(con: duckdb.DuckDBPyConnection, cuit: Optional[str]) -> Optional[int]:
+    """empresa argument of the SQL macros: NULL for every company, -1 for an unknown CUIT."""
+    if cuit is None:
+        return None
+    empresa_id = _get_empresa_id_by_cuit(con, cuit)
+    return -1 if empresa_id is None else empresa_id
+
+
+def _fetch_columns(con: duckdb.DuckDBPyConnection, query: str, params: List[Any]) -> Dict[str, Any]:
+    """Run ``query`` and return its columns: NumPy arrays when available, lists otherwise."""
+    result = con.execute(query, params)
+    if np is not None:
+        return result.fetchnumpy()
+    names = [description[0] for description in result.description]
+    rows = result.fetchall()
+    return {name: [row[i] for row in rows] for i, name in enumerate(names)}
+
+
+def compute_amortizations(
+    con: duckdb.DuckDBPyConnection, anio: Optional[int], cuit: Optional[str] = None
+) -> Dict[str, Any]:
+    """Amortizations of liquidation year ``anio`` computed inside DuckDB.
+
+    Runs the ``amortizaciones_bienes`` macro for one company (``cuit``) or for
+    all of them, without building Bien objects; ``anio`` None uses each
+    company's ejercicio_liquidacion. Returns the columns ``empresa_id``,
+    ``bien_id`` and CLAVES_AMORTIZACION ordered by company and ID, rounded
+    exactly like the Python calculator. An unknown CUIT gives empty columns.
+    """
+    return _fetch_columns(
+        con,
+        "SELECT empresa_id, bien_id, " + ", ".join(CLAVES_AMORTIZACION)
+        + " FROM amortizaciones_bienes(?, ?) ORDER BY empresa_id, bien_id",
+        [anio, _empresa_filter(con, cuit)],
+    )
+
+
+def compute_inflation_adjustments(con: duckdb.DuckDBPyConnection, cuit: Optional[str] = None) -> Dict[str, Any]:
+    """Inflation adjustment of every bien in one statement (``ajuste_inflacion_bienes``).
+
+    Uses each company's ejercicio_liquidacion / ejercicio_anterior and the
+    amortizations of its liquidation year, joining bienes and indices_facpce on
+    the integer month key. Columns: ``empresa_id``, ``bien_id``, ``error`` and
+    the fields of InflacionCalculator._calcular_valores_ajustados (NULL where
+    ``error``; see find_missing_indices).
+    """
+    return _fetch_columns(
+        con,
+        "SELECT * FROM ajuste_inflacion_bienes(?) ORDER BY empresa_id, bien_id",
+        [_empresa_filter(con, cuit)],
+    )
+
+
+def find_missing_indices(
+    con: duckdb.DuckDBPyConnection, cuit: Optional[str] = None
+) -> List[Tuple[int, Optional[int], str, int]]:
+    """Months without a FACPCE index needed by amortizable bienes (``indices_faltantes``).
+
+    Returns ``(empresa_id, mes, fecha, bienes)`` per company and month, where
+    ``fecha`` is one of the dates that needs it and ``bienes`` how many bienes
+    are affected. ``mes`` is None for dates that are not valid DD/MM/AAAA.
+    """
+    return con.execute(
+        "SELECT empresa_id, mes, fecha, bienes FROM indices_faltantes(?) ORDER BY empresa_id, mes",
+        [_empresa_filter(con, cuit)],
+    ).fetchall()
+
+
+def check_amortization_parity(
+    con: duckdb.DuckDBPyConnection,
+    anio: int,
+    cuit: Optional[str] = None,
+    calculator: Optional[AmortizacionCalculator] = None,
+) -> List[Tuple[int, int, str, Any, Any]]:
+    """Compare compute_amortizations with the Python calculator, bien by bien.
+
+    Returns ``(empresa_id, bien_id, clave, python, sql)`` for every value that
+    differs; an empty list means both engines agree. Bienes the calculator
+    cannot amortize (incomplete data) are skipped.
+    """
+    calculator = calculator or AmortizacionCalculator()
+    ejercicio = f"31/12/{anio:04d}"
+    empresa_id = _empresa_filter(con, cuit)
+
+    sql = compute_amortizations(con, anio, cuit)
+    sql_rows = zip(*(_as_list(sql[clave]) for clave in sql))
+    sql_by_bien = {(row[0], row[1]): row[2:] for row in sql_rows}
+
+    rows = con.execute(
+        """
+        SELECT empresa_id, id, descripcion, tipo_bien, es_amortizable, anos_amortizacion,
+               ejercicio_alta, fecha_ingreso, fecha_baja, valor_origen
+          FROM bienes
+         WHERE ? IS NULL OR empresa_id = ?
+      ORDER BY empresa_id, id
+        """,
+        [empresa_id, empresa_id],
+    ).fetchall()
+
+    diferencias: List[Tuple[int, int, str, Any, Any]] = []
+    for row in rows:
+        bien = next(iter(_load_bienes_rows([row[1:]]).values()))
+        try:
+            esperado = calculator.calcular_amortizacion(bien, ejercicio)
+        except (TypeError, ValueError, ZeroDivisionError):
+            continue
+        obtenido = sql_by_bien.get((row[0], bien.id))
+        for i, clave in enumerate(CLAVES_AMORTIZACION):
+            valor_sql = obtenido[i] if obtenido is not None else None
+            if valor_sql != esperado[clave]:
+                diferencias.append((row[0], bien.id, clave, esperado[clave], valor_sql))
+    return diferencias
+
+
+def _as_list(values: Any) -> List[Any]:
+    return values.tolist() if hasattr(values, "tolist") else list(values)
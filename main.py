@@ -6,16 +6,20 @@ from datetime import datetime
 
 # Importar todos los módulos
 from models.bien import Bien
+from models.cambios import CambiosBienes
+from models.cartera import Cartera
 from models.empresa import EmpresaData
 from models.indice_facpce import GestorIndicesFACPCE
 from utils.validators import Validators
 from utils.csv_handler import CsvHandler
-from modules.amortizaciones import AmortizacionCalculator
+from modules.amortizaciones import AmortizacionCalculator, CuboAmortizaciones, MOTOR_NUMPY
 from modules.filtros import FiltroEjercicio
 from modules.inflacion_calculator import InflacionCalculator
+from modules.tabla_bienes import DEMORA_FILTRO_MS, RefrescoCancelado, calcular_filas_tabla
 from views.vista_ajustada import VistaAjustada
 from views.gestion_indices import GestionIndices
-from db.duck import connect as duck_connect, init_schema as duck_init, save_company_state, load_by_cuit
+from views.tabla_virtual import TablaVirtual
+from db.duck import connect as duck_connect, init_schema as duck_init, save_company_state, load_by_cuit, load_amortization_cube
 
 class AmortizacionApp:
     def __init__(self):
@@ -26,16 +30,21 @@ class AmortizacionApp:
         # Datos principales
         self.empresa = EmpresaData()
         self.tipos_bienes = []
-        self.bienes = {}
+        self.bienes = Cartera()
         self.next_id = 1
         self.tipos_configurados = False
+        # Altas/modificaciones/bajas pendientes para el guardado diferencial
+        self.cambios = CambiosBienes()
         
         # Gestores e calculadoras
         self.csv_handler = CsvHandler()
-        self.amort_calculator = AmortizacionCalculator()
+        # Motor de amortización: MOTOR_NUMPY (vectorizado) o MOTOR_PYTHON (por bien)
+        self.amort_calculator = AmortizacionCalculator(motor=MOTOR_NUMPY)
+        # Amortizaciones por bien y ejercicio ya calculadas (cambiar de ejercicio no recalcula)
+        self.cubo_amortizaciones = CuboAmortizaciones(self.amort_calculator)
         self.filtro_ejercicio = FiltroEjercicio()
         self.gestor_indices = GestorIndicesFACPCE()
-        self.inflacion_calculator = InflacionCalculator(self.gestor_indices)
+        self.inflacion_calculator = InflacionCalculator(self.gestor_indices, motor=MOTOR_NUMPY)
         
         # Variables de UI
         self.filter_var = tk.StringVar()
@@ -50,6 +59,10 @@ class AmortizacionApp:
         self.db_path = "data/cartera.duckdb"
         self._dirty = False
         
+        # Refresco de la tabla: after() pendiente y número del último pedido
+        self._refresco_pendiente = None
+        self._generacion_tabla = 0
+        
         self.setup_ui()
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.show_welcome()
@@ -278,10 +291,11 @@ class AmortizacionApp:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=column_widths.get(col, 100), anchor='center')
 
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(self.table_container, orient='vertical', command=self.tree.yview)
+        # Scrollbars (la vertical la maneja la tabla virtual)
+        v_scrollbar = ttk.Scrollbar(self.table_container, orient='vertical')
         h_scrollbar = ttk.Scrollbar(self.table_container, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.tabla_virtual = TablaVirtual(self.tree, v_scrollbar)
 
         v_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
         h_scrollbar.grid(row=2, column=0, sticky=(tk.W, tk.E))
@@ -689,6 +703,7 @@ Configure primero los datos de empresa en el panel izquierdo.""")
             )
             
             self.bienes[self.next_id] = nuevo_bien
+            self.cambios.registrar_alta(self.next_id)
             self.next_id += 1
             self._dirty = True
             
@@ -700,59 +715,54 @@ Configure primero los datos de empresa en el panel izquierdo.""")
         except Exception as e:
             messagebox.showerror("Error", f"Error creando bien: {str(e)}")
     
+    def programar_refresco(self):
+        """Recalcula la tabla cuando se deja de teclear en los filtros"""
+        if self._refresco_pendiente is not None:
+            self.root.after_cancel(self._refresco_pendiente)
+        self._refresco_pendiente = self.root.after(DEMORA_FILTRO_MS, self.refresh_table)
+    
     def refresh_table(self):
-        """Actualizar tabla"""
-        # Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Filtrar bienes si es necesario
-        bienes_mostrar = list(self.bienes.values())
-        
-        # Aplicar filtro de texto
-        filtro_texto = self.filter_var.get().strip().lower()
-        if filtro_texto:
-            bienes_mostrar = [b for b in bienes_mostrar 
-                            if filtro_texto in b.descripcion.lower() or 
-                               filtro_texto in b.tipo_bien.lower()]
-        
-        # Aplicar filtro de ejercicio
+        """Actualizar tabla (filtro y amortización corren en un hilo aparte)"""
+        if self._refresco_pendiente is not None:
+            self.root.after_cancel(self._refresco_pendiente)
+            self._refresco_pendiente = None
+        
+        # Un pedido nuevo deja sin efecto al que esté calculándose
+        self._generacion_tabla += 1
+        generacion = self._generacion_tabla
+        
+        bienes = self.bienes.copy()
+        filtro_texto = self.filter_var.get()
         ejercicio_liquidacion = self.ejercicio_liquidacion_var.get().strip()
-        if ejercicio_liquidacion and Validators.validar_fecha(ejercicio_liquidacion):
-            bienes_mostrar = self.filtro_ejercicio.filtrar_bienes_por_ejercicio(
-                bienes_mostrar, ejercicio_liquidacion)
+        # El índice de texto vive en la cartera original: se consulta en este hilo
+        coincidencias = self.bienes.buscar_texto(filtro_texto)
         
-        # Calcular amortizaciones si hay ejercicio válido
-        if ejercicio_liquidacion and Validators.validar_fecha(ejercicio_liquidacion):
-            amortizaciones = self.amort_calculator.calcular_amortizaciones_lote(
-                bienes_mostrar, ejercicio_liquidacion)
-        else:
-            amortizaciones = {}
+        def calcular():
+            try:
+                filas = calcular_filas_tabla(
+                    bienes, filtro_texto, ejercicio_liquidacion,
+                    self.amort_calculator, self.filtro_ejercicio,
+                    vigente=lambda: generacion == self._generacion_tabla,
+                    formatear=False, coincidencias=coincidencias,
+                    cubo=self.cubo_amortizaciones)
+            except RefrescoCancelado:
+                return
+            self.root.after(0, self._publicar_tabla, generacion, filas, bienes)
         
-        # Llenar tabla
-        for bien in sorted(bienes_mostrar, key=lambda x: x.id):
-            amort_data = amortizaciones.get(bien.id, {})
-            
-            values = (
-                bien.id,
-                bien.descripcion,
-                bien.tipo_bien,
-                'SI' if bien.es_amortizable else 'NO',
-                bien.anos_amortizacion,
-                bien.ejercicio_alta,
-                bien.fecha_ingreso,
-                bien.fecha_baja or '',
-                Validators.format_decimal_argentino(bien.valor_origen),
-                Validators.format_decimal_argentino(amort_data.get('amort_inicio', 0)),
-                Validators.format_decimal_argentino(amort_data.get('amort_ejercicio', 0)),
-                Validators.format_decimal_argentino(amort_data.get('amort_acumulada', 0)),
-                Validators.format_decimal_argentino(amort_data.get('valor_residual', bien.valor_origen))
-            )
-            
-            self.tree.insert('', 'end', values=values)
+        threading.Thread(target=calcular, daemon=True).start()
+    
+    def _publicar_tabla(self, generacion, filas, bienes):
+        """Vuelca en la tabla las filas calculadas (en el hilo de Tk)"""
+        # Los índices que el hilo puso al día en la copia sirven aunque el pedido sea viejo
+        self.bienes.tomar_indices(bienes)
+        if generacion != self._generacion_tabla:
+            return
+        
+        # Sólo se crean (y formatean) las filas visibles
+        self.tabla_virtual.mostrar(filas)
         
         # Actualizar contador
-        self.status_var.set(f"Mostrando {len(bienes_mostrar)} bienes de {len(self.bienes)} totales")
+        self.status_var.set(f"Mostrando {len(filas)} bienes de {len(bienes)} totales")
     
     def import_csv(self):
         """Importar CSV"""
@@ -769,18 +779,27 @@ Configure primero los datos de empresa en el panel izquierdo.""")
             return
         
         try:
-            bienes_importados = self.csv_handler.import_from_file(file_path, self.tipos_bienes)
-            
-            # Agregar bienes con nuevos IDs
-            for bien in bienes_importados:
-                bien.id = self.next_id
-                self.bienes[self.next_id] = bien
-                self.next_id += 1
+            # Agregar bienes con nuevos IDs, por tramos parseados en paralelo: sólo el tramo
+            # en curso existe como objetos Bien
+            importados = 0
+            errores = 0
+            for lote in self.csv_handler.import_paralelo(file_path, self.tipos_bienes):
+                for bien in lote.bienes:
+                    bien.id = self.next_id
+                    self.bienes[self.next_id] = bien
+                    self.cambios.registrar_alta(self.next_id)
+                    self.next_id += 1
+                importados += len(lote.bienes)
+                errores += len(lote.errores)
             
             self.refresh_table()
-            if bienes_importados:
+            if importados:
                 self._dirty = True
-            messagebox.showinfo("Éxito", f"{len(bienes_importados)} bienes importados correctamente")
+            mensaje = f"{importados} bienes importados correctamente"
+            if errores:
+                mensaje += f" ({errores} filas con errores no se importaron)"
+            self.status_var.set(mensaje)
+            messagebox.showinfo("Éxito", mensaje)
             
         except Exception as e:
             messagebox.showerror("Error", f"Error importando CSV: {str(e)}")
@@ -869,9 +888,11 @@ Configure primero los datos de empresa en el panel izquierdo.""")
             return False
 
         try:
-            save_company_state(self.db_con, self.empresa, self.tipos_bienes, self.bienes, self.gestor_indices)
+            stats = save_company_state(self.db_con, self.empresa, self.tipos_bienes, self.bienes,
+                                       self.gestor_indices, self.cambios, self.cubo_amortizaciones)
             self._dirty = False
-            self.status_var.set(f"Datos guardados en {self.db_path}")
+            self.status_var.set(f"Datos guardados en {self.db_path} "
+                                f"({stats['rows']} filas, {stats['rows_per_second']:,.0f} filas/s)")
             return True
         except Exception as e:
             messagebox.showerror("Error al guardar", str(e))
@@ -908,7 +929,7 @@ Configure primero los datos de empresa en el panel izquierdo.""")
             return
 
         try:
-            empresa, tipos, bienes, gestor = load_by_cuit(self.db_con, cuit)
+            empresa, tipos, bienes, gestor = load_by_cuit(self.db_con, cuit, columnar=True)
 
             if not empresa:
                 crear = messagebox.askyesno(
@@ -929,8 +950,10 @@ Configure primero los datos de empresa en el panel izquierdo.""")
 
                 self.tipos_bienes = list(self.tipos_bienes)
                 self.tipos_configurados = bool(self.tipos_bienes)
-                self.bienes = {}
+                self.bienes = Cartera()
                 self.next_id = 1
+                self.cambios.reiniciar()
+                self.cubo_amortizaciones.limpiar()
                 self._dirty = True
 
                 self._hydrate_empresa_panel()
@@ -950,8 +973,10 @@ Configure primero los datos de empresa en el panel izquierdo.""")
             self.empresa = empresa
             self.tipos_bienes = tipos
             self.bienes = bienes
+            self.cambios.marcar_guardado(empresa.cuit)
+            load_amortization_cube(self.db_con, cuit, self.bienes, self.cubo_amortizaciones)
             self.gestor_indices = gestor
-            self.inflacion_calculator = InflacionCalculator(self.gestor_indices)
+            self.inflacion_calculator = InflacionCalculator(self.gestor_indices, motor=MOTOR_NUMPY)
             self.next_id = (max(self.bienes.keys()) + 1) if self.bienes else 1
 
             if self.vista_ajustada_window and hasattr(self.vista_ajustada_window, 'window'):
@@ -1094,10 +1119,10 @@ Configure primero los datos de empresa en el panel izquierdo.""")
     
     # Métodos auxiliares
     def on_filter_change(self, *args):
-        self.refresh_table()
+        self.programar_refresco()
     
     def on_ejercicio_change(self, *args):
-        self.refresh_table()
+        self.programar_refresco()
     
     def on_item_double_click(self, event):
         if self.tipos_configurados:
@@ -1151,6 +1176,7 @@ Configure primero los datos de empresa en el panel izquierdo.""")
         
         if messagebox.askyesno("Confirmar", f"¿Eliminar el bien '{bien.descripcion}'?"):
             del self.bienes[bien_id]
+            self.cambios.registrar_baja(bien_id)
             self._dirty = True
             self.refresh_table()
             messagebox.showinfo("Éxito", "Bien eliminado correctamente")
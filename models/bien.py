@@ -1,4 +1,16 @@
+from utils.validators import Validators
+
+# Marca de fecha todavía no parseada
+_SIN_PARSEAR = object()
+
+
 class Bien:
+    __slots__ = (
+        'id', 'descripcion', 'tipo_bien', 'es_amortizable', 'anos_amortizacion',
+        'ejercicio_alta', '_fecha_ingreso', '_fecha_baja', 'valor_origen',
+        'amortizacion_data', 'inflacion_data', '_partes_ingreso', '_partes_baja'
+    )
+    
     def __init__(self, id=1, descripcion="", tipo_bien="", es_amortizable=True,
                  anos_amortizacion=5, ejercicio_alta=2024, fecha_ingreso="01/01/2024",
                  fecha_baja=None, valor_origen=0.0):
@@ -16,6 +28,51 @@ class Bien:
         self.amortizacion_data = {}
         self.inflacion_data = {}
     
+    # Las fechas se parsean una sola vez; asignarlas descarta lo parseado
+    @property
+    def fecha_ingreso(self):
+        return self._fecha_ingreso
+    
+    @fecha_ingreso.setter
+    def fecha_ingreso(self, valor):
+        self._fecha_ingreso = valor
+        self._partes_ingreso = _SIN_PARSEAR
+    
+    @property
+    def fecha_baja(self):
+        return self._fecha_baja
+    
+    @fecha_baja.setter
+    def fecha_baja(self, valor):
+        self._fecha_baja = valor
+        self._partes_baja = _SIN_PARSEAR
+    
+    # pickle y deepcopy no conservan la identidad de _SIN_PARSEAR: se copian las
+    # fechas sin lo parseado y al restaurar se vuelven a asignar
+    def __getstate__(self):
+        return {nombre: getattr(self, nombre) for nombre in self.__slots__
+                if nombre not in ('_partes_ingreso', '_partes_baja') and hasattr(self, nombre)}
+    
+    def __setstate__(self, estado):
+        for nombre, valor in estado.items():
+            setattr(self, nombre, valor)
+        self.fecha_ingreso = estado.get('_fecha_ingreso')
+        self.fecha_baja = estado.get('_fecha_baja')
+    
+    def get_partes_ingreso(self):
+        """(año, mes, día, ordinal) de la fecha de ingreso, o None si no es válida"""
+        if self._partes_ingreso is _SIN_PARSEAR:
+            self._partes_ingreso = Validators.parsear_fecha(self._fecha_ingreso)
+        return self._partes_ingreso
+    
+    def get_año_baja(self):
+        """Año de la fecha de baja, o None si no hay baja o la fecha no es válida"""
+        if not self._fecha_baja:
+            return None
+        if self._partes_baja is _SIN_PARSEAR:
+            self._partes_baja = Validators.parsear_fecha(self._fecha_baja)
+        return self._partes_baja[0] if self._partes_baja else None
+    
     def get_fecha_origen_bien(self):
         """Retorna la fecha de origen (histórica) para cálculos de inflación"""
         return self.fecha_ingreso
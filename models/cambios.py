@@ -0,0 +1,51 @@
+class CambiosBienes:
+    """Registra altas, modificaciones y bajas de bienes desde el último guardado"""
+
+    def __init__(self):
+        self.nuevos = set()
+        self.modificados = set()
+        self.eliminados = set()
+        # Sin un estado guardado conocido hay que reescribir la cartera completa
+        self.completo = True
+        # C.U.I.T. cuyo estado en la base refleja la cartera
+        self.cuit = None
+
+    def registrar_alta(self, bien_id):
+        if bien_id in self.eliminados:
+            # El ID ya existe en la base: se reemplaza la fila
+            self.eliminados.discard(bien_id)
+            self.modificados.add(bien_id)
+        else:
+            self.nuevos.add(bien_id)
+
+    def registrar_modificacion(self, bien_id):
+        if bien_id not in self.nuevos:
+            self.modificados.add(bien_id)
+
+    def registrar_baja(self, bien_id):
+        if bien_id in self.nuevos:
+            # Nunca llegó a guardarse
+            self.nuevos.discard(bien_id)
+            return
+        self.modificados.discard(bien_id)
+        self.eliminados.add(bien_id)
+
+    def hay_cambios(self):
+        return self.completo or bool(self.nuevos or self.modificados or self.eliminados)
+
+    def es_diferencial(self, cuit):
+        """Indica si alcanza con guardar los cambios registrados para ese C.U.I.T."""
+        return not self.completo and self.cuit == cuit
+
+    def marcar_guardado(self, cuit):
+        """La base refleja la cartera en memoria (tras guardar o cargar)"""
+        self.nuevos.clear()
+        self.modificados.clear()
+        self.eliminados.clear()
+        self.completo = False
+        self.cuit = cuit
+
+    def reiniciar(self):
+        """Cartera sin estado guardado: el próximo guardado es completo"""
+        self.marcar_guardado(None)
+        self.completo = True
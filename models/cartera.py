@@ -0,0 +1,866 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from itertools import count
+
+from models.bien import Bien
+from utils.validators import Validators
+
+# Columnas de la tabla bienes en el orden de Bien.from_sql_dict
+COLUMNAS_BIEN = (
+    'id', 'descripcion', 'tipo_bien', 'es_amortizable', 'anos_amortizacion',
+    'ejercicio_alta', 'fecha_ingreso', 'fecha_baja', 'valor_origen'
+)
+
+# Atributos guardados como códigos de diccionario
+_TEXTOS = ('descripcion', 'tipo_bien', 'fecha_ingreso', 'fecha_baja')
+# Atributos guardados en arrays tipados
+_ENTEROS = ('anos_amortizacion', 'ejercicio_alta')
+_REALES = ('valor_origen',)
+_LOGICOS = ('es_amortizable',)
+
+_INT32_MIN, _INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+# Claves de los índices ordenados: (valor desplazado a positivo) << 32 | fila
+_DESPLAZAMIENTO_CLAVE = 2 ** 31
+_MASCARA_FILA = 2 ** 32 - 1
+
+# Datos de los que depende la amortización de un bien
+_DATOS_AMORTIZACION = frozenset((
+    'es_amortizable', 'anos_amortizacion', 'ejercicio_alta', 'fecha_baja', 'valor_origen'
+))
+
+# Sellos de las filas: cada cambio de datos de amortización (en cualquier
+# cartera) recibe uno nuevo, así un sello identifica esos datos sin ambigüedad
+_RELOJ = count(1)
+
+# Versiones de los índices ordenados, únicas entre todas las carteras
+_VERSIONES = count(1)
+
+# Índices ordenados que hay que revisar al escribir cada atributo
+_INDICES_POR_ATRIBUTO = {
+    'ejercicio_alta': ('ejercicio', 'fin_vida'),
+    'anos_amortizacion': ('fin_vida',),
+    'es_amortizable': ('fin_vida',),
+    'valor_origen': ('fin_vida',),
+    'fecha_baja': ('baja',),
+}
+
+# Atributos que recorre el filtro de texto de la tabla
+_BUSCABLES = ('descripcion', 'tipo_bien')
+
+
+class _Diccionario:
+    """Codifica valores repetidos (tipos, fechas, descripciones) como enteros.
+
+    El índice valor -> código se arma recién al codificar: tras una carga
+    masiva sólo se leen códigos y el índice ocuparía más que los propios textos.
+    """
+
+    def __init__(self, valores=None):
+        self.valores = valores if valores is not None else []
+        self.codigos = None
+
+    @classmethod
+    def desde_valores(cls, valores):
+        """Codifica una columna completa; devuelve (diccionario, códigos)"""
+        distintos = list(dict.fromkeys(valores))
+        codigos = {valor: codigo for codigo, valor in enumerate(distintos)}
+        return cls(distintos), array('i', map(codigos.__getitem__, valores))
+
+    def codificar(self, valor):
+        if self.codigos is None:
+            self.codigos = {valor: codigo for codigo, valor in enumerate(self.valores)}
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            self.codigos[valor] = codigo
+            self.valores.append(valor)
+        return codigo
+
+    def copy(self):
+        return _Diccionario(self.valores.copy())
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class _IndiceTrigramas:
+    """Índice de trigramas sobre los valores distintos de un _Diccionario.
+
+    Los códigos de diccionario sólo crecen, así que cada trigrama guarda un
+    array('i') de códigos al que sólo se agrega. La búsqueda verifica la
+    subcadena sobre los códigos del trigrama menos frecuente de la consulta.
+    """
+
+    def __init__(self):
+        self.textos = []
+        self.trigramas = {}
+
+    def sincronizar(self, diccionario):
+        """Indexa los valores agregados al diccionario desde la última vez"""
+        for codigo in range(len(self.textos), len(diccionario.valores)):
+            valor = diccionario.valores[codigo]
+            texto = valor.lower() if isinstance(valor, str) else ''
+            self.textos.append(texto)
+            for trigrama in _trigramas(texto):
+                codigos = self.trigramas.get(trigrama)
+                if codigos is None:
+                    codigos = self.trigramas[trigrama] = array('i')
+                codigos.append(codigo)
+
+    def buscar(self, consulta):
+        """Códigos cuyo texto contiene consulta (ya en minúsculas)"""
+        textos = self.textos
+        if len(consulta) < 3:
+            return [codigo for codigo, texto in enumerate(textos) if consulta in texto]
+        candidatos = min((self.trigramas.get(t, ()) for t in _trigramas(consulta)), key=len)
+        return [codigo for codigo in candidatos if consulta in textos[codigo]]
+
+
+class _IndiceOrdenado:
+    """Filas ordenadas por un valor entero, para cortes por rango con bisect.
+
+    valor(fila) da el entero de la fila o None si queda fuera del índice. Se
+    arma en la primera consulta; después las filas que cambian se anotan con
+    la clave que tenían y en la consulta siguiente se quitan esas claves y se
+    intercalan las nuevas, ordenadas, en una sola pasada (si cambió más de
+    una octava parte de las filas, se ordena de nuevo).
+
+    El array de claves nunca se modifica en el lugar (cada actualización arma
+    uno nuevo), así las copias lo comparten. version cambia con cada fila
+    anotada o agregada: una copia con la misma versión que el original tiene
+    sus mismos datos.
+    """
+
+    def __init__(self, valor):
+        self.valor = valor
+        self.claves = None
+        self.pendientes = {}
+        self.version = next(_VERSIONES)
+
+    def _clave(self, fila):
+        valor = self.valor(fila)
+        if valor is None or not _INT32_MIN <= valor <= _INT32_MAX:
+            return None
+        return ((valor + _DESPLAZAMIENTO_CLAVE) << 32) | fila
+
+    def anotar(self, fila):
+        """Llamar antes de cambiar un dato del que depende el valor de la fila"""
+        self.version = next(_VERSIONES)
+        if self.claves is not None and fila not in self.pendientes:
+            self.pendientes[fila] = self._clave(fila)
+
+    def agregar_fila(self, fila):
+        self.version = next(_VERSIONES)
+        if self.claves is not None:
+            # Todavía no figura en el índice
+            self.pendientes[fila] = None
+
+    def actualizar(self, filas):
+        claves, pendientes = self.claves, self.pendientes
+        if claves is None or len(pendientes) > filas // 8:
+            # Muchos cambios (o sin índice): conviene ordenar de nuevo
+            self.claves = array('Q', sorted(
+                clave for clave in map(self._clave, range(filas)) if clave is not None))
+        elif pendientes:
+            # Cortes (inicio, fin, clave nueva) sobre las claves actuales:
+            # [inicio, fin) se saltea y la clave nueva va en inicio
+            cortes = []
+            for anterior in pendientes.values():
+                if anterior is not None:
+                    posicion = bisect_left(claves, anterior)
+                    if posicion < len(claves) and claves[posicion] == anterior:
+                        cortes.append((posicion, posicion + 1, None))
+            for clave in map(self._clave, pendientes):
+                if clave is not None:
+                    posicion = bisect_left(claves, clave)
+                    cortes.append((posicion, posicion, clave))
+            cortes.sort()
+            
+            fusion = array('Q')
+            previo = 0
+            for inicio, fin, clave in cortes:
+                fusion += claves[previo:inicio]
+                if clave is not None:
+                    fusion.append(clave)
+                previo = fin
+            fusion += claves[previo:]
+            self.claves = fusion
+        pendientes.clear()
+
+    def filas_entre(self, desde, hasta, filas):
+        """Filas con desde <= valor <= hasta, en orden de valor (filas: total de filas)"""
+        self.actualizar(filas)
+        desde, hasta = max(desde, _INT32_MIN), min(hasta, _INT32_MAX)
+        if desde > hasta:
+            return []
+        inicio = bisect_left(self.claves, (desde + _DESPLAZAMIENTO_CLAVE) << 32)
+        fin = bisect_right(self.claves, ((hasta + _DESPLAZAMIENTO_CLAVE) << 32) | _MASCARA_FILA)
+        return [clave & _MASCARA_FILA for clave in self.claves[inicio:fin]]
+
+    def claves_al_dia(self, filas):
+        self.actualizar(filas)
+        return self.claves
+
+    def copiar_de(self, indice):
+        """Toma el estado de indice (de otra cartera) sin ponerlo al día"""
+        self.claves = indice.claves
+        self.pendientes = indice.pendientes.copy()
+        self.version = indice.version
+
+    def tomar_de(self, copia):
+        """Adopta las claves que una copia puso al día si desde la copia nada cambió"""
+        # Primero los pendientes: si ya están vacíos, las claves leídas después son las nuevas
+        if self.version != copia.version or copia.pendientes or copia.claves is None:
+            return
+        self.claves = copia.claves
+        self.pendientes.clear()
+
+
+class _Resultados:
+    """Resultados por fila (amortizacion_data / inflacion_data) en columnas float.
+
+    Cada fila guarda el código de su "forma" (claves en orden y cuáles son
+    booleanas); los valores van en un array('d') por clave. Los resultados con
+    otros tipos (mensajes de error, listas de fechas) quedan como dict aparte.
+    """
+
+    def __init__(self, filas=0):
+        self.formas = [()]
+        self.codigos = {(): 0}
+        self.forma = array('H', bytes(2 * filas))
+        self.valores = {}
+        self.otros = {}
+
+    def agregar_fila(self):
+        self.forma.append(0)
+        for columna in self.valores.values():
+            columna.append(0.0)
+
+    def leer(self, fila):
+        otros = self.otros.get(fila)
+        if otros is not None:
+            return otros
+        return {
+            clave: bool(self.valores[clave][fila]) if es_logico else self.valores[clave][fila]
+            for clave, es_logico in self.formas[self.forma[fila]]
+        }
+
+    def escribir(self, fila, datos):
+        forma = []
+        for clave, valor in datos.items():
+            if type(valor) is float:
+                forma.append((clave, False))
+            elif type(valor) is bool:
+                forma.append((clave, True))
+            else:
+                self.forma[fila] = 0
+                self.otros[fila] = datos
+                return
+        forma = tuple(forma)
+        codigo = self.codigos.get(forma)
+        if codigo is None:
+            codigo = len(self.formas)
+            self.codigos[forma] = codigo
+            self.formas.append(forma)
+
+        self.otros.pop(fila, None)
+        self.forma[fila] = codigo
+        for clave, valor in datos.items():
+            columna = self.valores.get(clave)
+            if columna is None:
+                columna = self.valores[clave] = array('d', bytes(8 * len(self.forma)))
+            columna[fila] = float(valor)
+
+    def copy(self):
+        copia = _Resultados()
+        copia.formas = self.formas.copy()
+        copia.codigos = self.codigos.copy()
+        copia.forma = array('H', self.forma)
+        copia.valores = {clave: array('d', columna) for clave, columna in self.valores.items()}
+        copia.otros = self.otros.copy()
+        return copia
+
+
+def _atributo(nombre):
+    def leer(self):
+        return self._cartera._leer(self._fila, nombre)
+
+    def escribir(self, valor):
+        self._cartera._escribir(self._fila, nombre, valor)
+
+    return property(leer, escribir)
+
+
+class BienVista(Bien):
+    """Bien respaldado por una fila de la Cartera; leer y asignar atributos usa sus columnas"""
+
+    __slots__ = ('_cartera', '_fila')
+
+    def __init__(self, cartera, fila):
+        object.__setattr__(self, '_cartera', cartera)
+        object.__setattr__(self, '_fila', fila)
+
+    @property
+    def id(self):
+        return self._cartera._ids[self._fila]
+
+    descripcion = _atributo('descripcion')
+    tipo_bien = _atributo('tipo_bien')
+    es_amortizable = _atributo('es_amortizable')
+    anos_amortizacion = _atributo('anos_amortizacion')
+    ejercicio_alta = _atributo('ejercicio_alta')
+    fecha_ingreso = _atributo('fecha_ingreso')
+    fecha_baja = _atributo('fecha_baja')
+    valor_origen = _atributo('valor_origen')
+
+    def get_partes_ingreso(self):
+        return self._cartera._partes_fecha(self._fila, 'fecha_ingreso')
+
+    def get_año_baja(self):
+        if not self.fecha_baja:
+            return None
+        partes = self._cartera._partes_fecha(self._fila, 'fecha_baja')
+        return partes[0] if partes else None
+
+    @property
+    def amortizacion_data(self):
+        return self._cartera._amortizacion.leer(self._fila)
+
+    @amortizacion_data.setter
+    def amortizacion_data(self, datos):
+        self._cartera._amortizacion.escribir(self._fila, datos)
+
+    @property
+    def inflacion_data(self):
+        return self._cartera._inflacion.leer(self._fila)
+
+    @inflacion_data.setter
+    def inflacion_data(self, datos):
+        self._cartera._inflacion.escribir(self._fila, datos)
+
+
+class _ValoresCartera(ValuesView):
+    def __iter__(self):
+        cartera = self._mapping
+        for fila in cartera._filas_vivas():
+            yield BienVista(cartera, fila)
+
+
+class _ItemsCartera(ItemsView):
+    def __iter__(self):
+        cartera = self._mapping
+        ids = cartera._ids
+        for fila in cartera._filas_vivas():
+            yield ids[fila], BienVista(cartera, fila)
+
+
+class Cartera(MutableMapping):
+    """Cartera {id: Bien} guardada por columnas (struct-of-arrays).
+
+    Cada atributo de Bien es un array tipado; descripción, tipo y fechas se
+    guardan como códigos de diccionario y los resultados de amortización e
+    inflación van en columnas paralelas. Al acceder se obtiene un BienVista,
+    que se comporta como un Bien. Las filas nunca se mueven: las bajas quedan
+    marcadas y un ID dado de baja reutiliza su fila si vuelve a agregarse.
+    Los IDs crecientes (el caso normal) se buscan con bisect; los que llegan
+    fuera de orden van a un dict aparte. Los valores que no entran en su array
+    (None, tipos inesperados) se guardan tal cual en un dict por fila.
+    """
+
+    def __init__(self):
+        self._ids = array('q')
+        self._vivo = bytearray()
+        self._textos = {nombre: array('i') for nombre in _TEXTOS}
+        self._diccionarios = {nombre: _Diccionario() for nombre in _TEXTOS}
+        # Fechas parseadas por código de diccionario: cada fecha distinta se parsea una vez
+        self._partes = {'fecha_ingreso': {}, 'fecha_baja': {}}
+        self._enteros = {nombre: array('i') for nombre in _ENTEROS}
+        self._reales = {nombre: array('d') for nombre in _REALES}
+        self._logicos = {nombre: bytearray() for nombre in _LOGICOS}
+        self._otros = {}
+        self._sellos = array('Q')
+        self._amortizacion = _Resultados()
+        self._inflacion = _Resultados()
+        # Filas [0, _prefijo) tienen IDs estrictamente crecientes
+        self._prefijo = 0
+        self._fuera_de_orden = {}
+        self._cantidad = 0
+        # Índice del filtro de texto: se arma en la primera búsqueda
+        self._indice_texto = None
+        # (consulta, filas) de la última búsqueda, para refinarla al seguir tecleando
+        self._busqueda_anterior = None
+        # Filas ordenadas por ejercicio_alta, por fin de vida útil (alta + años)
+        # y por año de baja; cada uno se arma en su primera consulta
+        self._ordenados = self._crear_ordenados()
+
+    @classmethod
+    def desde_columnas(cls, columnas):
+        """Arma la cartera desde columnas de la tabla bienes (fetchnumpy o listas), ordenadas por id"""
+        valores = {}
+        for nombre in COLUMNAS_BIEN:
+            columna = columnas[nombre]
+            # MaskedArray.tolist() convierte los NULL en None
+            valores[nombre] = columna.tolist() if hasattr(columna, 'tolist') else list(columna)
+
+        ids = valores['id']
+        if any(type(bien_id) is not int for bien_id in ids) or any(a >= b for a, b in zip(ids, ids[1:])):
+            cartera = cls()
+            for fila in zip(*(valores[nombre] for nombre in COLUMNAS_BIEN)):
+                bien = Bien.from_sql_dict(dict(zip(COLUMNAS_BIEN, fila)))
+                cartera[bien.id] = bien
+            return cartera
+
+        # Igual que Bien.from_sql_dict: sin amortización no hay años
+        amortizables = [bool(valor) for valor in valores['es_amortizable']]
+        valores['es_amortizable'] = amortizables
+        valores['anos_amortizacion'] = [
+            anos if amortizable else 0
+            for anos, amortizable in zip(valores['anos_amortizacion'], amortizables)
+        ]
+
+        cartera = cls()
+        cantidad = len(ids)
+        cartera._ids = array('q', ids)
+        cartera._vivo = bytearray(b'\x01') * cantidad
+        for nombre in _TEXTOS:
+            cartera._diccionarios[nombre], cartera._textos[nombre] = _Diccionario.desde_valores(valores[nombre])
+        for nombre in _ENTEROS + _REALES + _LOGICOS:
+            cartera._cargar_columna(nombre, valores[nombre])
+        cartera._sellos = array('Q', (next(_RELOJ),)) * cantidad
+        cartera._amortizacion = _Resultados(cantidad)
+        cartera._inflacion = _Resultados(cantidad)
+        cartera._prefijo = cantidad
+        cartera._cantidad = cantidad
+        return cartera
+
+    def _columna(self, nombre):
+        if nombre in self._enteros:
+            return self._enteros[nombre]
+        if nombre in self._reales:
+            return self._reales[nombre]
+        return self._logicos[nombre]
+
+    def _cargar_columna(self, nombre, valores):
+        columna = self._columna(nombre)
+        tipo = int if nombre in _ENTEROS else float if nombre in _REALES else bool
+        if set(map(type, valores)) <= {tipo}:
+            try:
+                columna.extend(valores)
+                return
+            except OverflowError:
+                del columna[:]
+
+        relleno = self._relleno(nombre)
+        for fila, valor in enumerate(valores):
+            if self._entra(nombre, valor):
+                columna.append(valor)
+            else:
+                columna.append(relleno)
+                self._otros.setdefault(fila, {})[nombre] = valor
+
+    @staticmethod
+    def _relleno(nombre):
+        return 0.0 if nombre in _REALES else 0
+
+    @staticmethod
+    def _entra(nombre, valor):
+        if nombre in _ENTEROS:
+            return type(valor) is int and _INT32_MIN <= valor <= _INT32_MAX
+        if nombre in _REALES:
+            return type(valor) is float
+        return type(valor) is bool
+
+    def _leer(self, fila, nombre):
+        otros = self._otros.get(fila)
+        if otros is not None and nombre in otros:
+            return otros[nombre]
+        if nombre in self._textos:
+            return self._diccionarios[nombre].valores[self._textos[nombre][fila]]
+        valor = self._columna(nombre)[fila]
+        return bool(valor) if nombre in self._logicos else valor
+
+    def _escribir(self, fila, nombre, valor):
+        for indice in _INDICES_POR_ATRIBUTO.get(nombre, ()):
+            self._ordenados[indice].anotar(fila)
+        if nombre in _DATOS_AMORTIZACION:
+            self._sellos[fila] = next(_RELOJ)
+        if nombre in self._textos:
+            try:
+                self._textos[nombre][fila] = self._diccionarios[nombre].codificar(valor)
+                entra = True
+            except TypeError:
+                # Valor no hasheable: se guarda tal cual
+                self._textos[nombre][fila] = self._diccionarios[nombre].codificar(None)
+                entra = False
+            if nombre in _BUSCABLES:
+                # Un texto nuevo puede coincidir con la búsqueda anterior
+                self._busqueda_anterior = None
+                if self._indice_texto is not None:
+                    self._indexar_texto(fila, nombre)
+        else:
+            entra = self._entra(nombre, valor)
+            self._columna(nombre)[fila] = valor if entra else self._relleno(nombre)
+
+        otros = self._otros.get(fila)
+        if not entra:
+            self._otros.setdefault(fila, {})[nombre] = valor
+        elif otros is not None:
+            otros.pop(nombre, None)
+            if not otros:
+                del self._otros[fila]
+
+    def _partes_fecha(self, fila, nombre):
+        otros = self._otros.get(fila)
+        if otros is not None and nombre in otros:
+            return Validators.parsear_fecha(otros[nombre])
+        codigo = self._textos[nombre][fila]
+        cache = self._partes[nombre]
+        if codigo not in cache:
+            cache[codigo] = Validators.parsear_fecha(self._diccionarios[nombre].valores[codigo])
+        return cache[codigo]
+
+    def _indexar_texto(self, fila, nombre):
+        indice, filas_por_codigo = self._indice_texto[nombre]
+        indice.sincronizar(self._diccionarios[nombre])
+        codigo = self._textos[nombre][fila]
+        filas = filas_por_codigo.get(codigo)
+        if filas is None:
+            filas_por_codigo[codigo] = array('i', (fila,))
+        elif filas[-1] != fila:
+            filas.append(fila)
+
+    def _construir_indice_texto(self):
+        self._indice_texto = {}
+        for nombre in _BUSCABLES:
+            indice = _IndiceTrigramas()
+            indice.sincronizar(self._diccionarios[nombre])
+            filas_por_codigo = {}
+            for fila, codigo in enumerate(self._textos[nombre]):
+                filas = filas_por_codigo.get(codigo)
+                if filas is None:
+                    filas_por_codigo[codigo] = array('i', (fila,))
+                else:
+                    filas.append(fila)
+            self._indice_texto[nombre] = (indice, filas_por_codigo)
+
+    def buscar_texto(self, consulta):
+        """
+        IDs de los bienes cuya descripción o tipo contiene consulta (sin
+        distinguir mayúsculas). Devuelve None si la consulta está vacía.
+
+        El índice de trigramas se arma en la primera búsqueda y desde ahí se
+        mantiene con cada alta, modificación o baja. Si la consulta extiende
+        la anterior ("maq" -> "maqu") sólo se revisan las filas que ya
+        coincidían, sin volver al índice.
+        """
+        consulta = consulta.strip().lower()
+        if not consulta:
+            return None
+        if self._indice_texto is None:
+            self._construir_indice_texto()
+
+        anterior = self._busqueda_anterior
+        if anterior is not None and anterior[0] in consulta:
+            filas = self._refinar_busqueda(anterior[1], consulta)
+        else:
+            filas = self._buscar_en_indice(consulta)
+        self._busqueda_anterior = (consulta, filas)
+
+        ids = self._ids
+        return {ids[fila] for fila in filas}
+
+    def _buscar_en_indice(self, consulta):
+        vivo, otros = self._vivo, self._otros
+        filas = set()
+        for nombre in _BUSCABLES:
+            indice, filas_por_codigo = self._indice_texto[nombre]
+            indice.sincronizar(self._diccionarios[nombre])
+            columna = self._textos[nombre]
+            for codigo in indice.buscar(consulta):
+                for fila in filas_por_codigo.get(codigo, ()):
+                    # Las filas dadas de baja o reescritas con otro texto quedan en la lista
+                    if vivo[fila] and columna[fila] == codigo and nombre not in otros.get(fila, ()):
+                        filas.add(fila)
+        return filas
+
+    def _refinar_busqueda(self, filas_anteriores, consulta):
+        vivo, otros = self._vivo, self._otros
+        buscables = [(nombre, self._textos[nombre], self._indice_texto[nombre][0].textos)
+                     for nombre in _BUSCABLES]
+        filas = set()
+        for fila in filas_anteriores:
+            if not vivo[fila]:
+                continue
+            otros_fila = otros.get(fila, ())
+            for nombre, columna, textos in buscables:
+                if consulta in textos[columna[fila]] and nombre not in otros_fila:
+                    filas.add(fila)
+                    break
+        return filas
+
+    def _crear_ordenados(self):
+        return {
+            'ejercicio': _IndiceOrdenado(self._valor_ejercicio),
+            'fin_vida': _IndiceOrdenado(self._valor_fin_vida),
+            'baja': _IndiceOrdenado(self._valor_baja),
+        }
+
+    def _en_otros(self, fila, *nombres):
+        otros = self._otros.get(fila)
+        return otros is not None and any(nombre in otros for nombre in nombres)
+
+    def _valor_ejercicio(self, fila):
+        if self._en_otros(fila, 'ejercicio_alta'):
+            return None
+        return self._enteros['ejercicio_alta'][fila]
+
+    def _valor_fin_vida(self, fila):
+        """Primer ejercicio en que el bien ya está totalmente amortizado (alta + años)"""
+        if self._en_otros(fila, 'ejercicio_alta', 'anos_amortizacion', 'es_amortizable', 'valor_origen'):
+            return None
+        anos = self._enteros['anos_amortizacion'][fila]
+        if not self._logicos['es_amortizable'][fila] or anos <= 0:
+            return None
+        return self._enteros['ejercicio_alta'][fila] + anos
+
+    def _valor_baja(self, fila):
+        if self._en_otros(fila, 'fecha_baja'):
+            return None
+        valor = self._leer(fila, 'fecha_baja')
+        if not valor or not isinstance(valor, str):
+            return None
+        partes = self._partes_fecha(fila, 'fecha_baja')
+        return partes[0] if partes else None
+
+    def _ids_vivos(self, filas):
+        ids, vivo = self._ids, self._vivo
+        return {ids[fila] for fila in filas if vivo[fila]}
+
+    def ids_hasta_ejercicio(self, año):
+        """
+        IDs de los bienes con ejercicio_alta <= año.
+
+        Las filas se mantienen ordenadas por ejercicio_alta, así que el corte
+        es un bisect y las filas que pasan forman un tramo contiguo.
+        """
+        encontrados = self._ids_vivos(
+            self._ordenados['ejercicio'].filas_entre(_INT32_MIN, año, len(self._ids)))
+        # Valores fuera del array (no enteros): se comparan como antes
+        ids, vivo = self._ids, self._vivo
+        for fila, otros in self._otros.items():
+            if 'ejercicio_alta' in otros and vivo[fila] and otros['ejercicio_alta'] <= año:
+                encontrados.add(ids[fila])
+        return encontrados
+
+    def ids_amortizados(self, año):
+        """IDs de los bienes amortizables que al ejercicio año ya completaron su vida útil"""
+        return self._ids_vivos(
+            self._ordenados['fin_vida'].filas_entre(_INT32_MIN, año, len(self._ids)))
+
+    def ids_amortizando_en(self, año):
+        """
+        IDs de los bienes con amortización en el ejercicio año: dados de alta
+        hace menos de anos_amortizacion ejercicios y sin baja anterior a año.
+        Sólo se revisan los bienes dados de alta dentro de la vida útil más larga.
+        """
+        anos = self._enteros['anos_amortizacion']
+        if not anos:
+            return set()
+        filas = self._ordenados['ejercicio'].filas_entre(año - max(anos) + 1, año, len(self._ids))
+        activas = []
+        for fila in filas:
+            fin_vida = self._valor_fin_vida(fila)
+            if fin_vida is None or fin_vida <= año:
+                continue
+            año_baja = self._valor_baja(fila)
+            if año_baja is None or año_baja >= año:
+                activas.append(fila)
+        return self._ids_vivos(activas)
+
+    def ids_baja_en(self, año):
+        """IDs de los bienes dados de baja en el ejercicio año"""
+        return self._ids_vivos(self._ordenados['baja'].filas_entre(año, año, len(self._ids)))
+
+    def posicion(self, bien_id):
+        """Fila (estable) de un bien vigente, o None; indexa columnas calculadas aparte"""
+        fila = self._fila_de(bien_id)
+        if fila is None or not self._vivo[fila]:
+            return None
+        return fila
+
+    def sellos_amortizacion(self):
+        """
+        Sello por fila de los datos de amortización (sólo lectura). Cambia con
+        cada alta, baja o modificación de esos datos, así que quien guarde
+        resultados por fila sabe cuáles recalcular comparando sellos.
+        """
+        return self._sellos
+
+    def columnas_amortizacion(self):
+        """
+        Columnas de entrada del motor vectorizado, por fila (sólo lectura):
+        valor_origen, anos_amortizacion, ejercicio_alta, es_amortizable,
+        año_baja (0 = sin baja) y validas (1 si los datos de la fila entran en
+        los arrays; si no, hay que calcularla por bien). Incluye las filas dadas
+        de baja: ver posicion().
+        """
+        años_por_codigo = []
+        for valor in self._diccionarios['fecha_baja'].valores:
+            if not valor:
+                años_por_codigo.append(0)
+            elif isinstance(valor, str):
+                partes = Validators.parsear_fecha(valor)
+                años_por_codigo.append(partes[0] if partes else 0)
+            else:
+                # get_año_baja fallaría: se calcula por bien
+                años_por_codigo.append(None)
+
+        años_baja = array('i', (años_por_codigo[codigo] or 0 for codigo in self._textos['fecha_baja']))
+        validas = bytearray(b'\x01') * len(self._ids)
+        if None in años_por_codigo:
+            for fila, codigo in enumerate(self._textos['fecha_baja']):
+                if años_por_codigo[codigo] is None:
+                    validas[fila] = 0
+        for fila, otros in self._otros.items():
+            if not _DATOS_AMORTIZACION.isdisjoint(otros):
+                validas[fila] = 0
+
+        return {
+            'valor_origen': self._reales['valor_origen'],
+            'anos_amortizacion': self._enteros['anos_amortizacion'],
+            'ejercicio_alta': self._enteros['ejercicio_alta'],
+            'es_amortizable': self._logicos['es_amortizable'],
+            'año_baja': años_baja,
+            'validas': validas,
+        }
+
+    def _fila_de(self, bien_id):
+        if type(bien_id) is not int:
+            return None
+        fila = self._fuera_de_orden.get(bien_id)
+        if fila is not None:
+            return fila
+        fila = bisect_left(self._ids, bien_id, 0, self._prefijo)
+        if fila < self._prefijo and self._ids[fila] == bien_id:
+            return fila
+        return None
+
+    def _fila_viva(self, bien_id):
+        fila = self._fila_de(bien_id)
+        if fila is None or not self._vivo[fila]:
+            raise KeyError(bien_id)
+        return fila
+
+    def _agregar_fila(self, bien_id):
+        fila = len(self._ids)
+        if self._prefijo == fila and (not fila or bien_id > self._ids[-1]):
+            self._prefijo += 1
+        else:
+            self._fuera_de_orden[bien_id] = fila
+        self._ids.append(bien_id)
+        self._vivo.append(0)
+        self._sellos.append(next(_RELOJ))
+        for nombre, columna in self._textos.items():
+            columna.append(0)
+        for nombre in _ENTEROS + _REALES + _LOGICOS:
+            self._columna(nombre).append(self._relleno(nombre))
+        self._amortizacion.agregar_fila()
+        self._inflacion.agregar_fila()
+        for indice in self._ordenados.values():
+            indice.agregar_fila(fila)
+        return fila
+
+    def _filas_vivas(self):
+        vivo = self._vivo
+        return (fila for fila in range(len(vivo)) if vivo[fila])
+
+    def __getitem__(self, bien_id):
+        return BienVista(self, self._fila_viva(bien_id))
+
+    def __setitem__(self, bien_id, bien):
+        if type(bien_id) is not int:
+            raise TypeError("El ID del bien debe ser un entero")
+        # Se leen antes de escribir: bien puede ser una vista de esta misma fila
+        datos = {nombre: getattr(bien, nombre) for nombre in COLUMNAS_BIEN[1:]}
+        amortizacion_data = getattr(bien, 'amortizacion_data', {})
+        inflacion_data = getattr(bien, 'inflacion_data', {})
+
+        fila = self._fila_de(bien_id)
+        if fila is None:
+            fila = self._agregar_fila(bien_id)
+        if not self._vivo[fila]:
+            self._vivo[fila] = 1
+            self._cantidad += 1
+        for nombre, valor in datos.items():
+            self._escribir(fila, nombre, valor)
+        self._amortizacion.escribir(fila, amortizacion_data)
+        self._inflacion.escribir(fila, inflacion_data)
+
+    def __delitem__(self, bien_id):
+        fila = self._fila_viva(bien_id)
+        self._vivo[fila] = 0
+        self._cantidad -= 1
+        # Sin _otros cambia la clave de la fila
+        for indice in self._ordenados.values():
+            indice.anotar(fila)
+        self._sellos[fila] = next(_RELOJ)
+        self._otros.pop(fila, None)
+        self._amortizacion.escribir(fila, {})
+        self._inflacion.escribir(fila, {})
+
+    def __iter__(self):
+        ids = self._ids
+        return (ids[fila] for fila in self._filas_vivas())
+
+    def __len__(self):
+        return self._cantidad
+
+    def __contains__(self, bien_id):
+        fila = self._fila_de(bien_id)
+        return fila is not None and bool(self._vivo[fila])
+
+    def values(self):
+        return _ValoresCartera(self)
+
+    def items(self):
+        return _ItemsCartera(self)
+
+    def copy(self):
+        """Copia independiente de todas las columnas (las vistas de la copia no tocan el original).
+
+        El índice de texto no se copia: la copia lo arma si se busca en ella.
+        Los índices ordenados se copian como están, sin ponerlos al día: eso
+        queda para quien consulte la copia (el hilo del refresco), que después
+        puede devolverlos con tomar_indices.
+        """
+        copia = Cartera()
+        copia._ids = array('q', self._ids)
+        copia._vivo = bytearray(self._vivo)
+        copia._textos = {nombre: array('i', columna) for nombre, columna in self._textos.items()}
+        copia._diccionarios = {nombre: dicc.copy() for nombre, dicc in self._diccionarios.items()}
+        copia._partes = {nombre: cache.copy() for nombre, cache in self._partes.items()}
+        copia._enteros = {nombre: array('i', columna) for nombre, columna in self._enteros.items()}
+        copia._reales = {nombre: array('d', columna) for nombre, columna in self._reales.items()}
+        copia._logicos = {nombre: bytearray(columna) for nombre, columna in self._logicos.items()}
+        copia._otros = {fila: otros.copy() for fila, otros in self._otros.items()}
+        copia._sellos = array('Q', self._sellos)
+        copia._amortizacion = self._amortizacion.copy()
+        copia._inflacion = self._inflacion.copy()
+        copia._prefijo = self._prefijo
+        copia._fuera_de_orden = self._fuera_de_orden.copy()
+        copia._cantidad = self._cantidad
+        for nombre, indice in self._ordenados.items():
+            copia._ordenados[nombre].copiar_de(indice)
+        return copia
+
+    def tomar_indices(self, copia):
+        """Adopta los índices ordenados que una copia (de copy) puso al día.
+
+        Sólo los de índices sin cambios desde la copia; así el próximo refresco
+        no vuelve a armarlos ni a intercalar los mismos cambios.
+        """
+        for nombre, indice in self._ordenados.items():
+            indice.tomar_de(copia._ordenados[nombre])
@@ -1,27 +1,66 @@
+from array import array
 from datetime import datetime
 
+from utils.arrays import np
+from utils.lector_csv import abrir_mmap, detectar_separador, filas_csv
+from utils.validators import Validators
+
+
+def mes_clave(fecha_str):
+    """Clave entera del mes (año * 12 + mes - 1) para una fecha DD/MM/AAAA"""
+    partes = Validators.parsear_fecha(fecha_str)
+    return partes[0] * 12 + partes[1] - 1 if partes else None
+
+
 class IndiceFACPCE:
-    def __init__(self, fecha, indice, observaciones=""):
+    __slots__ = ('_fecha', 'indice', 'observaciones', '_fecha_carga', '_partes')
+    
+    def __init__(self, fecha, indice, observaciones="", fecha_carga=None):
         self.fecha = fecha  # formato DD/MM/AAAA
         self.indice = float(indice)
         self.observaciones = observaciones
-        self.fecha_carga = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        # Sin fecha de carga se toma el momento actual; el texto se arma al leerlo
+        self._fecha_carga = fecha_carga if fecha_carga is not None else datetime.now()
+    
+    @property
+    def fecha(self):
+        return self._fecha
+    
+    @fecha.setter
+    def fecha(self, valor):
+        self._fecha = valor
+        self._partes = None
+    
+    @property
+    def fecha_carga(self):
+        if isinstance(self._fecha_carga, datetime):
+            self._fecha_carga = self._fecha_carga.strftime("%d/%m/%Y %H:%M:%S")
+        return self._fecha_carga
+    
+    @fecha_carga.setter
+    def fecha_carga(self, valor):
+        self._fecha_carga = valor
+    
+    def get_partes_fecha(self):
+        """(año, mes, día, ordinal) de la fecha (se guarda la primera vez), o () si no es válida"""
+        if self._partes is None:
+            self._partes = Validators.parsear_fecha(self._fecha) or ()
+        return self._partes
+    
+    def get_mes_clave(self):
+        """Clave entera del mes (año * 12 + mes - 1), o None si la fecha no es válida"""
+        partes = self.get_partes_fecha()
+        return partes[0] * 12 + partes[1] - 1 if partes else None
     
     def get_mes_año_key(self):
         """Retorna clave MM/AAAA para búsquedas"""
-        try:
-            fecha_obj = datetime.strptime(self.fecha, '%d/%m/%Y')
-            return f"{fecha_obj.month:02d}/{fecha_obj.year}"
-        except ValueError:
-            return None
+        partes = self.get_partes_fecha()
+        return f"{partes[1]:02d}/{partes[0]}" if partes else None
     
     def get_año(self):
         """Retorna el año del índice"""
-        try:
-            fecha_obj = datetime.strptime(self.fecha, '%d/%m/%Y')
-            return fecha_obj.year
-        except ValueError:
-            return None
+        partes = self.get_partes_fecha()
+        return partes[0] if partes else None
     
     def to_dict(self):
         return {
@@ -42,44 +81,115 @@ class IndiceFACPCE:
     
     @classmethod
     def from_sql_dict(cls, data):
-        indice = cls(data['fecha'], data['indice'], data['observaciones'])
-        indice.fecha_carga = data['fecha_carga']
-        return indice
+        return cls(data['fecha'], data['indice'], data['observaciones'], data['fecha_carga'])
 
 class GestorIndicesFACPCE:
     def __init__(self):
         self.indices = {}  # Key: "MM/AAAA", Value: IndiceFACPCE
+        
+        # Tabla densa por mes (se reconstruye al consultar si cambió la serie)
+        self._tabla_vigente = False
+        self._mes_base = 0
+        self._valores = array('d')
+        self._validos = bytearray()
     
-    def agregar_indice(self, fecha, indice, observaciones=""):
+    def agregar_indice(self, fecha, indice, observaciones="", fecha_carga=None):
         """Agrega un índice FACPCE"""
-        indice_obj = IndiceFACPCE(fecha, indice, observaciones)
+        indice_obj = IndiceFACPCE(fecha, indice, observaciones, fecha_carga)
         key = indice_obj.get_mes_año_key()
         if key:
             self.indices[key] = indice_obj
+            self._tabla_vigente = False
             return True
         return False
     
+    def eliminar_indice(self, fecha):
+        """Elimina el índice del mes de una fecha (DD/MM/AAAA)"""
+        partes = Validators.parsear_fecha(fecha)
+        if partes is None:
+            return False
+        
+        key = f"{partes[1]:02d}/{partes[0]}"
+        if key not in self.indices:
+            return False
+        del self.indices[key]
+        self._tabla_vigente = False
+        return True
+    
+    def _tabla(self):
+        """Tabla densa de valores por mes y su mapa de validez"""
+        if not self._tabla_vigente:
+            meses = {}
+            for indice_obj in self.indices.values():
+                meses[indice_obj.get_mes_clave()] = indice_obj.indice
+            
+            self._mes_base = min(meses) if meses else 0
+            largo = (max(meses) - self._mes_base + 1) if meses else 0
+            self._valores = array('d', bytes(8 * largo))
+            self._validos = bytearray(largo)
+            for mes, valor in meses.items():
+                self._valores[mes - self._mes_base] = valor
+                self._validos[mes - self._mes_base] = 1
+            self._tabla_vigente = True
+        return self._valores, self._validos
+    
+    def get_valor_mes(self, mes):
+        """Valor del índice para una clave de mes, o None si falta"""
+        valores, validos = self._tabla()
+        posicion = mes - self._mes_base
+        if 0 <= posicion < len(validos) and validos[posicion]:
+            return valores[posicion]
+        return None
+    
+    def get_valores_meses(self, meses):
+        """
+        Resuelve un vector de claves de mes en una sola llamada
+        
+        Returns:
+            (valores, validos): arrays NumPy de floats y booleanos (listas si
+            NumPy no está instalado). Las claves negativas o fuera de la serie
+            se informan como no válidas.
+        """
+        valores, validos = self._tabla()
+        if np is None:
+            resultado = [self.get_valor_mes(mes) if mes >= 0 else None for mes in meses]
+            return ([valor or 0.0 for valor in resultado],
+                    [valor is not None for valor in resultado])
+        
+        meses = np.asarray(meses, dtype=np.int64)
+        if not len(validos):
+            return np.zeros(len(meses)), np.zeros(len(meses), dtype=bool)
+        
+        posiciones = meses - self._mes_base
+        en_rango = (meses >= 0) & (posiciones >= 0) & (posiciones < len(validos))
+        posiciones = np.where(en_rango, posiciones, 0)
+        
+        tabla_valores = np.frombuffer(valores, dtype=np.float64)
+        tabla_validos = np.frombuffer(validos, dtype=bool)
+        validos_meses = en_rango & tabla_validos[posiciones]
+        return np.where(validos_meses, tabla_valores[posiciones], 0.0), validos_meses
+    
     def get_indice(self, fecha_str):
         """Obtiene índice para una fecha específica (DD/MM/AAAA)"""
-        try:
-            fecha_obj = datetime.strptime(fecha_str, '%d/%m/%Y')
-            key = f"{fecha_obj.month:02d}/{fecha_obj.year}"
-            return self.indices.get(key)
-        except ValueError:
+        partes = Validators.parsear_fecha(fecha_str)
+        if partes is None:
             return None
+        return self.indices.get(f"{partes[1]:02d}/{partes[0]}")
     
     def get_coeficiente(self, fecha_origen, fecha_destino):
         """Calcula coeficiente entre dos fechas"""
-        indice_origen = self.get_indice(fecha_origen)
-        indice_destino = self.get_indice(fecha_destino)
+        mes_origen = mes_clave(fecha_origen)
+        mes_destino = mes_clave(fecha_destino)
+        valor_origen = self.get_valor_mes(mes_origen) if mes_origen is not None else None
+        valor_destino = self.get_valor_mes(mes_destino) if mes_destino is not None else None
         
-        if not indice_origen or not indice_destino:
-            return None, f"Falta índice para {fecha_origen if not indice_origen else fecha_destino}"
+        if valor_origen is None or valor_destino is None:
+            return None, f"Falta índice para {fecha_origen if valor_origen is None else fecha_destino}"
         
-        if indice_origen.indice == 0:
+        if valor_origen == 0:
             return None, f"Índice origen es cero para {fecha_origen}"
         
-        coeficiente = indice_destino.indice / indice_origen.indice
+        coeficiente = valor_destino / valor_origen
         return coeficiente, None
     
     def get_fechas_faltantes(self, fechas_necesarias):
@@ -92,37 +202,30 @@ class GestorIndicesFACPCE:
     
     def cargar_desde_csv(self, archivo_csv):
         """Carga índices desde archivo CSV con separador punto y coma"""
-        import csv
-        from utils.validators import Validators
-        
         try:
-            with open(archivo_csv, 'r', encoding='utf-8') as file:
+            # Archivo mapeado en memoria: sólo se decodifican fecha, índice y observaciones
+            with abrir_mmap(archivo_csv) as buffer:
                 # Detectar separador automáticamente
-                sample = file.read(1024)
-                file.seek(0)
-                delimiter = ';' if ';' in sample else ','
+                delimiter = detectar_separador(buffer, 'utf-8')
+                
+                filas = [row for row in filas_csv(buffer, 'utf-8', delimiter, 3) if len(row) >= 2]
+            
+            # Usar parser decimal argentino, para toda la columna de una vez
+            indices = Validators.parse_decimales_argentinos([row[1].strip() for row in filas])
+            count = 0
+            for row, indice_float in zip(filas, indices):
+                fecha = row[0].strip()
+                observaciones = row[2].strip() if len(row) > 2 else ""
                 
-                csv_reader = csv.reader(file, delimiter=delimiter)
-                count = 0
-                for row in csv_reader:
-                    if len(row) >= 2:
-                        fecha = row[0].strip()
-                        indice_str = row[1].strip()
-                        observaciones = row[2].strip() if len(row) > 2 else ""
-                        
-                        # Usar parser decimal argentino
-                        indice_float = Validators.parse_decimal_argentino(indice_str)
-                        
-                        if self.agregar_indice(fecha, indice_float, observaciones):
-                            count += 1
-                return count, None
+                if self.agregar_indice(fecha, float(indice_float), observaciones):
+                    count += 1
+            return count, None
         except Exception as e:
             return 0, str(e)
     
     def exportar_a_csv(self, archivo_csv):
         """Exporta índices a archivo CSV con formato argentino"""
         import csv
-        from utils.validators import Validators
         
         try:
             with open(archivo_csv, 'w', newline='', encoding='utf-8') as file:
@@ -131,12 +234,15 @@ class GestorIndicesFACPCE:
                 
                 # Ordenar por fecha
                 indices_ordenados = sorted(self.indices.values(), 
-                                         key=lambda x: datetime.strptime(x.fecha, '%d/%m/%Y'))
+                                         key=lambda x: x.get_partes_fecha())
+                # 6 decimales para índices
+                valores = Validators.format_decimales_argentinos(
+                    [indice.indice for indice in indices_ordenados], 6)
                 
-                for indice in indices_ordenados:
+                for indice, valor in zip(indices_ordenados, valores):
                     csv_writer.writerow([
                         indice.fecha, 
-                        Validators.format_decimal_argentino(indice.indice, 6),  # 6 decimales para índices
+                        valor,
                         indice.observaciones, 
                         indice.fecha_carga
                     ])
@@ -147,4 +253,4 @@ class GestorIndicesFACPCE:
     def get_todos_indices(self):
         """Retorna todos los índices ordenados por fecha"""
         return sorted(self.indices.values(), 
-                     key=lambda x: datetime.strptime(x.fecha, '%d/%m/%Y'))
+                     key=lambda x: x.get_partes_fecha())
@@ -5,31 +5,38 @@ By Claude with ADHD Energy ⚡⚡⚡
 """
 
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QPushButton, QLabel, QLineEdit,
+    QTableWidget, QTableWidgetItem, QTableView, QPushButton, QLabel, QLineEdit,
     QComboBox, QDateEdit, QDialog, QFormLayout, QMessageBox,
     QHeaderView, QTabWidget, QFrame, QSplitter, QFileDialog,
     QProgressBar, QStatusBar, QCheckBox, QSpinBox, QTextEdit,
     QScrollArea, QGridLayout, QGroupBox, QMenu
 )
-from PySide6.QtCore import Qt, QDate, Signal, QSize, QPropertyAnimation, QEasingCurve, QTimer
+from PySide6.QtCore import (
+    Qt, QDate, Signal, QSize, QPropertyAnimation, QEasingCurve, QTimer,
+    QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+)
 from PySide6.QtGui import QFont, QColor, QPalette, QIcon, QPainter, QLinearGradient
 
 # Importar módulos existentes
 from models.bien import Bien
+from models.cambios import CambiosBienes
+from models.cartera import Cartera
 from models.empresa import EmpresaData
 from models.indice_facpce import GestorIndicesFACPCE
 from utils.validators import Validators
 from utils.csv_handler import CsvHandler
-from modules.amortizaciones import AmortizacionCalculator
+from modules.amortizaciones import AmortizacionCalculator, CuboAmortizaciones, MOTOR_NUMPY
 from modules.filtros import FiltroEjercicio
 from modules.inflacion_calculator import InflacionCalculator
+from modules.tabla_bienes import DEMORA_FILTRO_MS, RefrescoCancelado, calcular_filas_tabla
 from views.gestion_indices import GestionIndices
-from db.duck import connect as duck_connect, init_schema as duck_init, save_company_state, load_by_cuit
+from db.duck import connect as duck_connect, init_schema as duck_init, save_company_state, load_by_cuit, load_amortization_cube
 
 
 # 🎨 GREY MOON THEME STYLESHEET
@@ -207,7 +214,7 @@ QPushButton#danger_btn:hover {
 }
 
 /* Tables */
-QTableWidget {
+QTableView {
     background-color: #323541;
     alternate-background-color: #2d2f39;
     border: 1px solid #3e4149;
@@ -216,17 +223,17 @@ QTableWidget {
     color: #e0e0e0;
 }
 
-QTableWidget::item {
+QTableView::item {
     padding: 8px;
     border: none;
 }
 
-QTableWidget::item:selected {
+QTableView::item:selected {
     background-color: #6c9ef8;
     color: #ffffff;
 }
 
-QTableWidget::item:hover {
+QTableView::item:hover {
     background-color: #3d4150;
 }
 
@@ -388,25 +395,116 @@ QFrame[frameShape="5"]  /* VLine */
 """
 
 
+class BienesTableModel(QAbstractTableModel):
+    """Main table model: serves the computed rows without per-cell items"""
+    
+    COLUMNS = [
+        'ID', 'Descripción', 'Tipo', 'Amort.', 'Años',
+        'Ejercicio', 'F.Ingreso', 'F.Baja', 'Valor Origen',
+        'Amort. Inicio', 'Amort. Ejercicio', 'Amort. Acum.', 'Valor Residual'
+    ]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self._rows[index.row()][index.column()]
+        if role == Qt.TextAlignmentRole:
+            if index.column() == 1:
+                return int(Qt.AlignLeft | Qt.AlignVCenter)
+            return int(Qt.AlignCenter)
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+    
+    def bien_id(self, row):
+        """ID of the bien shown in a source row"""
+        return int(self._rows[row][0])
+    
+    def set_rows(self, rows):
+        """Replace the rows; same IDs in the same order only repaint what changed"""
+        rows = list(rows)
+        old_rows = self._rows
+        if len(rows) != len(old_rows) or any(
+                new[0] != old[0] for new, old in zip(rows, old_rows)):
+            self.beginResetModel()
+            self._rows = rows
+            self.endResetModel()
+            return
+        
+        self._rows = rows
+        # One dataChanged per run of consecutive modified rows
+        last_column = len(self.COLUMNS) - 1
+        start = None
+        for row, (new, old) in enumerate(zip(rows, old_rows)):
+            if new != old:
+                if start is None:
+                    start = row
+            elif start is not None:
+                self.dataChanged.emit(self.index(start, 0), self.index(row - 1, last_column))
+                start = None
+        if start is not None:
+            self.dataChanged.emit(self.index(start, 0), self.index(len(rows) - 1, last_column))
+
+
+class BienesFilterProxy(QSortFilterProxyModel):
+    """Text filter over Descripción and Tipo, fed with the IDs found by Cartera.buscar_texto"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._matches = None
+    
+    def set_matches(self, matches):
+        """IDs to show, or None to show every row"""
+        self._matches = matches
+        self.invalidateFilter()
+    
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._matches is None:
+            return True
+        return self.sourceModel().bien_id(source_row) in self._matches
+
+
 class ModernBienesApp(QMainWindow):
     """🌙 Modern UI for Bienes de Uso"""
     
+    # (generation, rows, cartera snapshot) computed by the table worker
+    table_computed = Signal(int, object, object)
+    
     def __init__(self):
         super().__init__()
         
         # Datos principales
         self.empresa = EmpresaData()
         self.tipos_bienes = []
-        self.bienes = {}
+        self.bienes = Cartera()
         self.next_id = 1
         self.tipos_configurados = False
+        # Altas/modificaciones/bajas pendientes para el guardado diferencial
+        self.cambios = CambiosBienes()
         
         # Gestores y calculadoras
         self.csv_handler = CsvHandler()
-        self.amort_calculator = AmortizacionCalculator()
+        # Motor de amortización: MOTOR_NUMPY (vectorizado) o MOTOR_PYTHON (por bien)
+        self.amort_calculator = AmortizacionCalculator(motor=MOTOR_NUMPY)
+        # Amortizaciones por bien y ejercicio ya calculadas (cambiar de ejercicio no recalcula)
+        self.cubo_amortizaciones = CuboAmortizaciones(self.amort_calculator)
         self.filtro_ejercicio = FiltroEjercicio()
         self.gestor_indices = GestorIndicesFACPCE()
-        self.inflacion_calculator = InflacionCalculator(self.gestor_indices)
+        self.inflacion_calculator = InflacionCalculator(self.gestor_indices, motor=MOTOR_NUMPY)
         
         # Database
         self.db_con = None
@@ -416,6 +514,19 @@ class ModernBienesApp(QMainWindow):
         # Ventanas adicionales
         self.vista_ajustada_window = None
         
+        # Table refresh: debounce timer for the filters and latest request number
+        self._table_generation = 0
+        self._table_total = 0
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(DEMORA_FILTRO_MS)
+        self.refresh_timer.timeout.connect(self.refresh_table)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(DEMORA_FILTRO_MS)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.table_computed.connect(self.publish_table)
+        
         self.init_ui()
         self.apply_theme()
         
@@ -579,14 +690,14 @@ class ModernBienesApp(QMainWindow):
         self.filter_input = QLineEdit()
         self.filter_input.setPlaceholderText("🔍 Filtrar bienes...")
         self.filter_input.setMaximumWidth(200)
-        self.filter_input.textChanged.connect(self.refresh_table)
+        self.filter_input.textChanged.connect(self.schedule_filter)
         header_layout.addWidget(QLabel("Filtrar:"))
         header_layout.addWidget(self.filter_input)
         
         self.ejercicio_input = QLineEdit()
         self.ejercicio_input.setPlaceholderText("DD/MM/AAAA")
         self.ejercicio_input.setMaximumWidth(120)
-        self.ejercicio_input.textChanged.connect(self.refresh_table)
+        self.ejercicio_input.textChanged.connect(self.schedule_refresh)
         header_layout.addWidget(QLabel("Ejercicio:"))
         header_layout.addWidget(self.ejercicio_input)
         
@@ -646,39 +757,35 @@ class ModernBienesApp(QMainWindow):
         
         # Table
         self.create_table()
-        layout.addWidget(self.table_widget)
+        layout.addWidget(self.table_view)
     
     def create_table(self):
-        """Create main table"""
-        self.table_widget = QTableWidget()
-        self.table_widget.setAlternatingRowColors(True)
-        self.table_widget.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table_widget.setSelectionMode(QTableWidget.ExtendedSelection)
-        self.table_widget.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.table_widget.customContextMenuRequested.connect(self.show_context_menu)
-        
-        # Columns
-        columns = [
-            'ID', 'Descripción', 'Tipo', 'Amort.', 'Años',
-            'Ejercicio', 'F.Ingreso', 'F.Baja', 'Valor Origen',
-            'Amort. Inicio', 'Amort. Ejercicio', 'Amort. Acum.', 'Valor Residual'
-        ]
-        
-        self.table_widget.setColumnCount(len(columns))
-        self.table_widget.setHorizontalHeaderLabels(columns)
+        """Create main table (model/view; the proxy applies the text filter)"""
+        self.table_model = BienesTableModel(self)
+        self.table_proxy = BienesFilterProxy(self)
+        self.table_proxy.setSourceModel(self.table_model)
+        
+        self.table_view = QTableView()
+        self.table_view.setModel(self.table_proxy)
+        self.table_view.setAlternatingRowColors(True)
+        self.table_view.setSelectionBehavior(QTableView.SelectRows)
+        self.table_view.setSelectionMode(QTableView.ExtendedSelection)
+        self.table_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.table_view.customContextMenuRequested.connect(self.show_context_menu)
+        self.table_view.verticalHeader().setVisible(False)
         
         # Column widths
         widths = [50, 200, 120, 70, 50, 70, 90, 90, 120, 120, 120, 120, 120]
         for i, width in enumerate(widths):
-            self.table_widget.setColumnWidth(i, width)
+            self.table_view.setColumnWidth(i, width)
         
         # Header settings
-        header = self.table_widget.horizontalHeader()
+        header = self.table_view.horizontalHeader()
         header.setStretchLastSection(True)
         header.setSectionsMovable(False)
         
         # Double click to edit
-        self.table_widget.doubleClicked.connect(self.edit_selected)
+        self.table_view.doubleClicked.connect(self.edit_selected)
     
     def apply_theme(self):
         """Apply the grey moon theme"""
@@ -806,6 +913,7 @@ class ModernBienesApp(QMainWindow):
             bien = dialog.get_bien()
             bien.id = self.next_id
             self.bienes[self.next_id] = bien
+            self.cambios.registrar_alta(self.next_id)
             self.next_id += 1
             self._dirty = True
             
@@ -817,12 +925,12 @@ class ModernBienesApp(QMainWindow):
         if not self.tipos_configurados:
             return
         
-        current_row = self.table_widget.currentRow()
-        if current_row < 0:
+        current = self.table_view.currentIndex()
+        if not current.isValid():
             self.show_warning("Seleccione un bien para editar")
             return
         
-        bien_id = int(self.table_widget.item(current_row, 0).text())
+        bien_id = self.table_model.bien_id(self.table_proxy.mapToSource(current).row())
         bien = self.bienes.get(bien_id)
         
         if not bien:
@@ -834,6 +942,7 @@ class ModernBienesApp(QMainWindow):
             updated_bien = dialog.get_bien()
             updated_bien.id = bien_id
             self.bienes[bien_id] = updated_bien
+            self.cambios.registrar_modificacion(bien_id)
             self._dirty = True
             
             self.refresh_table()
@@ -844,12 +953,15 @@ class ModernBienesApp(QMainWindow):
         if not self.tipos_configurados:
             return
         
-        selected_rows = set(item.row() for item in self.table_widget.selectedItems())
-        if not selected_rows:
+        selected_ids = [
+            self.table_model.bien_id(self.table_proxy.mapToSource(index).row())
+            for index in self.table_view.selectionModel().selectedRows()
+        ]
+        if not selected_ids:
             self.show_warning("Seleccione bienes para eliminar")
             return
         
-        count = len(selected_rows)
+        count = len(selected_ids)
         reply = QMessageBox.question(
             self,
             "Confirmar eliminación",
@@ -858,75 +970,71 @@ class ModernBienesApp(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            for row in selected_rows:
-                bien_id = int(self.table_widget.item(row, 0).text())
+            for bien_id in selected_ids:
                 if bien_id in self.bienes:
                     del self.bienes[bien_id]
+                    self.cambios.registrar_baja(bien_id)
             
             self._dirty = True
             self.refresh_table()
             self.show_info("Éxito", f"{count} bien(es) eliminado(s)")
     
+    def schedule_refresh(self, *args):
+        """Refresh the table once typing in the ejercicio pauses"""
+        self.refresh_timer.start()
+    
+    def schedule_filter(self, *args):
+        """Re-filter the table once typing in the text filter pauses"""
+        self.filter_timer.start()
+    
+    def apply_filter(self):
+        """Text filter runs in the proxy over the indexed matches: no recalculation needed"""
+        self.filter_timer.stop()
+        self.table_proxy.set_matches(self.bienes.buscar_texto(self.filter_input.text()))
+        self.update_table_status()
+    
     def refresh_table(self):
-        """Refresh the table with current data"""
-        # Clear table
-        self.table_widget.setRowCount(0)
-        
-        # Get filtered bienes
-        bienes_mostrar = list(self.bienes.values())
-        
-        # Apply text filter
-        filtro_texto = self.filter_input.text().strip().lower()
-        if filtro_texto:
-            bienes_mostrar = [
-                b for b in bienes_mostrar
-                if filtro_texto in b.descripcion.lower() or filtro_texto in b.tipo_bien.lower()
-            ]
-        
-        # Apply ejercicio filter
+        """Refresh the table; ejercicio filter, amortization and formatting run on a worker thread"""
+        self.refresh_timer.stop()
+        
+        # A newer request supersedes the one being computed
+        self._table_generation += 1
+        generation = self._table_generation
+        
+        bienes = self.bienes.copy()
         ejercicio_liquidacion = self.ejercicio_input.text().strip()
-        if ejercicio_liquidacion and Validators.validar_fecha(ejercicio_liquidacion):
-            bienes_mostrar = self.filtro_ejercicio.filtrar_bienes_por_ejercicio(
-                bienes_mostrar, ejercicio_liquidacion
-            )
-            
-            # Calculate amortizations
-            amortizaciones = self.amort_calculator.calcular_amortizaciones_lote(
-                bienes_mostrar, ejercicio_liquidacion
-            )
-        else:
-            amortizaciones = {}
         
-        # Populate table
-        for bien in sorted(bienes_mostrar, key=lambda x: x.id):
-            row = self.table_widget.rowCount()
-            self.table_widget.insertRow(row)
-            
-            amort_data = amortizaciones.get(bien.id, {})
-            
-            values = [
-                str(bien.id),
-                bien.descripcion,
-                bien.tipo_bien,
-                'SI' if bien.es_amortizable else 'NO',
-                str(bien.anos_amortizacion),
-                str(bien.ejercicio_alta),
-                bien.fecha_ingreso,
-                bien.fecha_baja or '',
-                Validators.format_decimal_argentino(bien.valor_origen),
-                Validators.format_decimal_argentino(amort_data.get('amort_inicio', 0)),
-                Validators.format_decimal_argentino(amort_data.get('amort_ejercicio', 0)),
-                Validators.format_decimal_argentino(amort_data.get('amort_acumulada', 0)),
-                Validators.format_decimal_argentino(amort_data.get('valor_residual', bien.valor_origen))
-            ]
-            
-            for col, value in enumerate(values):
-                item = QTableWidgetItem(value)
-                item.setTextAlignment(Qt.AlignCenter if col != 1 else Qt.AlignLeft | Qt.AlignVCenter)
-                self.table_widget.setItem(row, col, item)
+        def compute():
+            try:
+                # Text filtering is left to the proxy model
+                filas = calcular_filas_tabla(
+                    bienes, '', ejercicio_liquidacion,
+                    self.amort_calculator, self.filtro_ejercicio,
+                    vigente=lambda: generation == self._table_generation,
+                    cubo=self.cubo_amortizaciones
+                )
+            except RefrescoCancelado:
+                return
+            # Queued to the UI thread
+            self.table_computed.emit(generation, filas, bienes)
         
-        # Update status
-        self.set_status(f"Mostrando {len(bienes_mostrar)} de {len(self.bienes)} bienes")
+        threading.Thread(target=compute, daemon=True).start()
+    
+    def publish_table(self, generation, filas, bienes):
+        """Fill the table with the computed rows (UI thread)"""
+        # Indices the worker brought up to date on the copy are valid even for a stale request
+        self.bienes.tomar_indices(bienes)
+        if generation != self._table_generation:
+            return
+        
+        self._table_total = len(bienes)
+        self.table_model.set_rows(filas)
+        # Matches may include bienes added or edited since the last search
+        self.apply_filter()
+    
+    def update_table_status(self):
+        """Show how many bienes pass the filters"""
+        self.set_status(f"Mostrando {self.table_proxy.rowCount()} de {self._table_total} bienes")
     
     def show_context_menu(self, position):
         """Show context menu on right click"""
@@ -941,7 +1049,7 @@ class ModernBienesApp(QMainWindow):
         delete_action = menu.addAction("🗑 Eliminar")
         delete_action.triggered.connect(self.delete_selected)
         
-        menu.exec(self.table_widget.viewport().mapToGlobal(position))
+        menu.exec(self.table_view.viewport().mapToGlobal(position))
     
     def toggle_main_content(self, enabled):
         """Enable/disable main content"""
@@ -968,17 +1076,26 @@ class ModernBienesApp(QMainWindow):
             return
         
         try:
-            bienes_importados = self.csv_handler.import_from_file(file_path, self.tipos_bienes)
-            
-            for bien in bienes_importados:
-                bien.id = self.next_id
-                self.bienes[self.next_id] = bien
-                self.next_id += 1
+            # Por tramos parseados en paralelo: sólo el tramo en curso existe como objetos Bien
+            importados = 0
+            errores = 0
+            for lote in self.csv_handler.import_paralelo(file_path, self.tipos_bienes):
+                for bien in lote.bienes:
+                    bien.id = self.next_id
+                    self.bienes[self.next_id] = bien
+                    self.cambios.registrar_alta(self.next_id)
+                    self.next_id += 1
+                importados += len(lote.bienes)
+                errores += len(lote.errores)
             
             self.refresh_table()
-            if bienes_importados:
+            if importados:
                 self._dirty = True
-            self.show_info("Éxito", f"{len(bienes_importados)} bienes importados")
+            mensaje = f"{importados} bienes importados"
+            if errores:
+                mensaje += f" ({errores} filas con errores no se importaron)"
+            self.set_status(mensaje)
+            self.show_info("Éxito", mensaje)
             
         except Exception as e:
             self.show_error(f"Error importando CSV: {str(e)}")
@@ -1063,12 +1180,16 @@ class ModernBienesApp(QMainWindow):
             return False
         
         try:
-            save_company_state(
+            stats = save_company_state(
                 self.db_con, self.empresa, self.tipos_bienes,
-                self.bienes, self.gestor_indices
+                self.bienes, self.gestor_indices, self.cambios,
+                self.cubo_amortizaciones
             )
             self._dirty = False
-            self.set_status(f"Datos guardados en {self.db_path}")
+            self.set_status(
+                f"Datos guardados en {self.db_path} "
+                f"({stats['rows']} filas, {stats['rows_per_second']:,.0f} filas/s)"
+            )
             return True
         except Exception as e:
             self.show_error(f"Error al guardar: {str(e)}")
@@ -1108,7 +1229,7 @@ class ModernBienesApp(QMainWindow):
             return
         
         try:
-            empresa, tipos, bienes, gestor = load_by_cuit(self.db_con, cuit)
+            empresa, tipos, bienes, gestor = load_by_cuit(self.db_con, cuit, columnar=True)
             
             if not empresa:
                 reply = QMessageBox.question(
@@ -1126,8 +1247,10 @@ class ModernBienesApp(QMainWindow):
             self.empresa = empresa
             self.tipos_bienes = tipos
             self.bienes = bienes
+            self.cambios.marcar_guardado(empresa.cuit)
+            load_amortization_cube(self.db_con, cuit, self.bienes, self.cubo_amortizaciones)
             self.gestor_indices = gestor
-            self.inflacion_calculator = InflacionCalculator(self.gestor_indices)
+            self.inflacion_calculator = InflacionCalculator(self.gestor_indices, motor=MOTOR_NUMPY)
             self.next_id = (max(self.bienes.keys()) + 1) if self.bienes else 1
             
             # Update UI
@@ -1160,8 +1283,10 @@ class ModernBienesApp(QMainWindow):
         self.empresa.ejercicio_liquidacion = self.fecha_cierre_input.text().strip()
         self.empresa.configurada = True
         
-        self.bienes = {}
+        self.bienes = Cartera()
         self.next_id = 1
+        self.cambios.reiniciar()
+        self.cubo_amortizaciones.limpiar()
         self._dirty = True
         
         self.hydrate_empresa_panel()
@@ -1,9 +1,16 @@
-from datetime import datetime
+import threading
+
 from utils.validators import Validators
+from utils.arrays import np, redondear
+
+MOTOR_PYTHON = 'python'
+MOTOR_NUMPY = 'numpy'
+
 
 class AmortizacionCalculator:
-    def __init__(self):
-        pass
+    def __init__(self, motor=MOTOR_PYTHON):
+        # 'numpy' usa el motor vectorizado si NumPy está instalado
+        self.motor = motor
     
     def calcular_amortizacion(self, bien, ejercicio_liquidacion):
         """Calcula la amortización de un bien para un ejercicio específico"""
@@ -38,15 +45,10 @@ class AmortizacionCalculator:
         elif años_transcurridos_total > bien.anos_amortizacion:
             amort_ejercicio = 0.0
         else:
-            if bien.fecha_baja:
-                try:
-                    fecha_baja_obj = datetime.strptime(bien.fecha_baja, '%d/%m/%Y')
-                    if fecha_baja_obj.year < año_liquidacion:
-                        amort_ejercicio = 0.0
-                    else:
-                        amort_ejercicio = amort_anual
-                except ValueError:
-                    amort_ejercicio = amort_anual
+            # Una fecha de baja no válida se ignora
+            año_baja = bien.get_año_baja()
+            if año_baja is not None and año_baja < año_liquidacion:
+                amort_ejercicio = 0.0
             else:
                 amort_ejercicio = amort_anual
         
@@ -60,11 +62,88 @@ class AmortizacionCalculator:
             'amort_acumulada': round(amort_acumulada, 2),
             'valor_residual': round(valor_residual, 2)
         }
+
+    def calcular_amortizaciones_columnas(self, valor_origen, anos_amortizacion, ejercicio_alta,
+                                         año_baja, es_amortizable, año_liquidacion):
+        """
+        Calcula las amortizaciones de un lote completo en una pasada NumPy
+        
+        Args:
+            valor_origen: array de floats
+            anos_amortizacion, ejercicio_alta: arrays de enteros
+            año_baja: array de enteros (0 = sin fecha de baja)
+            es_amortizable: array de booleanos
+            año_liquidacion: int
+            
+        Returns:
+            dict de arrays con las mismas claves (y los mismos valores redondeados)
+            que _calcular_desde_origen. Las filas no amortizables devuelven el
+            valor de origen sin redondear como valor residual.
+        """
+        vo = np.asarray(valor_origen, dtype=np.float64)
+        anos = np.asarray(anos_amortizacion, dtype=np.int64)
+        alta = np.asarray(ejercicio_alta, dtype=np.int64)
+        baja = np.asarray(año_baja, dtype=np.int64)
+        amortizable = np.asarray(es_amortizable, dtype=bool) & (anos != 0)
+        
+        amort_anual = vo / np.where(amortizable, anos, 1)
+        años_hasta_inicio = año_liquidacion - alta
+        
+        amort_inicio = np.where(años_hasta_inicio <= 0, 0.0,
+                                amort_anual * np.minimum(años_hasta_inicio, anos))
+        
+        años_transcurridos_total = años_hasta_inicio + 1
+        sin_amort_ejercicio = ((años_transcurridos_total <= 0) |
+                               (años_transcurridos_total > anos) |
+                               ((baja > 0) & (baja < año_liquidacion)))
+        amort_ejercicio = np.where(sin_amort_ejercicio, 0.0, amort_anual)
+        
+        amort_acumulada = amort_inicio + amort_ejercicio
+        amort_acumulada = np.where(vo < amort_acumulada, vo, amort_acumulada)
+        valor_residual = vo - amort_acumulada
+        
+        return {
+            'amort_inicio': np.where(amortizable, redondear(amort_inicio), 0.0),
+            'amort_ejercicio': np.where(amortizable, redondear(amort_ejercicio), 0.0),
+            'amort_acumulada': np.where(amortizable, redondear(amort_acumulada), 0.0),
+            'valor_residual': np.where(amortizable, redondear(valor_residual), vo)
+        }
     
-    def calcular_amortizaciones_lote(self, bienes, ejercicio_liquidacion):
-        """Calcula amortizaciones para una lista de bienes"""
+    def calcular_amortizacion_completa(self, bien):
+        """
+        Resultado de un bien amortizable que ya completó su vida útil: no
+        depende del ejercicio ni de la fecha de baja (mismos redondeos que
+        _calcular_desde_origen)
+        """
+        amort_inicio = bien.valor_origen / bien.anos_amortizacion * bien.anos_amortizacion
+        amort_acumulada = min(amort_inicio, bien.valor_origen)
+        return {
+            'amort_inicio': round(amort_inicio, 2),
+            'amort_ejercicio': 0.0,
+            'amort_acumulada': round(amort_acumulada, 2),
+            'valor_residual': round(bien.valor_origen - amort_acumulada, 2)
+        }
+    
+    def calcular_amortizaciones_lote(self, bienes, ejercicio_liquidacion, amortizados=None):
+        """
+        Calcula amortizaciones para una lista de bienes
+        
+        amortizados: IDs totalmente amortizados al ejercicio (Cartera.ids_amortizados);
+        el cálculo por bien los resuelve con calcular_amortizacion_completa. El
+        motor NumPy no los separa: en el lote vectorizado no cuestan más que el resto.
+        """
+        amortizados = amortizados or ()
+        if self.motor == MOTOR_NUMPY and np is not None:
+            bienes = list(bienes)
+            resultados = self._calcular_lote_vectorizado(bienes, ejercicio_liquidacion)
+            if resultados is not None:
+                return resultados
+        
         resultados = {}
         for bien in bienes:
+            if bien.id in amortizados:
+                resultados[bien.id] = self.calcular_amortizacion_completa(bien)
+                continue
             try:
                 resultados[bien.id] = self.calcular_amortizacion(bien, ejercicio_liquidacion)
             except Exception as e:
@@ -76,3 +155,214 @@ class AmortizacionCalculator:
                     'error': str(e)
                 }
         return resultados
+
+    def _calcular_lote_vectorizado(self, bienes, ejercicio_liquidacion):
+        """Motor NumPy; devuelve None si el lote debe calcularse por bien"""
+        try:
+            año_liquidacion = Validators.extraer_año_ejercicio(ejercicio_liquidacion)
+        except TypeError:
+            año_liquidacion = None
+        if not año_liquidacion or not bienes:
+            # Los errores por ejercicio inválido se informan por bien
+            return None
+        
+        try:
+            columnas = self._columnas_desde_bienes(bienes)
+        except (TypeError, ValueError, OverflowError):
+            # Datos incompletos (None, textos): el cálculo por bien informa el error
+            return None
+        
+        calculo = self.calcular_amortizaciones_columnas(*columnas, año_liquidacion)
+        claves = list(calculo.keys())
+        filas = zip(*(calculo[clave].tolist() for clave in claves))
+        
+        resultados = {}
+        for bien, valores in zip(bienes, filas):
+            resultado = dict(zip(claves, valores))
+            if not bien.es_amortizable or bien.anos_amortizacion == 0:
+                resultado['valor_residual'] = bien.get_valor_base_calculo()
+            resultados[bien.id] = resultado
+        return resultados
+
+    def _columnas_desde_bienes(self, bienes):
+        """Arma las columnas de entrada del motor vectorizado"""
+        cantidad = len(bienes)
+        años_baja = [bien.get_año_baja() or 0 for bien in bienes]
+        
+        return (
+            np.fromiter((bien.valor_origen for bien in bienes), dtype=np.float64, count=cantidad),
+            np.fromiter((bien.anos_amortizacion for bien in bienes), dtype=np.int64, count=cantidad),
+            np.fromiter((bien.ejercicio_alta for bien in bienes), dtype=np.int64, count=cantidad),
+            np.array(años_baja, dtype=np.int64),
+            np.fromiter((bool(bien.es_amortizable) for bien in bienes), dtype=bool, count=cantidad),
+        )
+
+
+CLAVES_AMORTIZACION = ('amort_inicio', 'amort_ejercicio', 'amort_acumulada', 'valor_residual')
+
+
+class AmortizacionesCubo:
+    """Resultados {id: dict} de un ejercicio leídos de una columna del cubo.
+
+    Los bienes cuyos datos no entran en el cubo se calculan por bien al pedirlos.
+    """
+
+    def __init__(self, cartera, columnas, validas, calculator, ejercicio_liquidacion):
+        self.cartera = cartera
+        self.columnas = columnas
+        self.validas = validas
+        self.calculator = calculator
+        self.ejercicio_liquidacion = ejercicio_liquidacion
+        self._por_bien = {}
+
+    def get(self, bien_id, default=None):
+        fila = self.cartera.posicion(bien_id)
+        if fila is None:
+            return default
+        if self.validas[fila]:
+            return {clave: float(self.columnas[clave][fila]) for clave in CLAVES_AMORTIZACION}
+        if bien_id not in self._por_bien:
+            self._por_bien.update(self.calculator.calcular_amortizaciones_lote(
+                [self.cartera[bien_id]], self.ejercicio_liquidacion))
+        return self._por_bien[bien_id]
+
+
+class CuboAmortizaciones:
+    """
+    Amortizaciones precalculadas por fila de la cartera y ejercicio (fila x año)
+    
+    Cada año guarda las cuatro columnas de resultados (arrays float64) y el
+    sello de cada fila al calcularla (Cartera.sellos_amortizacion). Cambiar de
+    ejercicio lee la columna del año; sólo se recalculan, vectorizadas, las
+    filas cuyo sello cambió (bienes nuevos, editados o dados de baja). Requiere
+    NumPy; lo pueden usar varios hilos a la vez.
+    """
+    
+    def __init__(self, calculator):
+        self.calculator = calculator
+        # año -> (sellos, {clave: columna})
+        self._años = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def disponible():
+        return np is not None
+    
+    def limpiar(self):
+        with self._lock:
+            self._años.clear()
+    
+    def años(self):
+        with self._lock:
+            return sorted(self._años)
+    
+    def _al_dia(self, cartera, año):
+        """Sellos y columnas del año, recalculando las filas cambiadas (con el lock tomado)"""
+        sellos = np.array(cartera.sellos_amortizacion(), dtype=np.uint64)
+        cantidad = len(sellos)
+        guardado = self._años.get(año)
+        if guardado is None or len(guardado[0]) > cantidad:
+            # Sin calcular (o de otra cartera más larga): todo de cero
+            sellos_año = np.zeros(cantidad, dtype=np.uint64)
+            columnas = {clave: np.zeros(cantidad) for clave in CLAVES_AMORTIZACION}
+        else:
+            sellos_año, columnas = guardado
+            faltan = cantidad - len(sellos_año)
+            if faltan:
+                sellos_año = np.concatenate([sellos_año, np.zeros(faltan, dtype=np.uint64)])
+                columnas = {clave: np.concatenate([columna, np.zeros(faltan)])
+                            for clave, columna in columnas.items()}
+        
+        # Sello 0 (nunca asignado): fila sin calcular o no calculable en el cubo
+        filas = np.flatnonzero(sellos_año != sellos)
+        if len(filas):
+            entrada = self._entrada(cartera)
+            calculo = self.calculator.calcular_amortizaciones_columnas(
+                *(entrada[nombre][filas] for nombre in (
+                    'valor_origen', 'anos_amortizacion', 'ejercicio_alta', 'año_baja', 'es_amortizable')),
+                año)
+            for clave in CLAVES_AMORTIZACION:
+                columnas[clave][filas] = calculo[clave]
+            sellos_año[filas] = np.where(entrada['validas'][filas], sellos[filas], 0)
+        
+        self._años[año] = (sellos_año, columnas)
+        return sellos, sellos_año, columnas
+    
+    @staticmethod
+    def _entrada(cartera):
+        columnas = cartera.columnas_amortizacion()
+        # Copias: una vista sobre los arrays de la cartera impediría que crezcan
+        return {
+            'valor_origen': np.array(columnas['valor_origen'], dtype=np.float64),
+            'anos_amortizacion': np.array(columnas['anos_amortizacion'], dtype=np.int64),
+            'ejercicio_alta': np.array(columnas['ejercicio_alta'], dtype=np.int64),
+            'año_baja': np.array(columnas['año_baja'], dtype=np.int64),
+            'es_amortizable': np.frombuffer(bytes(columnas['es_amortizable']), dtype=np.uint8).astype(bool),
+            'validas': np.frombuffer(bytes(columnas['validas']), dtype=np.uint8).astype(bool),
+        }
+    
+    def precalcular(self, cartera, años):
+        """Calcula (o pone al día) las columnas de varios ejercicios"""
+        with self._lock:
+            for año in años:
+                self._al_dia(cartera, año)
+    
+    def amortizaciones(self, cartera, ejercicio_liquidacion):
+        """
+        Resultados del ejercicio para toda la cartera, como AmortizacionesCubo.
+        Devuelve None si el ejercicio no es válido.
+        """
+        año_liquidacion = Validators.extraer_año_ejercicio(ejercicio_liquidacion)
+        if not año_liquidacion:
+            return None
+        with self._lock:
+            sellos, sellos_año, columnas = self._al_dia(cartera, año_liquidacion)
+            # Copias: otro hilo puede actualizar el año mientras se muestran
+            columnas = {clave: columna.copy() for clave, columna in columnas.items()}
+            validas = sellos_año == sellos
+        return AmortizacionesCubo(cartera, columnas, validas, self.calculator, ejercicio_liquidacion)
+    
+    def filas_vigentes(self, cartera):
+        """
+        Por año, (IDs, columnas) de los bienes vigentes con resultado al día;
+        para persistir el cubo
+        
+        Un año calculado antes de que la cartera creciera conserva sus filas:
+        las agregadas después cuentan como sin calcular (sello 0), como en _al_dia.
+        """
+        sellos = np.array(cartera.sellos_amortizacion(), dtype=np.uint64)
+        ids_por_fila = {cartera.posicion(bien_id): bien_id for bien_id in cartera}
+        resultado = {}
+        with self._lock:
+            for año, (sellos_año, columnas) in self._años.items():
+                if len(sellos_año) > len(sellos):
+                    # De otra cartera más larga: no se sabe a qué bienes corresponde
+                    continue
+                # Sólo las filas que ya tenía el año pueden estar al día
+                al_dia = sellos_año == sellos[:len(sellos_año)]
+                filas = [fila for fila in np.flatnonzero(al_dia).tolist() if fila in ids_por_fila]
+                resultado[año] = (
+                    [ids_por_fila[fila] for fila in filas],
+                    {clave: columna[filas] for clave, columna in columnas.items()},
+                )
+        return resultado
+    
+    def cargar(self, cartera, año, ids, columnas):
+        """Incorpora resultados persistidos de un año para los bienes dados (al día con la cartera)"""
+        sellos = np.array(cartera.sellos_amortizacion(), dtype=np.uint64)
+        cantidad = len(sellos)
+        posiciones = [cartera.posicion(bien_id) for bien_id in ids]
+        pares = [(i, fila) for i, fila in enumerate(posiciones) if fila is not None]
+        origen = np.array([i for i, _ in pares], dtype=np.int64)
+        filas = np.array([fila for _, fila in pares], dtype=np.int64)
+        
+        sellos_año = np.zeros(cantidad, dtype=np.uint64)
+        sellos_año[filas] = sellos[filas]
+        columnas_año = {}
+        for clave in CLAVES_AMORTIZACION:
+            columna = np.zeros(cantidad)
+            columna[filas] = np.asarray(columnas[clave], dtype=np.float64)[origen]
+            columnas_año[clave] = columna
+        with self._lock:
+            self._años[año] = (sellos_año, columnas_año)
+
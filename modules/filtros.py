@@ -4,11 +4,23 @@ class FiltroEjercicio:
     def __init__(self):
         pass
     
+    @staticmethod
+    def año_liquidacion(ejercicio_liquidacion):
+        """Año del cierre DD/MM/AAAA, o None si no hay un ejercicio válido (sin filtro)"""
+        if not ejercicio_liquidacion:
+            return None
+        partes = Validators.parsear_fecha(ejercicio_liquidacion)
+        return partes[0] if partes else None
+    
+    def ids_por_ejercicio(self, cartera, ejercicio_liquidacion):
+        """IDs de la cartera dados de alta hasta el ejercicio, o None si no hay filtro"""
+        año_liquidacion = self.año_liquidacion(ejercicio_liquidacion)
+        if not año_liquidacion:
+            return None
+        return cartera.ids_hasta_ejercicio(año_liquidacion)
+    
     def filtrar_bienes_por_ejercicio(self, bienes, ejercicio_liquidacion):
-        if not ejercicio_liquidacion or not Validators.validar_fecha(ejercicio_liquidacion):
-            return list(bienes)
-        
-        año_liquidacion = Validators.extraer_año_ejercicio(ejercicio_liquidacion)
+        año_liquidacion = self.año_liquidacion(ejercicio_liquidacion)
         if not año_liquidacion:
             return list(bienes)
         
@@ -1,9 +1,16 @@
-from datetime import datetime
 from utils.validators import Validators
+from utils.arrays import np, redondear
+from modules.amortizaciones import MOTOR_PYTHON, MOTOR_NUMPY
+from models.indice_facpce import mes_clave
+
+LINK_FACPCE = 'https://www.facpce.org.ar/indices-facpce/'
+
 
 class InflacionCalculator:
-    def __init__(self, gestor_indices):
+    def __init__(self, gestor_indices, motor=MOTOR_PYTHON):
         self.gestor_indices = gestor_indices
+        # 'numpy' usa el kernel vectorizado si NumPy está instalado
+        self.motor = motor
     
     def calcular_ajuste_inflacion(self, bien, ejercicio_actual, ejercicio_anterior, amortizacion_data):
         """
@@ -39,7 +46,7 @@ class InflacionCalculator:
                 'error': True,
                 'mensaje': "; ".join(errores),
                 'fechas_faltantes': self._extraer_fechas_de_errores(errores),
-                'link_facpce': 'https://www.facpce.org.ar/indices-facpce/'
+                'link_facpce': LINK_FACPCE
             }
         
         # Verificar si el bien se adquirió en el ejercicio actual
@@ -71,12 +78,11 @@ class InflacionCalculator:
     
     def _bien_adquirido_en_ejercicio(self, fecha_origen, ejercicio_anterior):
         """Verifica si el bien se adquirió en el ejercicio actual"""
-        try:
-            fecha_origen_obj = datetime.strptime(fecha_origen, '%d/%m/%Y')
-            ejercicio_anterior_obj = datetime.strptime(ejercicio_anterior, '%d/%m/%Y')
-            return fecha_origen_obj > ejercicio_anterior_obj
-        except ValueError:
+        partes_origen = Validators.parsear_fecha(fecha_origen)
+        partes_anterior = Validators.parsear_fecha(ejercicio_anterior)
+        if not partes_origen or not partes_anterior:
             return False
+        return partes_origen[3] > partes_anterior[3]
     
     def _calcular_valores_ajustados(self, bien, coef_actual, coef_anterior, amortizacion_data, bien_nuevo):
         """Calcula todos los valores ajustados por inflación"""
@@ -161,8 +167,148 @@ class InflacionCalculator:
                 fechas.append(fecha)
         return fechas
     
+    def calcular_inflacion_columnas(self, valor_origen, amort_inicio, amort_ejercicio,
+                                    coef_actual, coef_anterior, bien_nuevo):
+        """
+        Kernel vectorizado equivalente a _calcular_valores_ajustados
+        
+        Args:
+            valor_origen, amort_inicio, amort_ejercicio: arrays de floats (históricos)
+            coef_actual, coef_anterior: arrays de coeficientes por fila
+            bien_nuevo: array de booleanos (adquirido en el ejercicio actual)
+            
+        Returns:
+            dict con los 12 campos de _calcular_valores_ajustados como arrays
+            (sin la clave 'error'), redondeados igual que la versión por bien
+        """
+        vo = np.asarray(valor_origen, dtype=np.float64)
+        amort_inicio = np.asarray(amort_inicio, dtype=np.float64)
+        amort_ejercicio = np.asarray(amort_ejercicio, dtype=np.float64)
+        coef_actual = np.asarray(coef_actual, dtype=np.float64)
+        coef_anterior = np.asarray(coef_anterior, dtype=np.float64)
+        bien_nuevo = np.asarray(bien_nuevo, dtype=bool)
+        
+        # Los min()/max() se expresan con where() para conservar el mismo
+        # operando que elige Python en los empates
+        vo_ajustado_anterior = np.where(bien_nuevo, 0.0, vo * coef_anterior)
+        vo_ajustado_actual = vo * coef_actual
+        ajuste_infl_vo_ejercicio = vo_ajustado_actual - vo_ajustado_anterior
+        
+        amort_acum_inicio_ajustada_anterior = np.where(bien_nuevo, 0.0, amort_inicio * coef_anterior)
+        amort_acum_inicio_ajustada_actual = amort_inicio * coef_actual
+        
+        amort_acum_inicio_ajustada_anterior = _minimo(amort_acum_inicio_ajustada_anterior, vo_ajustado_anterior)
+        amort_acum_inicio_ajustada_actual = _minimo(amort_acum_inicio_ajustada_actual, vo_ajustado_actual)
+        
+        ajuste_infl_amort_inicio_ejercicio = (amort_acum_inicio_ajustada_actual -
+                                              amort_acum_inicio_ajustada_anterior)
+        
+        valor_residual_disponible = vo_ajustado_actual - amort_acum_inicio_ajustada_actual
+        amort_ejercicio_ajustada = np.where(
+            amort_acum_inicio_ajustada_actual >= vo_ajustado_actual,
+            0.0,
+            _minimo(amort_ejercicio * coef_actual, valor_residual_disponible)
+        )
+        
+        amort_acum_cierre_ajustada = _minimo(amort_acum_inicio_ajustada_actual + amort_ejercicio_ajustada,
+                                             vo_ajustado_actual)
+        
+        valor_residual_ajustado = vo_ajustado_actual - amort_acum_cierre_ajustada
+        valor_residual_ajustado = np.where(valor_residual_ajustado > 0.0, valor_residual_ajustado, 0.0)
+        
+        return {
+            'valor_origen_historico': redondear(vo),
+            'vo_ajustado_anterior': redondear(vo_ajustado_anterior),
+            'vo_ajustado_actual': redondear(vo_ajustado_actual),
+            'ajuste_infl_vo_ejercicio': redondear(ajuste_infl_vo_ejercicio),
+            'amort_acum_inicio_ajustada_anterior': redondear(amort_acum_inicio_ajustada_anterior),
+            'amort_acum_inicio_ajustada_actual': redondear(amort_acum_inicio_ajustada_actual),
+            'ajuste_infl_amort_inicio_ejercicio': redondear(ajuste_infl_amort_inicio_ejercicio),
+            'amort_ejercicio_ajustada': redondear(amort_ejercicio_ajustada),
+            'amort_acum_cierre_ajustada': redondear(amort_acum_cierre_ajustada),
+            'valor_residual_ajustado': redondear(valor_residual_ajustado),
+            'coef_actual': redondear(coef_actual, 6),
+            'coef_anterior': redondear(coef_anterior, 6)
+        }
+    
+    def resolver_coeficientes(self, fechas_origen, ejercicio_actual, ejercicio_anterior):
+        """
+        Resuelve los coeficientes de un lote de fechas de origen (DD/MM/AAAA)
+        
+        Returns:
+            dict con arrays 'coef_actual' y 'coef_anterior' (NaN donde no hay
+            coeficiente), 'bien_nuevo', las máscaras 'falta_origen' y
+            'origen_cero', los flags escalares 'falta_actual' / 'falta_anterior'
+            y la máscara combinada 'sin_indice' de filas que no pueden ajustarse
+        """
+        ordinal_anterior = _ordinal_fecha(ejercicio_anterior)
+        
+        # Agrupar filas por fecha de origen: cada fecha distinta se parsea una vez
+        fechas_distintas = {}
+        codigos = np.empty(len(fechas_origen), dtype=np.int64)
+        for i, fecha_origen in enumerate(fechas_origen):
+            codigo = fechas_distintas.get(fecha_origen)
+            if codigo is None:
+                codigo = fechas_distintas[fecha_origen] = len(fechas_distintas)
+            codigos[i] = codigo
+        
+        meses_por_fecha = np.full(len(fechas_distintas), -1, dtype=np.int64)
+        nuevo_por_fecha = np.zeros(len(fechas_distintas), dtype=bool)
+        for fecha_origen, codigo in fechas_distintas.items():
+            partes = Validators.parsear_fecha(fecha_origen)
+            if partes is None:
+                continue
+            año, mes, _, ordinal = partes
+            meses_por_fecha[codigo] = año * 12 + mes - 1
+            if ordinal_anterior is not None:
+                nuevo_por_fecha[codigo] = ordinal > ordinal_anterior
+        
+        # Cada mes distinto resuelve su par de coeficientes una sola vez
+        meses, mes_por_fecha = np.unique(meses_por_fecha, return_inverse=True)
+        valores_mes, validos_mes = self.gestor_indices.get_valores_meses(meses)
+        falta_mes = ~validos_mes
+        cero_mes = validos_mes & (valores_mes == 0)
+        divisor = np.where(falta_mes | cero_mes, np.nan, valores_mes)
+        
+        valor_actual = self._valor_indice(ejercicio_actual)
+        valor_anterior = self._valor_indice(ejercicio_anterior)
+        falta_actual = valor_actual is None
+        falta_anterior = valor_anterior is None
+        coef_actual_mes = np.full(len(meses), np.nan) if falta_actual else valor_actual / divisor
+        coef_anterior_mes = np.full(len(meses), np.nan) if falta_anterior else valor_anterior / divisor
+        
+        # Difundir los resultados por mes a las filas
+        fila_a_mes = mes_por_fecha.reshape(-1)[codigos]
+        coef_actual = coef_actual_mes[fila_a_mes]
+        coef_anterior = coef_anterior_mes[fila_a_mes]
+        falta_origen = falta_mes[fila_a_mes]
+        origen_cero = cero_mes[fila_a_mes]
+        bien_nuevo = nuevo_por_fecha[codigos]
+        
+        sin_indice = falta_origen | origen_cero
+        if falta_actual or falta_anterior:
+            sin_indice = np.ones(len(fechas_origen), dtype=bool)
+        
+        return {
+            'coef_actual': coef_actual,
+            'coef_anterior': coef_anterior,
+            'bien_nuevo': bien_nuevo,
+            'falta_origen': falta_origen,
+            'origen_cero': origen_cero,
+            'falta_actual': falta_actual,
+            'falta_anterior': falta_anterior,
+            'sin_indice': sin_indice
+        }
+    
     def calcular_inflacion_lote(self, bienes, ejercicio_actual, ejercicio_anterior, amortizaciones_data):
         """Calcula inflación para una lista de bienes"""
+        if self.motor == MOTOR_NUMPY and np is not None:
+            bienes = list(bienes)
+            resultados = self._calcular_lote_vectorizado(
+                bienes, ejercicio_actual, ejercicio_anterior, amortizaciones_data)
+            if resultados is not None:
+                return resultados
+        
         resultados = {}
         
         for bien in bienes:
@@ -171,4 +317,90 @@ class InflacionCalculator:
                 bien, ejercicio_actual, ejercicio_anterior, amort_data
             )
         
-        return resultados
\ No newline at end of file
+        return resultados
+    
+    def _calcular_lote_vectorizado(self, bienes, ejercicio_actual, ejercicio_anterior, amortizaciones_data):
+        """Motor NumPy; devuelve None si el lote debe calcularse por bien"""
+        amortizables = [bien for bien in bienes if bien.es_amortizable]
+        cantidad = len(amortizables)
+        
+        try:
+            coeficientes = self.resolver_coeficientes(
+                [bien.get_fecha_origen_bien() for bien in amortizables],
+                ejercicio_actual, ejercicio_anterior)
+            amort_datos = [amortizaciones_data.get(bien.id, {}) for bien in amortizables]
+            calculo = self.calcular_inflacion_columnas(
+                np.fromiter((bien.valor_origen for bien in amortizables), dtype=np.float64, count=cantidad),
+                np.fromiter((datos.get('amort_inicio', 0.0) for datos in amort_datos),
+                            dtype=np.float64, count=cantidad),
+                np.fromiter((datos.get('amort_ejercicio', 0.0) for datos in amort_datos),
+                            dtype=np.float64, count=cantidad),
+                coeficientes['coef_actual'],
+                coeficientes['coef_anterior'],
+                coeficientes['bien_nuevo']
+            )
+        except (TypeError, ValueError):
+            # Fechas o importes no válidos: el cálculo por bien informa el error
+            return None
+        
+        claves = list(calculo.keys())
+        filas = zip(*(calculo[clave].tolist() for clave in claves))
+        sin_indice = coeficientes['sin_indice'].tolist()
+        
+        resultados = {}
+        por_amortizable = {}
+        for fila, (bien, valores, error) in enumerate(zip(amortizables, filas, sin_indice)):
+            if error:
+                por_amortizable[id(bien)] = self._crear_resultado_sin_indice(
+                    bien, ejercicio_actual, ejercicio_anterior, coeficientes, fila)
+            else:
+                resultado = {'error': False}
+                resultado.update(zip(claves, valores))
+                por_amortizable[id(bien)] = resultado
+        
+        for bien in bienes:
+            if bien.es_amortizable:
+                resultados[bien.id] = por_amortizable[id(bien)]
+            else:
+                resultados[bien.id] = self._crear_resultado_no_amortizable(bien)
+        
+        return resultados
+    
+    def _valor_indice(self, fecha_str):
+        """Valor del índice del mes de una fecha, o None si falta"""
+        mes = mes_clave(fecha_str)
+        return self.gestor_indices.get_valor_mes(mes) if mes is not None else None
+    
+    def _crear_resultado_sin_indice(self, bien, ejercicio_actual, ejercicio_anterior, coeficientes, fila):
+        """Arma el resultado de error a partir de las máscaras de índices faltantes"""
+        fecha_origen = bien.get_fecha_origen_bien()
+        falta_origen = bool(coeficientes['falta_origen'][fila])
+        origen_cero = bool(coeficientes['origen_cero'][fila])
+        
+        errores = []
+        fechas_faltantes = []
+        for destino, falta_destino in ((ejercicio_actual, coeficientes['falta_actual']),
+                                       (ejercicio_anterior, coeficientes['falta_anterior'])):
+            if falta_origen or falta_destino:
+                fecha = fecha_origen if falta_origen else destino
+                errores.append(f"Falta índice para {fecha}")
+                fechas_faltantes.append(fecha)
+            elif origen_cero:
+                errores.append(f"Índice origen es cero para {fecha_origen}")
+        
+        return {
+            'error': True,
+            'mensaje': "; ".join(errores),
+            'fechas_faltantes': fechas_faltantes,
+            'link_facpce': LINK_FACPCE
+        }
+
+
+def _minimo(a, b):
+    """min(a, b) elemento a elemento, con el mismo desempate que Python"""
+    return np.where(b < a, b, a)
+
+
+def _ordinal_fecha(fecha_str):
+    partes = Validators.parsear_fecha(fecha_str)
+    return partes[3] if partes else None
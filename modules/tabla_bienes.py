@@ -0,0 +1,141 @@
+from utils.validators import Validators
+
+# Milisegundos sin teclear antes de recalcular la tabla
+DEMORA_FILTRO_MS = 250
+
+# Cada cuántas filas formateadas se revisa si el pedido sigue vigente
+_FILAS_POR_CONTROL = 1000
+
+
+class RefrescoCancelado(Exception):
+    """Un pedido de refresco más nuevo reemplazó al que se estaba calculando"""
+
+
+def filtrar_bienes(bienes, filtro_texto, ejercicio_liquidacion, filtro_ejercicio,
+                   coincidencias=None):
+    """
+    Aplica el filtro de texto (descripción / tipo) y el de ejercicio
+
+    bienes es la cartera {id: bien}. coincidencias son los IDs que ya pasaron
+    el filtro de texto (Cartera.buscar_texto); si se dan, no se recorre la cartera.
+    Ambos filtros dan conjuntos de IDs que se intersecan antes de leer los bienes.
+    """
+    filtro_texto = filtro_texto.strip().lower()
+    if coincidencias is None and filtro_texto:
+        coincidencias = {b.id for b in bienes.values()
+                         if filtro_texto in b.descripcion.lower() or
+                            filtro_texto in b.tipo_bien.lower()}
+
+    ids = filtro_ejercicio.ids_por_ejercicio(bienes, ejercicio_liquidacion)
+    if coincidencias is not None:
+        ids = coincidencias if ids is None else ids & coincidencias
+
+    if ids is None:
+        return list(bienes.values())
+    return [bienes[bien_id] for bien_id in ids if bien_id in bienes]
+
+
+def formatear_fila(bien, amort_data):
+    """Valores de las 13 columnas de la tabla principal para un bien"""
+    return (
+        str(bien.id),
+        bien.descripcion,
+        bien.tipo_bien,
+        'SI' if bien.es_amortizable else 'NO',
+        str(bien.anos_amortizacion),
+        str(bien.ejercicio_alta),
+        bien.fecha_ingreso,
+        bien.fecha_baja or '',
+        Validators.format_decimal_argentino(bien.valor_origen),
+        Validators.format_decimal_argentino(amort_data.get('amort_inicio', 0)),
+        Validators.format_decimal_argentino(amort_data.get('amort_ejercicio', 0)),
+        Validators.format_decimal_argentino(amort_data.get('amort_acumulada', 0)),
+        Validators.format_decimal_argentino(amort_data.get('valor_residual', bien.valor_origen))
+    )
+
+
+def formatear_filas(bienes, amortizaciones):
+    """Como formatear_fila para varios bienes, con los importes formateados por columna"""
+    datos = [amortizaciones.get(bien.id, {}) for bien in bienes]
+    importes = [
+        Validators.format_decimales_argentinos([bien.valor_origen for bien in bienes]),
+        Validators.format_decimales_argentinos([d.get('amort_inicio', 0) for d in datos]),
+        Validators.format_decimales_argentinos([d.get('amort_ejercicio', 0) for d in datos]),
+        Validators.format_decimales_argentinos([d.get('amort_acumulada', 0) for d in datos]),
+        Validators.format_decimales_argentinos([d.get('valor_residual', bien.valor_origen)
+                                                for bien, d in zip(bienes, datos)])
+    ]
+    return [
+        (str(bien.id), bien.descripcion, bien.tipo_bien, 'SI' if bien.es_amortizable else 'NO',
+         str(bien.anos_amortizacion), str(bien.ejercicio_alta), bien.fecha_ingreso,
+         bien.fecha_baja or '') + textos
+        for bien, textos in zip(bienes, zip(*importes))
+    ]
+
+
+class FilasTabla:
+    """Filas de la tabla principal en orden de ID; cada fila se formatea al pedirla"""
+
+    def __init__(self, bienes, amortizaciones):
+        self.bienes = bienes
+        self.amortizaciones = amortizaciones
+        self._formateadas = None
+
+    def __len__(self):
+        return len(self.bienes)
+
+    def __getitem__(self, indice):
+        if self._formateadas is not None:
+            return self._formateadas[indice]
+        bien = self.bienes[indice]
+        return formatear_fila(bien, self.amortizaciones.get(bien.id, {}))
+
+    def formatear_todas(self, controlar):
+        """Formatea todas las filas de antemano, por tramos (controlar() antes de cada uno)"""
+        formateadas = []
+        for inicio in range(0, len(self.bienes), _FILAS_POR_CONTROL):
+            controlar()
+            formateadas.extend(formatear_filas(self.bienes[inicio:inicio + _FILAS_POR_CONTROL],
+                                               self.amortizaciones))
+        self._formateadas = formateadas
+
+
+def calcular_filas_tabla(bienes, filtro_texto, ejercicio_liquidacion,
+                         amort_calculator, filtro_ejercicio, vigente=lambda: True,
+                         formatear=True, coincidencias=None, cubo=None):
+    """
+    Filtra y amortiza las filas de la tabla principal (ordenadas por ID)
+
+    Pensado para correr fuera del hilo de la interfaz sobre una copia de la
+    cartera (coincidencias: ver filtrar_bienes). Con un CuboAmortizaciones las
+    amortizaciones se leen de la columna del ejercicio. vigente() se consulta
+    entre etapas y cada tantas filas; si devuelve False se lanza
+    RefrescoCancelado. Con formatear=False los textos se arman recién cuando
+    se pide cada fila (tablas virtuales).
+
+    Returns:
+        FilasTabla con tuplas de 13 textos por fila
+    """
+    def controlar():
+        if not vigente():
+            raise RefrescoCancelado()
+
+    bienes_mostrar = filtrar_bienes(bienes, filtro_texto, ejercicio_liquidacion, filtro_ejercicio,
+                                    coincidencias)
+    controlar()
+
+    año_liquidacion = filtro_ejercicio.año_liquidacion(ejercicio_liquidacion)
+    if año_liquidacion and cubo is not None and cubo.disponible():
+        amortizaciones = cubo.amortizaciones(bienes, ejercicio_liquidacion)
+    elif año_liquidacion:
+        # Los bienes que ya completaron su vida útil no se recalculan
+        amortizaciones = amort_calculator.calcular_amortizaciones_lote(
+            bienes_mostrar, ejercicio_liquidacion, bienes.ids_amortizados(año_liquidacion))
+    else:
+        amortizaciones = {}
+    controlar()
+
+    filas = FilasTabla(sorted(bienes_mostrar, key=lambda x: x.id), amortizaciones)
+    if formatear:
+        filas.formatear_todas(controlar)
+    return filas
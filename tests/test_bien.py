@@ -0,0 +1,32 @@
+import copy
+import pickle
+
+import pytest
+
+from models.bien import Bien
+
+
+def _copias(bien):
+    return [pickle.loads(pickle.dumps(bien)), copy.deepcopy(bien), copy.copy(bien)]
+
+
+@pytest.mark.parametrize('parsear_antes', [False, True])
+def test_copias_conservan_fechas(parsear_antes):
+    bien = Bien(id=7, descripcion='Rodado', fecha_ingreso='15/03/2020', fecha_baja='01/02/2025')
+    if parsear_antes:
+        bien.get_partes_ingreso()
+        bien.get_año_baja()
+    
+    for copia in _copias(bien):
+        assert copia.id == 7 and copia.descripcion == 'Rodado'
+        assert copia.get_partes_ingreso() == bien.get_partes_ingreso()
+        assert copia.get_año_baja() == 2025
+
+
+def test_copias_sin_baja_ni_fecha_valida():
+    bien = Bien(fecha_ingreso='no es fecha', fecha_baja=None)
+    for copia in _copias(bien):
+        assert copia.get_partes_ingreso() is None
+        assert copia.get_año_baja() is None
+        copia.fecha_baja = '31/12/2023'
+        assert copia.get_año_baja() == 2023
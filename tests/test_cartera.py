@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from models.bien import Bien
+from models.cartera import Cartera
+
+
+def _bien(bien_id, rnd):
+    return Bien(id=bien_id, descripcion=f'Bien {bien_id}', tipo_bien='Rodados',
+                es_amortizable=rnd.random() < 0.9, anos_amortizacion=rnd.randint(1, 10),
+                ejercicio_alta=rnd.randint(1995, 2025), fecha_ingreso='01/01/2020',
+                fecha_baja=f'30/06/{rnd.randint(2000, 2025)}' if rnd.random() < 0.05 else None,
+                valor_origen=rnd.choice([0.0, 1000.0, 2500.5]))
+
+
+def _claves_de_cero(indice, filas):
+    return sorted(clave for clave in map(indice._clave, range(filas)) if clave is not None)
+
+
+@pytest.mark.parametrize('semilla', range(5))
+def test_indices_ordenados_al_dia_tras_cambios_sueltos(semilla):
+    rnd = random.Random(semilla)
+    cartera = Cartera()
+    for bien_id in range(1, 2001):
+        cartera[bien_id] = _bien(bien_id, rnd)
+    cartera.copy()  # arma los índices
+    
+    for _ in range(20):
+        # Pocos cambios por ronda: se intercalan sin ordenar todo de nuevo
+        for _ in range(rnd.randint(1, 60)):
+            accion = rnd.random()
+            ids = list(cartera)
+            if accion < 0.4:
+                bien_id = max(ids) + 1
+                cartera[bien_id] = _bien(bien_id, rnd)
+            elif accion < 0.6:
+                del cartera[rnd.choice(ids)]
+            elif accion < 0.8:
+                cartera[rnd.choice(ids)].fecha_baja = rnd.choice([None, '31/12/2019', 'no es fecha'])
+            else:
+                bien = cartera[rnd.choice(ids)]
+                bien.ejercicio_alta = rnd.randint(1995, 2025)
+                bien.anos_amortizacion = rnd.randint(0, 10)
+        
+        copia = cartera.copy()
+        filas = len(cartera._ids)
+        for nombre, indice in cartera._ordenados.items():
+            esperadas = _claves_de_cero(indice, filas)
+            assert list(indice.claves_al_dia(filas)) == esperadas, nombre
+            assert list(copia._ordenados[nombre].claves_al_dia(filas)) == esperadas, nombre
+
+
+def _cartera(cantidad, semilla=0):
+    rnd = random.Random(semilla)
+    cartera = Cartera()
+    for bien_id in range(1, cantidad + 1):
+        cartera[bien_id] = _bien(bien_id, rnd)
+    return cartera
+
+
+def test_copia_no_pone_al_dia_los_indices_y_los_devuelve():
+    cartera = _cartera(500)
+    copia = cartera.copy()
+    assert all(indice.claves is None for indice in cartera._ordenados.values())
+    
+    filas = len(copia._ids)
+    for indice in copia._ordenados.values():
+        indice.claves_al_dia(filas)
+    cartera.tomar_indices(copia)
+    for nombre, indice in cartera._ordenados.items():
+        assert indice.claves is copia._ordenados[nombre].claves
+        assert list(indice.claves) == _claves_de_cero(indice, filas)
+
+
+def test_no_toma_indices_de_una_copia_vieja():
+    cartera = _cartera(500)
+    copia = cartera.copy()
+    for indice in copia._ordenados.values():
+        indice.claves_al_dia(len(copia._ids))
+    
+    cartera[1].ejercicio_alta = 1990
+    cartera[501] = _bien(501, random.Random(1))
+    cartera.tomar_indices(copia)
+    assert all(indice.claves is None for indice in cartera._ordenados.values())
+    
+    # Con los índices armados, los cambios posteriores a la copia quedan pendientes
+    filas = len(cartera._ids)
+    for indice in cartera._ordenados.values():
+        indice.claves_al_dia(filas)
+    copia = cartera.copy()
+    cartera[2].ejercicio_alta = 1991
+    for indice in copia._ordenados.values():
+        indice.claves_al_dia(filas)
+    cartera.tomar_indices(copia)
+    for indice in cartera._ordenados.values():
+        assert list(indice.claves_al_dia(filas)) == _claves_de_cero(indice, filas)
@@ -0,0 +1,56 @@
+import pytest
+
+from utils.csv_handler import CsvHandler
+
+TIPOS_BIENES = ['Muebles y Útiles', 'Rodados']
+ENCABEZADO = 'ID;Descripción;Tipo;Amortizable;Años;Ejercicio alta;Fecha ingreso;Fecha baja;Valor origen'
+
+
+def _filas(cantidad):
+    """Filas sin ID (toma el número de fila) con un tipo inválido cada 50"""
+    for i in range(cantidad):
+        tipo = 'Inexistente' if i % 50 == 0 else TIPOS_BIENES[i % 2]
+        yield f';Bien {i};{tipo};SI;5;2020;01/03/2020;;{i + 1}.234,56'
+
+
+@pytest.fixture(params=['\r', '\r\n', 'mezcla'])
+def csv_saltos(request, tmp_path):
+    """CSV de 625 filas con saltos \\r sueltos, \\r\\n o una mezcla con \\n"""
+    lineas = [ENCABEZADO, *_filas(624)]
+    if request.param == 'mezcla':
+        texto = ''.join(linea + ('\r', '\n', '\r\n')[i % 3] for i, linea in enumerate(lineas))
+    else:
+        texto = request.param.join(lineas) + request.param
+    path = tmp_path / 'bienes.csv'
+    path.write_bytes(texto.encode('utf-8'))
+    return path
+
+
+def _ids(bienes):
+    return [bien.id for bien in bienes]
+
+
+def test_import_por_lotes_coincide_con_import_from_file(csv_saltos):
+    handler = CsvHandler()
+    esperados = handler.import_from_file(str(csv_saltos), TIPOS_BIENES)
+    
+    lotes = list(handler.import_por_lotes(str(csv_saltos), TIPOS_BIENES, tamaño_lote=100))
+    bienes = [bien for lote in lotes for bien in lote.bienes]
+    errores = [error for lote in lotes for error in lote.errores]
+    
+    assert len(bienes) + len(errores) == 625
+    assert _ids(bienes) == _ids(esperados)
+    assert errores[0].startswith('Fila 1:')
+
+
+def test_import_paralelo_coincide_con_import_from_file(csv_saltos):
+    handler = CsvHandler()
+    esperados = handler.import_from_file(str(csv_saltos), TIPOS_BIENES)
+    
+    lotes = list(handler.import_paralelo(str(csv_saltos), TIPOS_BIENES, procesos=2,
+                                         bytes_tramo=2048))
+    bienes = [bien for lote in lotes for bien in lote.bienes]
+    
+    assert sum(len(lote.bienes) + len(lote.errores) for lote in lotes) == 625
+    assert _ids(bienes) == _ids(esperados)
+    assert [bien.valor_origen for bien in bienes] == [bien.valor_origen for bien in esperados]
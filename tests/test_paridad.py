@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from models.bien import Bien
+from modules.amortizaciones import AmortizacionCalculator, MOTOR_NUMPY, MOTOR_PYTHON
+from utils.arrays import redondear
+from utils.validators import Validators
+
+EJERCICIOS = ['31/12/2018', '31/12/2020', '30/06/2023', '31/12/2030']
+
+
+def _bienes(al_azar=2000):
+    """Casos borde más una muestra al azar con muchos empates en ,5 al redondear"""
+    casos = [
+        # Empates en ,5 (1,005 / 2,675 / 0,045 en tres años...)
+        dict(valor_origen=1.005, anos_amortizacion=1),
+        dict(valor_origen=2.675, anos_amortizacion=1),
+        dict(valor_origen=0.045, anos_amortizacion=3),
+        dict(valor_origen=10.125, anos_amortizacion=5),
+        dict(valor_origen=1234567.895, anos_amortizacion=7),
+        # Baja antes, durante y después del ejercicio; fecha de baja no válida
+        dict(fecha_baja='15/06/2019'),
+        dict(fecha_baja='15/06/2020'),
+        dict(fecha_baja='01/01/2031'),
+        dict(fecha_baja='no es fecha'),
+        dict(fecha_baja='31/02/2020'),
+        # No amortizables, sin años, alta posterior, vida útil cumplida
+        dict(es_amortizable=False, valor_origen=999.995),
+        dict(anos_amortizacion=0),
+        dict(ejercicio_alta=2031),
+        dict(ejercicio_alta=1990, anos_amortizacion=3),
+        dict(valor_origen=0.0),
+        dict(valor_origen=-150.555, anos_amortizacion=2),
+        # Fecha de ingreso no válida (la amortización no la usa)
+        dict(fecha_ingreso='99/99/9999'),
+    ]
+    rnd = random.Random(7)
+    for _ in range(al_azar):
+        casos.append(dict(
+            valor_origen=round(rnd.uniform(0, 100000), rnd.choice([2, 3])) + rnd.choice([0, 0.005]),
+            anos_amortizacion=rnd.randint(1, 12),
+            ejercicio_alta=rnd.randint(2010, 2025),
+            es_amortizable=rnd.random() < 0.9,
+            fecha_baja=rnd.choice([None, None, None, '30/09/2019', '31/12/2022', 'sin fecha']),
+        ))
+    
+    base = dict(descripcion='Bien', tipo_bien='Rodados', es_amortizable=True,
+                anos_amortizacion=5, ejercicio_alta=2018, fecha_ingreso='01/03/2018',
+                fecha_baja=None, valor_origen=1000.0)
+    return [Bien(id=bien_id, **{**base, **caso}) for bien_id, caso in enumerate(casos, 1)]
+
+
+def test_redondear_igual_a_round():
+    rnd = random.Random(3)
+    valores = [i / 1000 for i in range(-5000, 5000)] + [rnd.uniform(-1e7, 1e7) for _ in range(5000)]
+    valores += [0.125, 0.375, 2.675, 1.005, 1e15 + 0.5, -0.005]
+    assert redondear(valores).tolist() == [round(valor, 2) for valor in valores]
+
+
+@pytest.mark.parametrize('ejercicio', EJERCICIOS)
+def test_motor_numpy_igual_a_motor_python(ejercicio):
+    bienes = _bienes()
+    esperado = AmortizacionCalculator(motor=MOTOR_PYTHON).calcular_amortizaciones_lote(bienes, ejercicio)
+    obtenido = AmortizacionCalculator(motor=MOTOR_NUMPY).calcular_amortizaciones_lote(bienes, ejercicio)
+    assert obtenido == esperado
+
+
+@pytest.fixture(scope='module')
+def con_bienes():
+    pytest.importorskip('duckdb')
+    from db.duck import connect, init_schema, save_company_state
+    from models.empresa import EmpresaData
+    from models.indice_facpce import GestorIndicesFACPCE
+    
+    con = connect(':memory:')
+    init_schema(con)
+    empresa = EmpresaData()
+    empresa.cuit = '20123456789'
+    empresa.razon_social = 'Paridad'
+    bienes = {bien.id: bien for bien in _bienes(al_azar=300)}
+    save_company_state(con, empresa, ['Rodados'], bienes, GestorIndicesFACPCE())
+    yield con
+    con.close()
+
+
+@pytest.mark.parametrize('anio', [int(ejercicio[-4:]) for ejercicio in EJERCICIOS])
+def test_amortizaciones_sql_iguales_a_python(con_bienes, anio):
+    from db.duck import check_amortization_parity
+    
+    assert check_amortization_parity(con_bienes, anio) == []
+
+
+def test_parse_decimales_argentinos_igual_a_parse_decimal_argentino():
+    textos = ['1.234,56', '1234,56', '1234.56', '1.234.567,89', '-0,5', ',5', '5,',
+              '', '   ', ' 1 234,50 ', '\t12,3\t', 'abc', '1,2,3', '1.2.3', '1e3', '1,5e2',
+              '0,005', '2,675', '-1.000.000,005', 'inf', '12 345', '١٢٣']
+    rnd = random.Random(5)
+    textos += [Validators.format_decimal_argentino(rnd.uniform(-1e6, 1e6), rnd.randint(0, 3))
+               for _ in range(500)]
+    esperado = [Validators.parse_decimal_argentino(texto) for texto in textos]
+    assert Validators.parse_decimales_argentinos(textos).tolist() == esperado
+    
+    # Valores que no son texto o con saltos de línea van uno por uno
+    mezclados = textos[:5] + [None, '7,5\n']
+    esperado = [Validators.parse_decimal_argentino(texto) for texto in mezclados]
+    assert Validators.parse_decimales_argentinos(mezclados).tolist() == esperado
+
+
+def test_format_decimales_argentinos_igual_a_format_decimal_argentino():
+    valores = [0.0, -0.0, 0.005, 2.675, -1234.5, 1e15, 12, True, None, 'texto',
+               float('inf'), 1234567.891]
+    for decimales in (0, 2, 3):
+        esperado = [Validators.format_decimal_argentino(valor, decimales) for valor in valores]
+        assert Validators.format_decimales_argentinos(valores, decimales) == esperado
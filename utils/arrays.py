@@ -0,0 +1,29 @@
+# Soporte opcional de NumPy para los motores de cálculo vectorizados
+try:
+    import numpy as np
+except ImportError:  # Sin NumPy se usan los cálculos por bien
+    np = None
+
+
+def numpy_disponible():
+    """Indica si NumPy está instalado"""
+    return np is not None
+
+
+def redondear(valores, decimales=2):
+    """Redondea un array exactamente igual que round() de Python.
+
+    np.round escala, redondea y vuelve a dividir; sólo difiere de round()
+    cuando el valor escalado queda a un ulp de ,5. Esos casos (muy pocos)
+    se recalculan con round() escalar para obtener el mismo resultado bit a bit.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    resultado = np.round(valores, decimales)
+
+    escalados = valores * (10.0 ** decimales)
+    distancia_medio = np.abs(escalados - np.floor(escalados) - 0.5)
+    dudosos = np.flatnonzero(distancia_medio <= 2 * np.abs(np.spacing(escalados)))
+    for i in dudosos.tolist():
+        resultado[i] = round(float(valores[i]), decimales)
+
+    return resultado
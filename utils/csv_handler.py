@@ -1,7 +1,130 @@
+import codecs
 import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 from models.bien import Bien
+from utils.lector_csv import abrir_mmap, detectar_separador, filas_csv, partir_linea
 from utils.validators import Validators
 
+# Importación por lotes: filas por lote y bytes leídos para detectar encoding y separador
+TAMAÑO_LOTE = 5000
+BYTES_MUESTRA = 64 * 1024
+
+# Columnas de un bien en el CSV (las siguientes se ignoran)
+COLUMNAS_BIEN = 9
+
+# Importes de inflacion_data en el CSV ajustado (y en la vista ajustada), en orden de columna
+COLUMNAS_AJUSTADAS = (
+    'valor_origen_historico', 'vo_ajustado_anterior', 'vo_ajustado_actual',
+    'ajuste_infl_vo_ejercicio', 'amort_acum_inicio_ajustada_anterior',
+    'amort_acum_inicio_ajustada_actual', 'ajuste_infl_amort_inicio_ejercicio',
+    'amort_ejercicio_ajustada', 'amort_acum_cierre_ajustada', 'valor_residual_ajustado'
+)
+
+# Importes de amortizacion_data en el CSV completo, en orden de columna
+COLUMNAS_AMORTIZACION = ('amort_inicio', 'amort_ejercicio', 'amort_acumulada', 'valor_residual')
+
+# Importación en paralelo: bytes por tramo (cada tramo lo parsea un proceso)
+BYTES_TRAMO = 8 * 1024 * 1024
+
+
+class LoteImportacion:
+    """Bienes y errores de un tramo del archivo, con el avance en bytes"""
+    __slots__ = ('bienes', 'errores', 'bytes_leidos', 'bytes_totales')
+    
+    def __init__(self, bienes, errores, bytes_leidos, bytes_totales):
+        self.bienes = bienes
+        self.errores = errores
+        self.bytes_leidos = bytes_leidos
+        self.bytes_totales = bytes_totales
+    
+    @property
+    def progreso(self):
+        """Fracción del archivo ya procesada (0 a 1)"""
+        return self.bytes_leidos / self.bytes_totales if self.bytes_totales else 1.0
+
+
+def detectar_formato(muestra):
+    """
+    Encoding y separador a partir de los primeros bytes del archivo
+    
+    utf-8 si la muestra lo es (un carácter cortado al final no cuenta), si no
+    latin1, que como en import_from_file acepta cualquier byte. El separador
+    se elige como siempre: punto y coma si aparece en los primeros 1024 caracteres.
+    """
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+        encoding = 'utf-8'
+    except UnicodeDecodeError:
+        encoding = 'latin1'
+    texto = muestra.decode(encoding, errors='ignore')[:1024]
+    return encoding, ';' if ';' in texto else ','
+
+
+def _limites_tramos(file, bytes_totales, bytes_tramo):
+    """
+    Cortes (inicio, fin, primera fila) justo después de un \\n
+
+    Un corte nunca separa un \\r\\n. Las filas se cuentan como en modo texto:
+    cada \\n, \\r\\n o \\r suelto termina una.
+    """
+    tramos = []
+    inicio = 0
+    fila = 1
+    while inicio < bytes_totales:
+        file.seek(min(inicio + bytes_tramo, bytes_totales))
+        file.readline()
+        fin = min(file.tell(), bytes_totales)
+        file.seek(inicio)
+        tramos.append((inicio, fin, fila))
+        datos = file.read(fin - inicio)
+        fila += datos.count(b'\n') + datos.count(b'\r') - datos.count(b'\r\n')
+        inicio = fin
+    return tramos
+
+
+def _parsear_tramo(file_path, inicio, fin, primera_fila, encoding, delimiter, tipos_bienes):
+    """
+    Parsea las líneas de [inicio, fin) como filas primera_fila, primera_fila + 1...
+    
+    Corre en otro proceso: devuelve los bienes como tuplas de campos. Devuelve
+    None si el tramo no se puede numerar por líneas: un campo entre comillas
+    con saltos de línea (adentro o cortado por el fin del tramo) o un error de csv.
+    """
+    with open(file_path, 'rb') as file:
+        file.seek(inicio)
+        datos = file.read(fin - inicio)
+    
+    agotado = [False]
+    
+    def lineas():
+        for linea in io.BytesIO(datos):
+            for parte in partir_linea(linea):
+                try:
+                    yield parte.decode(encoding)
+                except UnicodeDecodeError:
+                    yield parte.decode('latin1')
+        agotado[0] = True
+    
+    filas = []
+    try:
+        reader = csv.reader(lineas(), delimiter=delimiter)
+        for row in reader:
+            if agotado[0] or reader.line_num != len(filas) + 1:
+                return None
+            filas.append(row)
+    except csv.Error:
+        return None
+    
+    bienes, errores = CsvHandler().parsear_filas(enumerate(filas, primera_fila), tipos_bienes)
+    return [(bien.id, bien.descripcion, bien.tipo_bien, bien.es_amortizable,
+             bien.anos_amortizacion, bien.ejercicio_alta, bien.fecha_ingreso,
+             bien.fecha_baja, bien.valor_origen) for bien in bienes], errores
+
+
 class CsvHandler:
     def __init__(self):
         # Usar punto y coma como separador estándar para evitar conflictos con decimales
@@ -9,73 +132,19 @@ class CsvHandler:
     
     def import_from_file(self, file_path, tipos_bienes):
         """Importa bienes desde CSV (histórico). Ignora columnas extra como fecha diferida."""
-        bienes = []
-        errores = []
-        
         try:
             # Intentar diferentes encodings
             encodings = ['utf-8', 'latin1', 'cp1252']
             
             for encoding in encodings:
                 try:
-                    with open(file_path, 'r', encoding=encoding) as file:
+                    # Archivo mapeado en memoria: sólo se decodifican las 9 columnas que se usan
+                    with abrir_mmap(file_path) as buffer:
                         # Auto-detectar separador (priorizar punto y coma)
-                        sample = file.read(1024)
-                        file.seek(0)
-                        
-                        delimiter = ';' if ';' in sample else ','
-                        
-                        csv_reader = csv.reader(file, delimiter=delimiter)
+                        delimiter = detectar_separador(buffer, encoding)
                         
-                        for row_num, row in enumerate(csv_reader, 1):
-                            try:
-                                if len(row) >= 9:  # Mínimo requerido
-                                    # Campos básicos
-                                    id_bien = int(row[0].strip()) if row[0].strip() else row_num
-                                    descripcion = row[1].strip()
-                                    tipo_bien = row[2].strip()
-                                    
-                                    if not descripcion:
-                                        errores.append(f"Fila {row_num}: Descripción vacía")
-                                        continue
-                                    
-                                    if tipo_bien not in tipos_bienes:
-                                        errores.append(f"Fila {row_num}: Tipo '{tipo_bien}' no válido")
-                                        continue
-                                    
-                                    # Campos boolean/int
-                                    es_amortizable = row[3].upper().strip() in ['SI', 'SÍ', 'S', 'YES', 'Y', '1']
-                                    anos_amortizacion = int(row[4].strip()) if row[4].strip() else 5
-                                    ejercicio_alta = int(row[5].strip()) if row[5].strip() else 2024
-                                    
-                                    # Fechas
-                                    fecha_ingreso = row[6].strip()
-                                    fecha_baja = row[7].strip() if row[7].strip() else None
-                                    
-                                    # DECIMALES CON FORMATO ARGENTINO
-                                    valor_origen = Validators.parse_decimal_argentino(row[8])
-
-                                    # Crear bien solo con datos históricos
-                                    bien = Bien(
-                                        id=id_bien,
-                                        descripcion=descripcion,
-                                        tipo_bien=tipo_bien,
-                                        es_amortizable=es_amortizable,
-                                        anos_amortizacion=anos_amortizacion,
-                                        ejercicio_alta=ejercicio_alta,
-                                        fecha_ingreso=fecha_ingreso,
-                                        fecha_baja=fecha_baja,
-                                        valor_origen=valor_origen
-                                    )
-                                    
-                                    bienes.append(bien)
-                                
-                                else:
-                                    errores.append(f"Fila {row_num}: Faltan columnas (mínimo 9)")
-                            
-                            except (ValueError, IndexError) as e:
-                                errores.append(f"Fila {row_num}: Error - {str(e)}")
-                                continue
+                        filas = filas_csv(buffer, encoding, delimiter, COLUMNAS_BIEN)
+                        bienes, errores = self.parsear_filas(enumerate(filas, 1), tipos_bienes)
                     
                     break  # Encoding exitoso
                     
@@ -93,6 +162,182 @@ class CsvHandler:
         except Exception as e:
             raise Exception(f"Error importando CSV: {str(e)}")
     
+    def parsear_fila(self, row, row_num, tipos_bienes, valor_origen=None):
+        """
+        (bien, None) para una fila válida o (None, mensaje) con el error de la fila
+        
+        Con valor_origen dado no se convierte la columna 9 (ver parsear_filas).
+        """
+        try:
+            if len(row) < COLUMNAS_BIEN:  # Mínimo requerido
+                return None, f"Fila {row_num}: Faltan columnas (mínimo 9)"
+            
+            # Campos básicos
+            id_bien = int(row[0].strip()) if row[0].strip() else row_num
+            descripcion = row[1].strip()
+            tipo_bien = row[2].strip()
+            
+            if not descripcion:
+                return None, f"Fila {row_num}: Descripción vacía"
+            
+            if tipo_bien not in tipos_bienes:
+                return None, f"Fila {row_num}: Tipo '{tipo_bien}' no válido"
+            
+            # Campos boolean/int
+            es_amortizable = row[3].upper().strip() in ['SI', 'SÍ', 'S', 'YES', 'Y', '1']
+            anos_amortizacion = int(row[4].strip()) if row[4].strip() else 5
+            ejercicio_alta = int(row[5].strip()) if row[5].strip() else 2024
+            
+            # Fechas
+            fecha_ingreso = row[6].strip()
+            fecha_baja = row[7].strip() if row[7].strip() else None
+            
+            # DECIMALES CON FORMATO ARGENTINO
+            if valor_origen is None:
+                valor_origen = Validators.parse_decimal_argentino(row[8])
+            
+            # Crear bien solo con datos históricos
+            return Bien(
+                id=id_bien,
+                descripcion=descripcion,
+                tipo_bien=tipo_bien,
+                es_amortizable=es_amortizable,
+                anos_amortizacion=anos_amortizacion,
+                ejercicio_alta=ejercicio_alta,
+                fecha_ingreso=fecha_ingreso,
+                fecha_baja=fecha_baja,
+                valor_origen=valor_origen
+            ), None
+        
+        except (ValueError, IndexError) as e:
+            return None, f"Fila {row_num}: Error - {str(e)}"
+    
+    def parsear_filas(self, filas, tipos_bienes):
+        """
+        parsear_fila para pares (número de fila, fila); devuelve (bienes, errores)
+        
+        Los valores de origen se convierten al final, toda la columna junta
+        (Validators.parse_decimales_argentinos). Las filas no se retienen.
+        """
+        bienes = []
+        errores = []
+        textos = []
+        for row_num, row in filas:
+            bien, error = self.parsear_fila(row, row_num, tipos_bienes, 0.0)
+            if error:
+                errores.append(error)
+            else:
+                bienes.append(bien)
+                textos.append(row[8])
+        
+        valores = Validators.parse_decimales_argentinos(textos)
+        for bien, valor in zip(bienes, valores.tolist() if hasattr(valores, 'tolist') else valores):
+            bien.valor_origen = valor
+        return bienes, errores
+    
+    def import_por_lotes(self, file_path, tipos_bienes, tamaño_lote=TAMAÑO_LOTE):
+        """
+        Importa bienes en modo streaming: genera LoteImportacion de hasta
+        tamaño_lote filas sin retener el archivo ni los lotes ya entregados
+        
+        El encoding se detecta una sola vez con una muestra de bytes y el archivo
+        se lee una vez. Una línea que no respeta el encoding detectado se decodifica
+        como latin1. Mismas reglas y mensajes de error que import_from_file.
+        """
+        try:
+            bytes_totales = os.path.getsize(file_path)
+            with open(file_path, 'rb') as file:
+                encoding, delimiter = detectar_formato(file.read(BYTES_MUESTRA))
+                file.seek(0)
+                yield from self._lotes_desde(file, encoding, delimiter, tipos_bienes,
+                                             tamaño_lote, bytes_totales)
+        
+        except (OSError, csv.Error) as e:
+            raise Exception(f"Error importando CSV: {str(e)}")
+    
+    def _lotes_desde(self, file, encoding, delimiter, tipos_bienes, tamaño_lote, bytes_totales,
+                     primera_fila=1):
+        """Lotes de las filas desde la posición actual del archivo, numeradas desde primera_fila"""
+        inicio = file.tell()
+        leidos = [inicio]
+        
+        def lineas():
+            # Cortadas como en modo texto: un \r suelto también termina la línea
+            for linea in file:
+                leidos[0] += len(linea)
+                for parte in partir_linea(linea):
+                    try:
+                        yield parte.decode(encoding)
+                    except UnicodeDecodeError:
+                        yield parte.decode('latin1')
+        
+        filas = enumerate(csv.reader(lineas(), delimiter=delimiter), primera_fila)
+        while True:
+            # Cada fila da un bien o un error: un lote vacío es el fin del archivo
+            bienes, errores = self.parsear_filas(islice(filas, tamaño_lote), tipos_bienes)
+            if not bienes and not errores:
+                break
+            yield LoteImportacion(bienes, errores, leidos[0], bytes_totales)
+        
+        if leidos[0] == inicio == 0:
+            yield LoteImportacion([], [], 0, bytes_totales)
+    
+    def import_paralelo(self, file_path, tipos_bienes, procesos=None, bytes_tramo=BYTES_TRAMO):
+        """
+        Como import_por_lotes, pero el archivo se corta en tramos de líneas
+        completas que se parsean en un pool de procesos; genera un
+        LoteImportacion por tramo, en el orden del archivo
+        
+        Las filas se numeran contando saltos de línea, así que los mensajes de
+        error y los IDs por defecto coinciden con los de import_from_file. Desde
+        el primer tramo que no se puede numerar así (campos con saltos de línea)
+        el resto del archivo se lee en este proceso. Archivos de un solo tramo
+        o con un solo procesador van directo a import_por_lotes.
+        """
+        procesos = procesos or os.cpu_count() or 1
+        try:
+            bytes_totales = os.path.getsize(file_path)
+        except OSError as e:
+            raise Exception(f"Error importando CSV: {str(e)}")
+        if procesos < 2 or bytes_totales <= bytes_tramo:
+            yield from self.import_por_lotes(file_path, tipos_bienes)
+            return
+        
+        try:
+            with open(file_path, 'rb') as file:
+                encoding, delimiter = detectar_formato(file.read(BYTES_MUESTRA))
+                tramos = _limites_tramos(file, bytes_totales, bytes_tramo)
+        except OSError as e:
+            raise Exception(f"Error importando CSV: {str(e)}")
+        
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = [pool.submit(_parsear_tramo, file_path, inicio, fin, fila,
+                                   encoding, delimiter, tipos_bienes)
+                       for inicio, fin, fila in tramos]
+            try:
+                for (inicio, fin, fila), futuro in zip(tramos, futuros):
+                    resultado = futuro.result()
+                    if resultado is None:
+                        break
+                    bienes, errores = resultado
+                    yield LoteImportacion([Bien(*campos) for campos in bienes], errores,
+                                          fin, bytes_totales)
+                else:
+                    return
+            finally:
+                # Los tramos que no llegaron a empezar no hacen falta
+                for futuro in futuros:
+                    futuro.cancel()
+        
+        # Desde el tramo que no se pudo numerar por líneas, lectura secuencial
+        try:
+            with open(file_path, 'rb') as file:
+                file.seek(inicio)
+                yield from self._lotes_desde(file, encoding, delimiter, tipos_bienes,
+                                             TAMAÑO_LOTE, bytes_totales, fila)
+        except (OSError, csv.Error) as e:
+            raise Exception(f"Error importando CSV: {str(e)}")
+    
     def export_to_file(self, bienes, file_path, include_amortizacion=False, include_inflacion=False):
         """Exporta a CSV con separador punto y coma y formato argentino"""
         try:
@@ -123,44 +368,36 @@ class CsvHandler:
                 
                 csv_writer.writerow(headers)
                 
-                # Datos con formato argentino
+                # Datos con formato argentino, importes formateados por columna
                 bienes_ordenados = sorted(bienes, key=lambda x: x.id)
-                for bien in bienes_ordenados:
-                    if include_inflacion and hasattr(bien, 'inflacion_data'):
-                        data = bien.inflacion_data
-                        row = [
+                if include_inflacion:
+                    importes = [
+                        Validators.format_decimales_argentinos(
+                            [bien.inflacion_data.get(clave, 0) for bien in bienes_ordenados])
+                        for clave in COLUMNAS_AJUSTADAS
+                    ]
+                    for bien, textos in zip(bienes_ordenados, zip(*importes)):
+                        csv_writer.writerow([
                             bien.id, bien.descripcion, bien.tipo_bien,
-                            bien.fecha_ingreso,
-                            Validators.format_decimal_argentino(data.get('valor_origen_historico', 0)),
-                            Validators.format_decimal_argentino(data.get('vo_ajustado_anterior', 0)),
-                            Validators.format_decimal_argentino(data.get('vo_ajustado_actual', 0)),
-                            Validators.format_decimal_argentino(data.get('ajuste_infl_vo_ejercicio', 0)),
-                            Validators.format_decimal_argentino(data.get('amort_acum_inicio_ajustada_anterior', 0)),
-                            Validators.format_decimal_argentino(data.get('amort_acum_inicio_ajustada_actual', 0)),
-                            Validators.format_decimal_argentino(data.get('ajuste_infl_amort_inicio_ejercicio', 0)),
-                            Validators.format_decimal_argentino(data.get('amort_ejercicio_ajustada', 0)),
-                            Validators.format_decimal_argentino(data.get('amort_acum_cierre_ajustada', 0)),
-                            Validators.format_decimal_argentino(data.get('valor_residual_ajustado', 0))
-                        ]
-                    else:
-                        # Datos básicos o con amortización
-                        row = [
+                            bien.fecha_ingreso, *textos
+                        ])
+                else:
+                    # Datos básicos o con amortización
+                    importes = [Validators.format_decimales_argentinos(
+                        [bien.valor_origen for bien in bienes_ordenados])]
+                    if include_amortizacion:
+                        importes.extend(
+                            Validators.format_decimales_argentinos(
+                                [bien.amortizacion_data[clave] for bien in bienes_ordenados])
+                            for clave in COLUMNAS_AMORTIZACION
+                        )
+                    for bien, textos in zip(bienes_ordenados, zip(*importes)):
+                        csv_writer.writerow([
                             bien.id, bien.descripcion, bien.tipo_bien,
                             'SI' if bien.es_amortizable else 'NO',
                             bien.anos_amortizacion, bien.ejercicio_alta,
-                            bien.fecha_ingreso, bien.fecha_baja or '',
-                            Validators.format_decimal_argentino(bien.valor_origen)
-                        ]
-                        
-                        if include_amortizacion and hasattr(bien, 'amortizacion_data'):
-                            row.extend([
-                                Validators.format_decimal_argentino(bien.amortizacion_data['amort_inicio']),
-                                Validators.format_decimal_argentino(bien.amortizacion_data['amort_ejercicio']),
-                                Validators.format_decimal_argentino(bien.amortizacion_data['amort_acumulada']),
-                                Validators.format_decimal_argentino(bien.amortizacion_data['valor_residual'])
-                            ])
-                    
-                    csv_writer.writerow(row)
+                            bien.fecha_ingreso, bien.fecha_baja or '', *textos
+                        ])
             
         except Exception as e:
             raise Exception(f"Error escribiendo CSV: {str(e)}")
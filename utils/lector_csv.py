@@ -0,0 +1,141 @@
+import csv
+import mmap
+import os
+from collections import deque
+from contextlib import contextmanager
+from itertools import chain, repeat
+
+# Bytes por bloque de líneas simples que se decodifica y corta de una vez
+BYTES_BLOQUE = 64 * 1024
+
+# Bytes que obligan a leer la línea con csv.reader: comillas (campos entre
+# comillas, posiblemente de varias líneas) y NUL
+_COMILLA = b'"'
+_NUL = b'\0'
+
+
+@contextmanager
+def abrir_mmap(file_path):
+    """Archivo mapeado en memoria de sólo lectura (b'' si está vacío)"""
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def detectar_separador(buffer, encoding):
+    """Punto y coma si aparece en los primeros 1024 caracteres, si no coma"""
+    muestra = bytes(buffer[:4 * 1024]).decode(encoding, errors='ignore')
+    return ';' if ';' in muestra[:1024] else ','
+
+
+def partir_linea(linea):
+    """
+    Partes de una línea leída en binario como las lee open() en modo texto:
+    cada \\r\\n o \\r suelto termina una línea y pasa a \\n
+    """
+    if b'\r' not in linea:
+        return [linea]
+    return [parte.rstrip(b'\r\n') + b'\n' if parte.endswith((b'\r', b'\n')) else parte
+            for parte in linea.splitlines(keepends=True)]
+
+
+def _lineas_bloque(bloque, encoding, limite):
+    """
+    Líneas de un bloque sin comillas ni NUL, decodificado entero
+
+    None si hace falta ir línea por línea: un \\r que no es parte de \\r\\n,
+    bytes que no respetan el encoding o una línea más larga que el límite de csv.
+    """
+    if b'\r' in bloque:
+        if bloque.count(b'\r') != bloque.count(b'\r\n'):
+            return None
+        bloque = bloque.replace(b'\r\n', b'\n')
+    try:
+        texto = bloque.decode(encoding)
+    except UnicodeDecodeError:
+        return None
+
+    lineas = texto.split('\n')
+    if texto.endswith('\n'):
+        lineas.pop()
+    if max(map(len, lineas)) > limite:
+        return None
+    return lineas
+
+
+def filas_csv(buffer, encoding, delimiter, columnas=None):
+    """
+    Filas de un CSV mapeado en memoria, iguales a las de csv.reader sobre el
+    archivo abierto en modo texto con ese encoding
+
+    Los tramos de líneas sin comillas se decodifican y cortan por bloques de
+    BYTES_BLOQUE. Si un bloque no se puede decodificar entero, sus líneas se
+    cortan sobre los bytes y sólo se decodifican las primeras columnas campos
+    (todas si es None). El resto de la fila no se devuelve. Las líneas con
+    comillas pasan por csv.reader, que toma las líneas siguientes si un campo
+    sigue abierto.
+    """
+    if not buffer:
+        return
+
+    total = len(buffer)
+    separador = delimiter.encode(encoding)
+    limite = csv.field_size_limit()
+    # Partes de una línea con \r sueltos que todavía no se leyeron
+    pendientes = deque()
+
+    def siguiente_linea():
+        """Próxima línea como la lee open() en modo texto: \\r\\n y \\r pasan a \\n"""
+        if not pendientes:
+            linea = buffer.readline()
+            if b'\r' not in linea:
+                return linea
+            pendientes.extend(partir_linea(linea))
+        return pendientes.popleft()
+
+    def decodificadas(primera):
+        for linea in chain((primera,), iter(siguiente_linea, b'')):
+            yield linea.decode(encoding)
+
+    def fila_de(linea):
+        if _COMILLA in linea or _NUL in linea or len(linea) > limite:
+            return next(csv.reader(decodificadas(linea), delimiter=delimiter), [])[:columnas]
+
+        contenido = linea[:-1] if linea.endswith(b'\n') else linea
+        if not contenido:
+            return []
+        campos = contenido.split(separador, columnas) if columnas else contenido.split(separador)
+        return [campo.decode(encoding) for campo in campos[:columnas]]
+
+    posicion = 0
+    while posicion < total:
+        fin = buffer.find(b'\n', min(posicion + BYTES_BLOQUE, total) - 1)
+        fin = total if fin < 0 else fin + 1
+
+        # Las líneas simples antes de la primera comilla o NUL van por bloque
+        especiales = [i for i in (buffer.find(_COMILLA, posicion, fin),
+                                  buffer.find(_NUL, posicion, fin)) if i >= 0]
+        corte = buffer.rfind(b'\n', posicion, min(especiales)) + 1 if especiales else fin
+        if corte > posicion:
+            lineas = _lineas_bloque(buffer[posicion:corte], encoding, limite)
+            if lineas is not None:
+                # Cada fila se arma al pedirla: el bloque sólo retiene los textos
+                for fila in map(str.split, lineas, repeat(delimiter), repeat(columnas or -1)):
+                    if columnas and len(fila) > columnas:
+                        del fila[columnas:]
+                    elif len(fila) == 1 and not fila[0]:
+                        # csv.reader devuelve una fila vacía para una línea en blanco
+                        fila = []
+                    yield fila
+                posicion = corte
+                continue
+
+        # Línea por línea: el bloque que no se pudo decodificar entero o la línea especial
+        hasta = max(corte, posicion + 1)
+        buffer.seek(posicion)
+        while buffer.tell() < hasta or pendientes:
+            yield fila_de(siguiente_linea())
+        posicion = buffer.tell()
@@ -1,16 +1,72 @@
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+
+from utils.arrays import np
+
+# Fechas distintas que recuerda el parser (ejercicios, fechas de ingreso e índices)
+TAMAÑO_CACHE_FECHAS = 8192
+
+# Decimales argentinos por columna: limpieza de un texto con coma decimal e
+# intercambio de separadores del formato internacional
+_COMA_DECIMAL = str.maketrans({'.': None, ',': '.', ' ': None})
+_SEPARADORES = str.maketrans(',.', '.,')
+_NUMEROS = {float, int, bool}
+
+
+def _float_o_cero(texto):
+    try:
+        return float(texto)
+    except ValueError:
+        return 0.0
+
+
+@lru_cache(maxsize=TAMAÑO_CACHE_FECHAS)
+def _parsear_fecha(fecha_str):
+    # Camino rápido para DD/MM/AAAA exacto; el resto (1/3/2024, textos) va por strptime
+    if (len(fecha_str) == 10 and fecha_str[2] == '/' and fecha_str[5] == '/'
+            and fecha_str.isascii()):
+        dia, mes, año = fecha_str[:2], fecha_str[3:5], fecha_str[6:]
+        if dia.isdigit() and mes.isdigit() and año.isdigit():
+            try:
+                fecha_obj = date(int(año), int(mes), int(dia))
+            except ValueError:
+                return None
+            return fecha_obj.year, fecha_obj.month, fecha_obj.day, fecha_obj.toordinal()
+    try:
+        fecha_obj = datetime.strptime(fecha_str, '%d/%m/%Y')
+    except ValueError:
+        return None
+    return fecha_obj.year, fecha_obj.month, fecha_obj.day, fecha_obj.toordinal()
 
 
 class Validators:
     _CUIT_WEIGHTS = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
 
+    @staticmethod
+    def parsear_fecha(fecha_str):
+        """(año, mes, día, ordinal) de una fecha DD/MM/AAAA, o None si no es válida.
+
+        Usa una caché acotada compartida; como strptime, un valor que no es
+        texto lanza TypeError.
+        """
+        if not isinstance(fecha_str, str):
+            raise TypeError(f"La fecha debe ser un texto DD/MM/AAAA, no {type(fecha_str).__name__}")
+        return _parsear_fecha(fecha_str)
+
+    @staticmethod
+    def estadisticas_cache_fechas():
+        """Aciertos, fallos y ocupación de la caché de fechas"""
+        info = _parsear_fecha.cache_info()
+        return {'aciertos': info.hits, 'fallos': info.misses,
+                'tamaño': info.currsize, 'maximo': info.maxsize}
+
+    @staticmethod
+    def limpiar_cache_fechas():
+        _parsear_fecha.cache_clear()
+
     @staticmethod
     def validar_fecha(fecha_str):
-        try:
-            datetime.strptime(fecha_str, '%d/%m/%Y')
-            return True
-        except ValueError:
-            return False
+        return Validators.parsear_fecha(fecha_str) is not None
     
     @staticmethod
     def validar_cuit(cuit):
@@ -39,10 +95,8 @@ class Validators:
     
     @staticmethod
     def extraer_año_ejercicio(fecha_cierre):
-        try:
-            return datetime.strptime(fecha_cierre, '%d/%m/%Y').year
-        except ValueError:
-            return None
+        partes = Validators.parsear_fecha(fecha_cierre)
+        return partes[0] if partes else None
     
     @staticmethod
     def parse_decimal_argentino(value_str):
@@ -79,6 +133,53 @@ class Validators:
         except:
             return str(value)
     
+    @staticmethod
+    def parse_decimales_argentinos(valores):
+        """
+        parse_decimal_argentino de una columna completa: array float64 (lista sin NumPy)
+        
+        Los textos se limpian unidos en un solo str (float() ignora los espacios
+        de los extremos que parse_decimal_argentino quita). Si algún valor no es
+        texto o tiene saltos de línea, se convierte uno por uno.
+        """
+        valores = list(valores)
+        partes = None
+        if all(type(valor) is str for valor in valores):
+            partes = '\n'.join(valores).translate(_COMA_DECIMAL).split('\n')
+        
+        if partes is None or len(partes) != len(valores):
+            numeros = [Validators.parse_decimal_argentino(valor) for valor in valores]
+        else:
+            # Sin coma decimal sólo se quitan los espacios (los puntos son decimales)
+            limpios = [parte if ',' in valor else valor.replace(' ', '')
+                       for parte, valor in zip(partes, valores)]
+            try:
+                numeros = list(map(float, limpios))
+            except ValueError:
+                numeros = [_float_o_cero(limpio) for limpio in limpios]
+        
+        return np.array(numeros, dtype=np.float64) if np is not None else numeros
+    
+    @staticmethod
+    def format_decimales_argentinos(valores, decimals=2):
+        """
+        format_decimal_argentino de una columna completa: lista de textos
+        
+        Los números se formatean con un solo str.format y un solo intercambio de
+        separadores; el resto (None, textos...) uno por uno.
+        """
+        valores = valores.tolist() if hasattr(valores, 'tolist') else list(valores)
+        numeros = [valor for valor in valores if type(valor) in _NUMEROS]
+        try:
+            formato = f'{{:,.{decimals}f}}\n' * len(numeros)
+            textos = iter(formato.format(*numeros).translate(_SEPARADORES).split('\n'))
+        except (ValueError, OverflowError, TypeError):
+            return [Validators.format_decimal_argentino(valor, decimals) for valor in valores]
+        
+        return [next(textos) if type(valor) in _NUMEROS
+                else Validators.format_decimal_argentino(valor, decimals)
+                for valor in valores]
+    
     @staticmethod
     def validar_indice_facpce(indice_str):
         """Valida índice FACPCE con formato argentino"""
@@ -99,16 +200,14 @@ class Validators:
         if not Validators.validar_fecha(ejercicio_actual):
             return False, "Ejercicio actual debe tener formato DD/MM/AAAA"
         
-        try:
-            fecha_anterior = datetime.strptime(ejercicio_anterior, '%d/%m/%Y')
-            fecha_actual = datetime.strptime(ejercicio_actual, '%d/%m/%Y')
-            
-            if fecha_anterior >= fecha_actual:
-                return False, "Ejercicio anterior debe ser anterior al actual"
-            
-            return True, ""
-        except ValueError:
-            return False, "Error validando ejercicios"
+        # Ambas fechas ya se validaron: comparar por ordinal
+        ordinal_anterior = Validators.parsear_fecha(ejercicio_anterior)[3]
+        ordinal_actual = Validators.parsear_fecha(ejercicio_actual)[3]
+        
+        if ordinal_anterior >= ordinal_actual:
+            return False, "Ejercicio anterior debe ser anterior al actual"
+        
+        return True, ""
     
     @staticmethod
     def validar_decimal_positivo(value_str, nombre_campo="valor"):
@@ -196,21 +196,12 @@ class GestionIndices:
         fecha = self.tree.item(item)['values'][0]
         
         if messagebox.askyesno("Confirmar", f"¿Eliminar índice del {fecha}?"):
-            # Buscar clave
-            from datetime import datetime
-            try:
-                fecha_obj = datetime.strptime(fecha, '%d/%m/%Y')
-                key = f"{fecha_obj.month:02d}/{fecha_obj.year}"
-                
-                if key in self.gestor_indices.indices:
-                    del self.gestor_indices.indices[key]
-                    self.refresh_table()
-                    messagebox.showinfo("Éxito", "Índice eliminado")
-                    self._changed()
-                else:
-                    messagebox.showerror("Error", "No se pudo eliminar el índice")
-            except ValueError:
-                messagebox.showerror("Error", "Error procesando la fecha")
+            if self.gestor_indices.eliminar_indice(fecha):
+                self.refresh_table()
+                messagebox.showinfo("Éxito", "Índice eliminado")
+                self._changed()
+            else:
+                messagebox.showerror("Error", "No se pudo eliminar el índice")
     
     def on_item_double_click(self, event):
         """Maneja doble click en la tabla"""
@@ -304,11 +295,12 @@ class GestionIndices:
         
         # Cargar índices ordenados
         indices = self.gestor_indices.get_todos_indices()
+        valores = Validators.format_decimales_argentinos([indice.indice for indice in indices], 6)
         
-        for indice in indices:
+        for indice, valor in zip(indices, valores):
             self.tree.insert('', 'end', values=(
                 indice.fecha,
-                Validators.format_decimal_argentino(indice.indice, 6),
+                valor,
                 indice.observaciones,
                 indice.fecha_carga
             ))
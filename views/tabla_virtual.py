@@ -0,0 +1,130 @@
+from tkinter import ttk
+
+
+class TablaVirtual:
+    """
+    Treeview virtualizado: sólo existen los ítems de las filas visibles
+    (más un margen chico) y se reutilizan al desplazarse.
+
+    filas es cualquier secuencia con len() y filas[i] -> tupla de valores
+    (por ejemplo FilasTabla, que formatea cada fila al pedirla). La primera
+    columna identifica la fila y se usa para conservar la selección.
+    """
+
+    MARGEN = 5
+    ALTO_ENCABEZADO = 25
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.filas = ()
+        self.inicio = 0
+        self._items = []
+        self._claves_visibles = []
+        self._seleccion = set()
+
+        # La barra mueve el desplazamiento propio, no la vista del Treeview
+        self.scrollbar.configure(command=self._on_scrollbar)
+        self.tree.configure(yscrollcommand=lambda *args: None)
+
+        self.tree.bind('<Configure>', lambda event: self._render())
+        self.tree.bind('<MouseWheel>', self._on_rueda)
+        self.tree.bind('<Button-4>', lambda event: self._desplazar_evento(-3))
+        self.tree.bind('<Button-5>', lambda event: self._desplazar_evento(3))
+        self.tree.bind('<Down>', lambda event: self._on_flecha(1))
+        self.tree.bind('<Up>', lambda event: self._on_flecha(-1))
+        self.tree.bind('<Next>', lambda event: self._desplazar_evento(self._visibles()))
+        self.tree.bind('<Prior>', lambda event: self._desplazar_evento(-self._visibles()))
+        self.tree.bind('<<TreeviewSelect>>', self._on_seleccion, add='+')
+
+    def mostrar(self, filas):
+        """Reemplaza las filas conservando la posición (si sigue existiendo)"""
+        self.filas = filas
+        self.inicio = self._limitar(self.inicio)
+        self._render()
+
+    def desplazar(self, filas):
+        inicio = self._limitar(self.inicio + filas)
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._render()
+
+    def _visibles(self):
+        alto = self.tree.winfo_height()
+        if alto <= 1:
+            # Todavía sin dibujar: usar la altura configurada
+            return int(self.tree.cget('height'))
+        alto_fila = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        return max(1, (alto - self.ALTO_ENCABEZADO) // alto_fila)
+
+    def _limitar(self, inicio):
+        return max(0, min(inicio, len(self.filas) - self._visibles()))
+
+    def _render(self):
+        total = len(self.filas)
+        visibles = self._visibles()
+        cantidad = max(0, min(visibles + self.MARGEN, total - self.inicio))
+
+        # Ajustar la cantidad de ítems reutilizables
+        while len(self._items) < cantidad:
+            self._items.append(self.tree.insert('', 'end'))
+        if len(self._items) > cantidad:
+            self.tree.delete(*self._items[cantidad:])
+            del self._items[cantidad:]
+
+        self._claves_visibles = []
+        for item, indice in zip(self._items, range(self.inicio, self.inicio + cantidad)):
+            valores = self.filas[indice]
+            self.tree.item(item, values=valores)
+            self._claves_visibles.append(str(valores[0]))
+
+        seleccionados = [item for item, clave in zip(self._items, self._claves_visibles)
+                         if clave in self._seleccion]
+        self.tree.selection_set(seleccionados)
+        self.tree.yview_moveto(0)
+
+        if total:
+            self.scrollbar.set(self.inicio / total, min(1.0, (self.inicio + visibles) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scrollbar(self, accion, cantidad, unidad=None):
+        if accion == 'moveto':
+            self.desplazar(int(float(cantidad) * len(self.filas)) - self.inicio)
+        elif accion == 'scroll':
+            paso = self._visibles() if unidad == 'pages' else 1
+            self.desplazar(int(cantidad) * paso)
+
+    def _on_rueda(self, event):
+        pasos = -1 if event.delta > 0 else 1
+        return self._desplazar_evento(pasos * 3)
+
+    def _desplazar_evento(self, filas):
+        self.desplazar(filas)
+        return 'break'
+
+    def _on_flecha(self, paso):
+        """Al llegar al borde visible con el teclado, desplaza en vez de salir de la vista"""
+        foco = self.tree.focus()
+        if foco not in self._items:
+            return None
+        posicion = self._items.index(foco)
+        en_borde = (posicion + paso >= self._visibles()) if paso > 0 else (posicion + paso < 0)
+        if not en_borde:
+            return None
+
+        inicio_anterior = self.inicio
+        self.desplazar(paso)
+        if self.inicio != inicio_anterior:
+            item = self._items[posicion]
+            self._seleccion = {self._claves_visibles[posicion]}
+            self.tree.selection_set(item)
+            self.tree.focus(item)
+        return 'break'
+
+    def _on_seleccion(self, event):
+        # Lo seleccionado fuera de la vista se conserva; lo visible manda
+        claves_visibles = set(self._claves_visibles)
+        seleccion_visible = {self._claves_visibles[self._items.index(item)]
+                             for item in self.tree.selection() if item in self._items}
+        self._seleccion = (self._seleccion - claves_visibles) | seleccion_visible
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
+from utils.csv_handler import COLUMNAS_AJUSTADAS
 from utils.validators import Validators
 
 class VistaAjustada:
@@ -156,7 +157,7 @@ class VistaAjustada:
         
         # Procesar resultados
         errores_indices = []
-        bienes_procesados = 0
+        procesados = []
         
         for bien_id, bien in self.bienes.items():
             inflacion_data = inflaciones.get(bien_id, {})
@@ -167,26 +168,18 @@ class VistaAjustada:
             
             # Guardar datos en el bien para exportación
             bien.inflacion_data = inflacion_data
-            
-            values = (
-                bien.id,
-                bien.descripcion,
-                bien.tipo_bien,
-                bien.fecha_ingreso,
-                Validators.format_decimal_argentino(inflacion_data.get('valor_origen_historico', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('vo_ajustado_anterior', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('vo_ajustado_actual', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('ajuste_infl_vo_ejercicio', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('amort_acum_inicio_ajustada_anterior', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('amort_acum_inicio_ajustada_actual', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('ajuste_infl_amort_inicio_ejercicio', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('amort_ejercicio_ajustada', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('amort_acum_cierre_ajustada', 0)),
-                Validators.format_decimal_argentino(inflacion_data.get('valor_residual_ajustado', 0))
-            )
-            
+            procesados.append(bien)
+        
+        # Importes formateados por columna
+        importes = [
+            Validators.format_decimales_argentinos(
+                [bien.inflacion_data.get(clave, 0) for bien in procesados])
+            for clave in COLUMNAS_AJUSTADAS
+        ]
+        for bien, textos in zip(procesados, zip(*importes)):
+            values = (bien.id, bien.descripcion, bien.tipo_bien, bien.fecha_ingreso) + textos
             self.tree.insert('', 'end', values=values)
-            bienes_procesados += 1
+        bienes_procesados = len(procesados)
         
         # Manejar errores de índices faltantes
         if errores_indices: